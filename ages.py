@@ -0,0 +1,132 @@
+from datetime import date
+
+AGE_CATEGORIES = ["entry", "points", "win", "pole"]
+
+def birthday_ordinal(dob_ordinal:int, years:int) -> int:
+    """
+    Day ordinal of the day a person turns a given age. Birthdays on 29th of February fall on 1st of March in common years
+    Parameters:
+        dob_ordinal: int; date of birth as day ordinal
+        years: int; age in years
+    Outputs:
+        ordinal: int; day ordinal of birthday
+    """
+    dob = date.fromordinal(dob_ordinal)
+    try:
+        return dob.replace(year=dob.year+years).toordinal()
+    except ValueError:
+        return date(dob.year+years, 3, 1).toordinal()
+
+def age_in_years(dob_ordinal:int, day_ordinal:int) -> int:
+    """
+    Age in full years on a given day
+    """
+    dob = date.fromordinal(dob_ordinal)
+    day = date.fromordinal(day_ordinal)
+    return day.year - dob.year - ((day.month, day.day) < (dob.month, dob.day))
+
+def record_categories(record) -> list[str]:
+    """
+    Get the age categories a result record counts towards
+    Parameters:
+        record: ResultRecord; result of a driver in a race
+    Outputs:
+        categories: list[str]; subset of AGE_CATEGORIES
+    """
+    categories = ["entry"]
+    if record.points > 0:
+        categories.append("points")
+    if record.position == 1:
+        categories.append("win")
+    race = record.race
+    if (race.has_qualifying() or len(race.get_grid()) > 0) and race.get_pole()[0] == record.driver:
+        categories.append("pole")
+    return categories
+
+def age_extremes(records:list) -> dict[str, tuple]:
+    """
+    Find the results achieved at the youngest and oldest age in each category
+    Parameters:
+        records: list[ResultRecord]; results to search, records without age are skipped
+    Outputs:
+        extremes: dict[str, tuple]; {category: (youngest record, oldest record)}
+    """
+    extremes = {}
+    for record in records:
+        if record.age == None:
+            continue
+        for category in record_categories(record):
+            if category not in extremes.keys():
+                extremes[category] = (record, record)
+            else:
+                youngest, oldest = extremes[category]
+                extremes[category] = (record if record.age < youngest.age else youngest,
+                                      record if record.age > oldest.age else oldest)
+    return extremes
+
+
+class AgeRecords():
+    """
+    Archive wide age records. Built from the age extremes precomputed per driver,
+    so every record and threshold query is a single comparison per driver.
+    """
+
+    def __init__(self, drivers:list):
+        """
+        Find youngest and oldest results in each category
+        Parameters:
+            drivers: list[Driver]; drivers to search
+        """
+        self.drivers = drivers
+        self.youngest = {} # category: youngest record
+        self.oldest = {} # category: oldest record
+        for driver in drivers:
+            for category, (youngest, oldest) in driver.get_age_stats().items():
+                if category not in self.youngest.keys() or youngest.age < self.youngest[category].age:
+                    self.youngest[category] = youngest
+                if category not in self.oldest.keys() or oldest.age > self.oldest[category].age:
+                    self.oldest[category] = oldest
+
+    def get_youngest(self, category:str):
+        """
+        Get the result achieved at the youngest age in a category, e.g. youngest winner
+        """
+        assert category in AGE_CATEGORIES, f"Unknown category {category}!"
+        return self.youngest.get(category)
+
+    def get_oldest(self, category:str):
+        """
+        Get the result achieved at the oldest age in a category, e.g. oldest winner
+        """
+        assert category in AGE_CATEGORIES, f"Unknown category {category}!"
+        return self.oldest.get(category)
+
+    def drivers_before_age(self, category:str, years:int) -> list:
+        """
+        Get every driver with a result in category before turning given age
+        """
+        return [driver for driver in self.drivers if achieved_before_age(driver, category, years)]
+
+    def drivers_after_age(self, category:str, years:int) -> list:
+        """
+        Get every driver with a result in category after turning given age
+        """
+        return [driver for driver in self.drivers if achieved_after_age(driver, category, years)]
+
+def achieved_before_age(driver, category:str, years:int) -> bool:
+    """
+    Check if driver had a result in category before turning given age
+    """
+    age_stats = driver.get_age_stats()
+    if category not in age_stats.keys():
+        return False
+    return age_stats[category][0].race.date_ordinal < birthday_ordinal(driver.dob_ordinal, years)
+
+def achieved_after_age(driver, category:str, years:int) -> bool:
+    """
+    Check if driver had a result in category on or after turning given age
+    """
+    age_stats = driver.get_age_stats()
+    if category not in age_stats.keys():
+        return False
+    return age_stats[category][1].race.date_ordinal >= birthday_ordinal(driver.dob_ordinal, years)
@@ -0,0 +1,128 @@
+from array import array
+
+_worker_masks = None # Answer bitmaps of a worker process, see init_worker()
+
+def build_mask(check, candidates:list) -> int:
+    """
+    Build a bitmap over the dense indexes of candidates
+    Parameters:
+        check: Callable; function returning True for candidates to include
+        candidates: list; candidates, bit i stands for candidates[i]
+    Outputs:
+        mask: int; bitmap with bit i set if check(candidates[i]) is True
+    """
+    mask = 0
+    for i, candidate in enumerate(candidates):
+        if check(candidate):
+            mask |= 1 << i
+    return mask
+
+def mask_members(mask:int, candidates:list) -> list:
+    """
+    Get the candidates of a bitmap, in candidate order
+    Parameters:
+        mask: int; bitmap over the dense indexes of candidates
+        candidates: list; candidates the bitmap was built over
+    Outputs:
+        members: list; candidates with their bit set
+    """
+    members = []
+    while mask:
+        lowest = mask & -mask
+        members.append(candidates[lowest.bit_length() - 1])
+        mask ^= lowest
+    return members
+
+def popcount(mask:int) -> int:
+    """
+    Number of set bits of a bitmap
+    """
+    return mask.bit_count()
+
+
+class MaskWeights():
+    """
+    Sum of per-candidate weights over the set bits of a bitmap, from lookup tables of 8-bit chunks
+    """
+    CHUNK_BITS = 8
+
+    def __init__(self, weights:list[float]):
+        """
+        Parameters:
+            weights: list[float]; weight of each candidate, weight i belongs to bit i
+        """
+        self.n_chunks = (len(weights) + self.CHUNK_BITS - 1)//self.CHUNK_BITS
+        self.tables = [] # tables[k][byte]: total weight of set bits of byte at chunk k
+        for k in range(self.n_chunks):
+            chunk = weights[k*self.CHUNK_BITS:(k+1)*self.CHUNK_BITS]
+            table = [0.0]*(1 << self.CHUNK_BITS)
+            for byte in range(1, 1 << self.CHUNK_BITS):
+                lowest = (byte & -byte).bit_length() - 1
+                table[byte] = table[byte & (byte - 1)] + (chunk[lowest] if lowest < len(chunk) else 0.0)
+            self.tables.append(table)
+
+    def total(self, mask:int) -> float:
+        """
+        Total weight of the set bits of a bitmap
+        """
+        total = 0.0
+        chunk_mask = (1 << self.CHUNK_BITS) - 1
+        k = 0
+        while mask:
+            total += self.tables[k][mask & chunk_mask]
+            mask >>= self.CHUNK_BITS
+            k += 1
+        return total
+
+def inverted_masks(candidates:list, keys_of) -> dict:
+    """
+    Build the bitmap of every key over candidates in one pass
+    Parameters:
+        candidates: list; candidates, bit i stands for candidates[i]
+        keys_of: Callable; function returning the keys of a candidate
+    Outputs:
+        masks: dict; {key: bitmap of candidates having key}
+    """
+    masks = {}
+    for i, candidate in enumerate(candidates):
+        for key in keys_of(candidate):
+            masks[key] = masks.get(key, 0) | 1 << i
+    return masks
+
+def compatibility_rows(masks:list[int], start:int, end:int) -> list[array]:
+    """
+    Count the mutual answers of questions start...end-1 with themselves and every later question,
+    the matrix is symmetric so pairs with earlier questions are left to mirror_rows()
+    Parameters:
+        masks: list[int]; answer bitmap of each question
+        start: int; index of first row
+        end: int; index after last row
+    Outputs:
+        rows: list[array]; upper triangle of rows start...end-1 of the compatibility matrix, as unsigned int arrays.
+            rows[k][m] is the count of questions start+k and start+k+m
+    """
+    return [array("I", [popcount(masks[i] & masks[j]) for j in range(i, len(masks))]) for i in range(start, end)]
+
+def mirror_rows(upper_rows:list[array]) -> list[array]:
+    """
+    Build the full compatibility matrix from its upper triangle
+    Parameters:
+        upper_rows: list[array]; upper triangle of every row, see compatibility_rows()
+    Outputs:
+        rows: list[array]; rows[i][j] is the count of questions i and j
+    """
+    return [array("I", [upper_rows[j][i - j] for j in range(i)]) + upper_rows[i] for i in range(len(upper_rows))]
+
+def init_worker(masks:list[int]) -> None:
+    """
+    Keep the answer bitmaps in a worker process, so they are sent once per worker instead of once per shard.
+    Used as process pool initializer, see worker_compatibility_rows()
+    """
+    global _worker_masks
+    _worker_masks = masks
+
+def worker_compatibility_rows(start:int, end:int) -> list[array]:
+    """
+    Count the upper triangle of rows start...end-1 of the compatibility matrix from the answer bitmaps of this worker process, see compatibility_rows()
+    """
+    return compatibility_rows(_worker_masks, start, end)
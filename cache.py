@@ -0,0 +1,204 @@
+import os
+import ast
+import pickle
+import hashlib
+from collections import OrderedDict
+from globals import DEMONYM_CSV
+
+QUESTION_CACHE_FILE = "answers.pkl"
+PAIR_CACHE_SIZE = 100000 # Most question pairs kept in a PairCache
+PREDICATE_MODULE = "question.py" # Module of question predicates, it and every local module it imports decide the answers to questions
+
+def archive_fingerprint(archive) -> str:
+    """
+    Fingerprint of the archive files, of the demonym file deciding driver countries and of the way they were read,
+    changes whenever any of the csv files is modified
+    """
+    digest = hashlib.sha256()
+    paths = [os.path.join(archive.db_path, name) for name in sorted(os.listdir(archive.db_path)) if name.endswith(".csv")]
+    for path in paths + [DEMONYM_CSV]:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    digest.update(repr((getattr(archive, "trusted_standings", False), sorted(archive.projection or []))).encode())
+    return digest.hexdigest()
+
+def catalog_fingerprint(questions:list) -> str:
+    """
+    Fingerprint of a question catalog, changes whenever a question, its order or its predicate changes
+    """
+    digest = hashlib.sha256()
+    for question in questions:
+        digest.update(f"{question.question_id}|{str(question)}|{question.func.__name__};".encode())
+    return digest.hexdigest()
+
+def predicate_sources(root:str=PREDICATE_MODULE) -> list[str]:
+    """
+    Find the source files whose code decides the answers to questions
+    Parameters:
+        (Optional) root: str; file name of module to start from. Default = PREDICATE_MODULE
+    Outputs:
+        sources: list[str]; file names of root and of every local module it imports directly or indirectly, sorted
+    """
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    sources = set()
+    pending = [root]
+    while len(pending) > 0:
+        name = pending.pop()
+        if name in sources:
+            continue
+        sources.add(name)
+        with open(os.path.join(source_dir, name), "rb") as source_file:
+            tree = ast.parse(source_file.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and node.module != None and node.level == 0:
+                modules = [node.module]
+            elif isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            else:
+                continue
+            for module in modules:
+                file_name = module.split(".")[0] + ".py"
+                if os.path.isfile(os.path.join(source_dir, file_name)):
+                    pending.append(file_name)
+    return sorted(sources)
+
+def code_fingerprint() -> str:
+    """
+    Fingerprint of the predicate code, see predicate_sources()
+    """
+    digest = hashlib.sha256()
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in predicate_sources():
+        digest.update(f"{name};".encode())
+        with open(os.path.join(source_dir, name), "rb") as source_file:
+            digest.update(source_file.read())
+    return digest.hexdigest()
+
+def cache_key(archive, questions:list) -> str:
+    """
+    Key of cached answers to a question catalog over an archive
+    Parameters:
+        archive: ArchiveReader; archive the answers are drawn from
+        questions: list[Question]; question catalog, in order
+    Outputs:
+        key: str; combined fingerprint of archive, catalog and predicate code
+    """
+    return hashlib.sha256((archive_fingerprint(archive) + catalog_fingerprint(questions) + code_fingerprint()).encode()).hexdigest()
+
+
+class AnswerCache():
+    """
+    Answer bitmaps of a question catalog and its compatibility matrix, persisted between runs
+    """
+
+    def __init__(self, key:str, masks:list[int], compatibility:list):
+        """
+        Parameters:
+            key: str; cache key, see cache_key()
+            masks: list[int]; answer bitmap of each question over the archive drivers, in catalog order
+            compatibility: list[array]; number of mutual answers of each pair of questions, see bitset.compatibility_rows()
+        """
+        self.key = key
+        self.masks = masks
+        self.compatibility = compatibility
+
+    def save(self, path:str) -> None:
+        """
+        Save cache to a pickle file. Written to a temporary file first and then moved in place,
+        so an interrupted save never leaves a truncated cache behind
+        """
+        temp_path = path + ".tmp"
+        try:
+            with open(temp_path, "wb") as cache_file:
+                pickle.dump({"key": self.key, "masks": self.masks, "compatibility": self.compatibility}, cache_file)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.isfile(temp_path):
+                os.remove(temp_path)
+
+    @classmethod
+    def load(cls, path:str, key:str):
+        """
+        Load cache from a pickle file, None if file is missing, fails to load for any reason or was saved with another key
+        """
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, "rb") as cache_file:
+                cached = pickle.load(cache_file)
+            if cached.get("key") != key:
+                return None
+            return cls(key, cached["masks"], cached["compatibility"])
+        except Exception: # Corrupt, truncated or stale pickles are rebuilt
+            return None
+
+
+class PairCache():
+    """
+    Size-bounded cache of mutual answer bitmaps of question pairs, evicting the least recently used pair.
+    Pairs are unordered, (A, B) and (B, A) share one entry.
+    """
+
+    def __init__(self, max_size:int=PAIR_CACHE_SIZE):
+        """
+        Parameters:
+            (Optional) max_size: int; most pairs kept. Default = PAIR_CACHE_SIZE
+        """
+        assert isinstance(max_size, int) and max_size > 0, f"Cache size must be positive integer! Currently {max_size}"
+        self.max_size = max_size
+        self.entries = OrderedDict() # pair key: (candidates, mutual answer bitmap), least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def pair_key(self, question, other_question, candidates:list) -> tuple:
+        """
+        Key of an unordered question pair over a candidate list
+        """
+        first, second = sorted((str(question), str(other_question)))
+        return (id(candidates), first, second)
+
+    def get(self, question, other_question, candidates:list) -> int:
+        """
+        Get the mutual answer bitmap of a question pair, None if not cached
+        """
+        key = self.pair_key(question, other_question, candidates)
+        entry = self.entries.get(key)
+        if entry == None or entry[0] is not candidates:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, question, other_question, candidates:list, mask:int) -> None:
+        """
+        Cache the mutual answer bitmap of a question pair, evicting the least recently used pair if full
+        """
+        key = self.pair_key(question, other_question, candidates)
+        self.entries[key] = (candidates, mask)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """
+        Get usage statistics of this cache
+        Parameters:
+            None
+        Outputs:
+            stats: dict; hits, misses, hit_rate and size
+        """
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits/lookups if lookups else 0.0, "size": len(self.entries)}
+
+    def clear(self) -> None:
+        """
+        Remove every pair and reset statistics
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,139 @@
+import math
+from collections import namedtuple
+from bitset import MaskWeights, popcount
+
+ERA_WEIGHT = 0.3 # Share of recency in the fame of a driver, the rest comes from number of entries
+N_TIERS = 3 # Tiers are numbered like question difficulties, 1 = Easy, 2 = Medium, 3 = Hard
+
+CellStats = namedtuple("CellStats", ["count", "entropy", "score"])
+
+def driver_fame(drivers:list, era_weight:float=ERA_WEIGHT) -> list[float]:
+    """
+    Estimate how well known each driver is, from number of entries and how recently they raced
+    Parameters:
+        drivers: list[Driver]; drivers to estimate
+        (Optional) era_weight: float; share of recency in fame. Default = ERA_WEIGHT
+    Outputs:
+        fame: list[float]; fame of each driver between 0 and 1, in order of drivers
+    """
+    entries = [math.log1p(len(driver.results)) for driver in drivers]
+    last_years = [max(driver.season_entries.keys(), default=None) for driver in drivers]
+    years = [year for year in last_years if year != None]
+    first_year, last_year = min(years, default=0), max(years, default=0)
+    max_entries = max(entries, default=0) or 1
+    fame = []
+    for entry_term, year in zip(entries, last_years):
+        recency = 0 if year == None or last_year == first_year else (year - first_year)/(last_year - first_year)
+        fame.append((1 - era_weight)*entry_term/max_entries + era_weight*recency)
+    return fame
+
+def tier_bounds(scores:list[float], n_tiers:int=N_TIERS) -> list[float]:
+    """
+    Upper score bound of each tier but the last, splitting finite scores into tiers of equal size
+    """
+    scores = sorted(x for x in scores if not math.isinf(x))
+    if len(scores) == 0:
+        return [math.inf]*(n_tiers - 1)
+    return [scores[min(len(scores) - 1, len(scores)*i//n_tiers)] for i in range(1, n_tiers)]
+
+def score_tier(score:float, bounds:list[float]) -> int:
+    """
+    Tier of a score, see tier_bounds(). Impossible scores are None
+    """
+    if math.isinf(score):
+        return None
+    return 1 + sum(score > bound for bound in bounds)
+
+
+class DifficultyCalibrator():
+    """
+    Difficulty scores of questions, question pairs and whole grids from the answers they share.
+    The answers to a cell are weighted by fame: many well known answers make a cell easy, few obscure answers make it hard.
+    Fame-weighted sums are taken over answer bitmaps, so scoring a pair of questions does not visit its answers.
+    """
+
+    def __init__(self, questions:list, candidates:list, era_weight:float=ERA_WEIGHT):
+        """
+        Parameters:
+            questions: list[Question]; question catalog to calibrate
+            candidates: list[Driver]; possible answers to questions
+            (Optional) era_weight: float; share of recency in fame of a driver, see driver_fame(). Default = ERA_WEIGHT
+        """
+        self.questions = questions
+        self.candidates = candidates
+        self.masks = [question.get_answer_mask(candidates) for question in questions]
+        self.question_index = {question: i for i, question in enumerate(questions)}
+        fame = driver_fame(candidates, era_weight=era_weight)
+        self.fame_sum = MaskWeights(fame)
+        self.fame_log_sum = MaskWeights([x*math.log(x) if x > 0 else 0.0 for x in fame])
+        self.question_scores = None # question: score of question alone
+        self.pair_scores = None # pair_scores[i][j]: score of cell of questions i and j
+        self.question_bounds = None # Tier bounds of question scores
+        self.cell_bounds = None # Tier bounds of cell scores
+
+    def mask_stats(self, mask:int) -> CellStats:
+        """
+        Difficulty statistics of a set of answers
+        Parameters:
+            mask: int; bitmap of answers over candidates
+        Outputs:
+            stats: CellStats; number of answers, entropy of fame-weighted answers in bits and difficulty score.
+                Score is between 0 and 1 for answerable sets, higher is harder, infinite if there are no answers.
+                Score only depends on total fame, entropy is informational and does not enter score or tiers.
+        """
+        count = popcount(mask)
+        if count == 0:
+            return CellStats(0, 0.0, math.inf)
+        total = self.fame_sum.total(mask)
+        if total <= 0:
+            return CellStats(count, 0.0, 1.0)
+        entropy = (math.log(total) - self.fame_log_sum.total(mask)/total)/math.log(2)
+        return CellStats(count, entropy, 1/(1 + total))
+
+    def cell_stats(self, question, other_question) -> CellStats:
+        """
+        Difficulty statistics of the cell of two questions, see mask_stats()
+        """
+        return self.mask_stats(self.masks[self.question_index[question]] & self.masks[self.question_index[other_question]])
+
+    def calibrate(self) -> None:
+        """
+        Score every question and question pair of the catalog and set tier bounds
+        Parameters:
+            None
+        Outputs:
+            Sets self.question_scores, self.pair_scores, self.question_bounds and self.cell_bounds.
+            Cell bounds are taken over distinct pairs of different questions, each pair once
+        """
+        self.question_scores = {question: self.mask_stats(mask).score for question, mask in zip(self.questions, self.masks)}
+        n = len(self.masks)
+        self.pair_scores = [[None]*n for _ in range(n)]
+        for i in range(n):
+            for j in range(i, n):
+                score = self.mask_stats(self.masks[i] & self.masks[j]).score
+                self.pair_scores[i][j] = self.pair_scores[j][i] = score
+        self.question_bounds = tier_bounds(list(self.question_scores.values()))
+        self.cell_bounds = tier_bounds([self.pair_scores[i][j] for i in range(n) for j in range(i + 1, n)])
+
+    def get_question_tier(self, question) -> int:
+        """
+        Get the difficulty tier of a question, 1 = Easy, 2 = Medium, 3 = Hard
+        """
+        if self.question_scores == None:
+            self.calibrate()
+        return score_tier(self.question_scores[question], self.question_bounds)
+
+    def grid_score(self, col_questions:list, row_questions:list) -> float:
+        """
+        Difficulty score of a grid, mean score of its cells. Infinite if any cell has no answers
+        """
+        if self.pair_scores == None:
+            self.calibrate()
+        scores = [self.pair_scores[self.question_index[col_q]][self.question_index[row_q]] for col_q in col_questions for row_q in row_questions]
+        return sum(scores)/len(scores)
+
+    def get_grid_tier(self, col_questions:list, row_questions:list) -> int:
+        """
+        Get the difficulty tier of a grid, None if any cell has no answers
+        """
+        return score_tier(self.grid_score(col_questions, row_questions), self.cell_bounds)
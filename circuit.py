@@ -6,7 +6,6 @@ class Circuit(MyDataClass):
     """
     Dataclass for storing data of a circuit.
     """
-
     def __init__(self):
         """
         Initializes empty class where all fields are set to None or empty lists.
@@ -14,8 +13,9 @@ class Circuit(MyDataClass):
         self.data_fields = CIRCUIT_DATA_FIELDS
         for data_field in self.data_fields:
             setattr(self, data_field, None)
+        self.continent = None
     
-    def read_data(self, data:list[str]):
-        self.read_csv_data(data)
+    def read_data(self, data:list[str], projection:set[str]=None):
+        self.read_csv_data(data, projection=projection)
         self.country = self.country.lower()
 
@@ -15,8 +15,13 @@ class Constructor(MyDataClass):
         for data_field in self.data_fields:
             setattr(self, data_field, None)
         self.drivers = []
+        self.driver_set = set() # Drivers in self.drivers, for constant time lookups
+        self.season_lineups = {} # year: drivers entered, in order of first entry
+        self.race_entries = {} # year: races entered, in chronological order
+        self.results = [] # ResultRecords of every car entered, in chronological order
+        self.season_entries = {}
     
-    def read_data(self, data:list[str]):
+    def read_data(self, data:list[str], projection:set[str]=None):
         """
         Map data from driver csv to this driver.
         Parameters:
@@ -29,6 +34,130 @@ class Constructor(MyDataClass):
         Outputs:
             Adds data fields as attributes to this object.
         """
-        self.read_csv_data(data)
+        self.read_csv_data(data, projection=projection)
         self.country = self.cc.demonym_to_country(self.nationality.strip())
-    
\ No newline at end of file
+
+    def add_driver(self, driver):
+        """
+        Adds driver to self.drivers
+        Parameters:
+            driver: Driver; driver who has driven for this constructor
+        Outputs:
+            Adds driver to self.drivers and self.driver_set if not already present.
+        """
+        if driver not in self.driver_set:
+            self.driver_set.add(driver)
+            self.drivers.append(driver)
+
+    def add_race_to_data(self, record):#: ResultRecord):
+        """
+        Add a result record of a race to this constructor's data
+        Parameters:
+            record: ResultRecord; result of a car of this constructor in a race
+        Outputs:
+            Adds record to self.results and race to self.race_entries
+        """
+        race = record.race
+        self.results.append(record)
+        if race.year not in self.race_entries.keys():
+            self.race_entries[race.year] = [race]
+        elif race not in self.race_entries[race.year]:
+            self.race_entries[race.year].append(race)
+
+    def sort_results(self):
+        """
+        Sort results and race entries in chronological order, and determine season line-ups
+        """
+        self.results.sort(key=lambda x: (x.race.year, x.race.round))
+        for year in self.race_entries.keys():
+            self.race_entries[year].sort(key=lambda x: x.round)
+        self.season_lineups = {}
+        for record in self.results:
+            lineup = self.season_lineups.setdefault(record.race.year, [])
+            if record.driver not in lineup:
+                lineup.append(record.driver)
+
+    def get_lineup(self, year:int) -> list:
+        """
+        Get the drivers who entered a race for this constructor in a given year
+        """
+        return self.season_lineups.get(year, [])
+
+    def add_season_to_data(self, season):
+        """
+        Add a season to this constructor's data
+        Parameters:
+            season: Season; season object
+        Outputs:
+            Adds data to self
+        """
+        year = season.year
+        self.season_entries[year] = season
+
+    def get_season_data(self, year:int):
+        """
+        Get the constructors' championship results of this constructor for a given year
+        Parameters:
+            year: int; the year to get the results of
+        Outputs:
+            results: dict; dictionary with the following fields:
+                champion: bool
+                points: list[float | None]
+                n_points: float
+                position: int | None
+        """
+        return self.get_all_seasons_data()[year]
+
+    def get_all_seasons_data(self):
+        if hasattr(self, "_all_seasons_data") and self._all_seasons_data:
+            return self._all_seasons_data
+        all_season_data = {}
+        for season_year in sorted(self.season_entries.keys()):
+            season = self.season_entries[season_year]
+            all_season_data[season_year] = season.get_constructor_stats(self)
+        self._all_seasons_data = all_season_data
+        return all_season_data
+
+    def get_career_data(self):
+        """
+        Get the combined constructors' championship results of this constructor
+        Parameters:
+            None
+        Outputs:
+            career_data: dict; dictionary with the following fields:
+                n_championships: int
+                n_points: float
+                n_seasons: int
+                n_entries: int; races entered
+                n_wins: int; races won
+                n_podiums: int; podium finishes, every car counted
+                n_poles: int; pole positions
+        """
+        if hasattr(self, "_career_data") and self._career_data:
+            return self._career_data
+        career_results = {
+            "n_championships": 0,
+            "n_points": 0,
+            "n_seasons": 0,
+            "n_entries": sum(len(x) for x in self.race_entries.values()),
+            "n_wins": 0,
+            "n_podiums": 0,
+            "n_poles": 0
+        }
+        for season_year in self.season_entries.keys():
+            season_data = self.get_season_data(season_year)
+            career_results["n_championships"] += season_data["champion"]
+            career_results["n_points"] += season_data["n_points"]
+            career_results["n_seasons"] += 1
+        podiums = set() # (race, position), shared cars only counted once
+        for record in self.results:
+            if record.position <= 3:
+                podiums.add((record.race, record.position))
+        career_results["n_podiums"] = len(podiums)
+        career_results["n_wins"] = len([race for race, pos in podiums if pos == 1])
+        for season_year in self.race_entries.keys():
+            for race in self.race_entries[season_year]:
+                if len(race.get_grid()) > 0 and race.get_pole()[1] == self:
+                    career_results["n_poles"] += 1
+        self._career_data = career_results
+        return career_results
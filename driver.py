@@ -1,4 +1,8 @@
 from mydataclass import MyDataClass
+from globals import date_to_ordinal
+from statsindex import YearStatsIndex
+from ages import age_extremes
+from status import DNF_CATEGORIES, FINISHED, LAPPED
 
 DRIVER_DATA_FIELDS = ["driverId","driverRef","number","code","forename","surname","dob","nationality","url"]
 DRIVER_CAREER_DATA = ["championships","wins","podiums","career_points","poles","entries","sprint_wins"]
@@ -18,10 +22,20 @@ class Driver(MyDataClass):
         for data_field in DRIVER_CAREER_DATA:
             setattr(self, data_field, 0)
         self.teams = []
+        self.team_names = set() # Names of constructors in self.teams, for constant time lookups
         self.teammates = []
         self.season_data = {}
-        self.race_entries = {}
+        self.race_entries = {} # year: races entered, in chronological order
+        self.results = [] # ResultRecords of every race entered, in chronological order
         self.season_entries = {}
+        self.dob_ordinal = None # Date of birth as day ordinal
+        self.rating = None # Current Elo rating, see rating.RatingEngine
+        self.peak_rating = None # Highest Elo rating reached
+        self.laps_led = 0
+        self.dnf_mask = 0 # Bit raceId set for every race retired from, see status.DNF_CATEGORIES
+        self.finish_mask = 0 # Bit raceId set for every race finished, classified laps down included
+        self.pit_stop_count = 0
+        self.spatial_index = None # CircuitIndex of archive circuits, set when archive is read
     
     def __str__(self):
         """
@@ -29,13 +43,14 @@ class Driver(MyDataClass):
         """
         return self.fullname
     
-    def read_data(self, data:list[str]):
+    def read_data(self, data:list[str], projection:set[str]=None):
         """
         Adds data from CSV to this drivers data
         """
-        self.read_csv_data(data)
+        self.read_csv_data(data, projection=projection)
         self.fullname = self.forename + " " + self.surname
         self.country = self.cc.demonym_to_country(self.nationality.strip())
+        self.dob_ordinal = date_to_ordinal(self.dob)
 
     def add_to_season_data(self, year:int, field:str, value:float):
         """
@@ -47,6 +62,18 @@ class Driver(MyDataClass):
         assert field in self.season_data[year], f"Unknown field {field}!"
         self.season_data[year][field] += value
 
+    def add_team(self, constructor):
+        """
+        Adds constructor to self.teams
+        Parameters:
+            constructor: Constructor; constructor driven for
+        Outputs:
+            Adds constructor to self.teams if not already present and its name to self.team_names.
+        """
+        if constructor not in self.teams:
+            self.teams.append(constructor)
+        self.team_names.add(constructor.name)
+
     def add_teammate(self, teammate):
         """
         Adds other driver to self.teammates
@@ -59,20 +86,32 @@ class Driver(MyDataClass):
         if teammate != self and teammate not in self.teammates:
             self.teammates.append(teammate)
 
-    def add_race_to_data(self, race):#: Race):
+    def add_race_to_data(self, record):#: ResultRecord):
         """
-        Add all relevant data from a race to this driver's data
+        Add a result record of a race to this driver's data
         Parameters:
-            race: Race; Race class to read data from
+            record: ResultRecord; result of this driver in a race
         Outputs:
-            Adds data to self
+            Adds record to self.results, race to self.race_entries and self.dnf_mask or self.finish_mask
         """
-        #assert isinstance(race, Race), "Input race must be of race type!"
-        year = race.year
-        if year in self.race_entries.keys():
-            self.race_entries[year].append(race)
-        else:
-            self.race_entries[year] = [race]
+        race = record.race
+        self.results.append(record)
+        if record.category in DNF_CATEGORIES:
+            self.dnf_mask |= 1 << race.raceId
+        elif record.category in (FINISHED, LAPPED):
+            self.finish_mask |= 1 << race.raceId
+        if race.year not in self.race_entries.keys():
+            self.race_entries[race.year] = [race]
+        elif race not in self.race_entries[race.year]: # Shared drives give multiple results per race
+            self.race_entries[race.year].append(race)
+
+    def sort_results(self):
+        """
+        Sort results and race entries in chronological order
+        """
+        self.results.sort(key=lambda x: (x.race.year, x.race.round))
+        for year in self.race_entries.keys():
+            self.race_entries[year].sort(key=lambda x: x.round)
 
     def add_season_to_data(self, season):
         """
@@ -121,7 +160,16 @@ class Driver(MyDataClass):
             season = self.season_entries[season_year]
             all_season_data[season_year] = season.get_driver_stats(self)
         self._all_seasons_data = all_season_data
-        return self.get_all_seasons_data()
+        return all_season_data
+
+    def get_year_stats(self) -> YearStatsIndex:
+        """
+        Get the cumulative per-year statistics of this driver, for year-range queries
+        """
+        if hasattr(self, "_year_stats") and self._year_stats:
+            return self._year_stats
+        self._year_stats = YearStatsIndex(self.get_all_seasons_data())
+        return self._year_stats
 
     def get_career_data(self):
         """
@@ -173,6 +221,43 @@ class Driver(MyDataClass):
                     wins_per_country_dict[country] = [win_race]
         return wins_per_country_dict
     
+    def get_age_stats(self) -> dict:
+        """
+        Get the results this driver achieved at the youngest and oldest age in each age category
+        Parameters:
+            None
+        Outputs:
+            age_stats: dict[str, tuple]; {category: (youngest record, oldest record)}, see ages.AGE_CATEGORIES
+        """
+        if hasattr(self, "_age_stats") and self._age_stats != None:
+            return self._age_stats
+        self._age_stats = age_extremes(self.results)
+        return self._age_stats
+
+    def get_win_circuits(self) -> list:
+        """
+        Get every circuit this driver has won a race at
+        """
+        return list(set(race.circuit for races in self.get_wins_per_country().values() for race in races))
+
+    def get_circuits(self) -> list:
+        """
+        Get every circuit this driver has entered a race at
+        """
+        return list(set(race.circuit for races in self.race_entries.values() for race in races))
+
+    def get_dnf_count(self) -> int:
+        """
+        Get the number of races this driver retired from
+        """
+        return self.dnf_mask.bit_count()
+
+    def retired_at(self, race) -> bool:
+        """
+        Check if this driver retired from a race
+        """
+        return bool(self.dnf_mask >> race.raceId & 1)
+
     def get_home_wins(self):
         wins_per_country = self.get_wins_per_country()
         return [] if not self.country in wins_per_country else wins_per_country[self.country]
@@ -0,0 +1,68 @@
+import heapq
+
+def counted_parts(best_of_n, n_rounds:int) -> list[tuple[int, int, int]]:
+    """
+    Split a season into parts, each counting only the best results within it
+    Parameters:
+        best_of_n: Any; championship determining parameter, see BEST_OF_N_CHAMPION
+        n_rounds: int; number of rounds in season
+    Outputs:
+        parts: list[tuple[int, int, int | None]]; list of (first round index, end round index, results counted), None = all results counted
+    """
+    if best_of_n == 0: # Every result counted
+        return [(0, n_rounds, None)]
+    elif isinstance(best_of_n, int): # Best n results
+        return [(0, n_rounds, best_of_n)]
+    else: # Best n of first m races and best i of remaining races, ((n,m),(i,k))
+        assert len(best_of_n) == 2 and all([len(x) == 2 for x in best_of_n]), "Incorrect formatting of championship best of n!"
+        split = min(best_of_n[0][1], n_rounds)
+        return [(0, split, best_of_n[0][0]), (split, n_rounds, best_of_n[1][0])]
+
+
+class DroppedScores():
+    """
+    Evaluates best-of-n championship rules for every driver of a season in one pass.
+    Counted results of each part of the season are selected with a top-k selection instead of fully sorting them.
+    """
+
+    def __init__(self, points_matrix:dict, best_of_n):
+        """
+        Evaluate dropped scores
+        Parameters:
+            points_matrix: dict; {driver: list of points scored in each round, None if not entered}
+            best_of_n: Any; championship determining parameter, see BEST_OF_N_CHAMPION
+        """
+        self.best_of_n = best_of_n
+        self.counted = {} # driver: points counted towards championship
+        self.totals = {} # driver: total points scored
+        self.dropped = {} # driver: indexes of rounds whose points were dropped
+        n_rounds = max([len(x) for x in points_matrix.values()], default=0)
+        parts = counted_parts(best_of_n, n_rounds)
+        for driver in points_matrix.keys():
+            points = points_matrix[driver]
+            counted = 0
+            dropped = []
+            for start, end, limit in parts:
+                scored = [i for i in range(start, min(end, len(points))) if points[i]]
+                if limit == None or len(scored) <= limit:
+                    kept = scored
+                else: # Ties are resolved in favour of earlier rounds
+                    kept = heapq.nlargest(limit, scored, key=lambda i: points[i])
+                    kept_set = set(kept)
+                    dropped.extend(i for i in scored if i not in kept_set)
+                counted += sum(points[i] for i in kept)
+            self.counted[driver] = counted
+            self.totals[driver] = sum(filter(None, points))
+            self.dropped[driver] = dropped
+
+    def get_counted(self, driver) -> float:
+        """
+        Get the points of a driver counting towards the championship
+        """
+        return self.counted[driver]
+
+    def get_dropped(self, driver) -> list[int]:
+        """
+        Get the indexes of rounds whose points were dropped for a driver
+        """
+        return self.dropped[driver]
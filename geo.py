@@ -0,0 +1,141 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0
+
+def to_unit_vector(lat:float, lng:float) -> tuple[float, float, float]:
+    """
+    Convert geographic coordinates in degrees to a point on the unit sphere
+    """
+    lat, lng = math.radians(lat), math.radians(lng)
+    return (math.cos(lat)*math.cos(lng), math.cos(lat)*math.sin(lng), math.sin(lat))
+
+def haversine(lat1:float, lng1:float, lat2:float, lng2:float) -> float:
+    """
+    Great-circle distance between two coordinates in kilometres
+    """
+    dlat = math.radians(lat2 - lat1)
+    dlng = math.radians(lng2 - lng1)
+    a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1))*math.cos(math.radians(lat2))*math.sin(dlng/2)**2
+    return 2*EARTH_RADIUS_KM*math.asin(min(1, math.sqrt(a)))
+
+def km_to_chord(km:float) -> float:
+    """
+    Convert a great-circle distance to the straight line distance between points on the unit sphere
+    """
+    return 2*math.sin(min(km/EARTH_RADIUS_KM, math.pi)/2)
+
+
+class KDNode():
+    """
+    Node of a KD-tree, splitting points on one axis
+    """
+
+    def __init__(self, point:tuple, item, axis:int, left=None, right=None):
+        self.point = point
+        self.item = item
+        self.axis = axis
+        self.left = left
+        self.right = right
+
+
+class CircuitIndex():
+    """
+    Spatial index of circuits. Circuits are stored in a 3D KD-tree of points on the unit sphere,
+    where straight line distance is monotonic in great-circle distance, so radius and nearest
+    neighbour queries are O(log n) on average.
+    """
+
+    def __init__(self, circuits:list):
+        """
+        Build KD-tree of circuits with known coordinates
+        Parameters:
+            circuits: list[Circuit]; circuits to index
+        """
+        located = [c for c in circuits if isinstance(c.lat, (int, float)) and isinstance(c.lng, (int, float))]
+        self.root = self.build([(to_unit_vector(c.lat, c.lng), c) for c in located], 0)
+        self.size = len(located)
+        with_altitude = [c for c in located if isinstance(c.alt, (int, float))]
+        self.highest = max(with_altitude, key=lambda c: c.alt) if len(with_altitude) > 0 else None
+
+    def build(self, points:list[tuple], depth:int) -> KDNode:
+        """
+        Recursively build KD-tree, splitting on the median of each axis in turn
+        """
+        if len(points) == 0:
+            return None
+        axis = depth % 3
+        points.sort(key=lambda x: x[0][axis])
+        median = len(points) // 2
+        return KDNode(points[median][0], points[median][1], axis,
+                      self.build(points[:median], depth+1), self.build(points[median+1:], depth+1))
+
+    def within(self, lat:float, lng:float, km:float) -> list:
+        """
+        Find all circuits within a distance of given coordinates
+        Parameters:
+            lat: float; latitude in degrees
+            lng: float; longitude in degrees
+            km: float; search radius in kilometres
+        Outputs:
+            circuits: list[Circuit]; circuits within radius
+        """
+        target = to_unit_vector(lat, lng)
+        radius = km_to_chord(km)
+        found = []
+        stack = [self.root]
+        while len(stack) > 0:
+            node = stack.pop()
+            if node == None:
+                continue
+            if math.dist(node.point, target) <= radius:
+                found.append(node.item)
+            diff = target[node.axis] - node.point[node.axis]
+            stack.append(node.left if diff < 0 else node.right)
+            if abs(diff) <= radius:
+                stack.append(node.right if diff < 0 else node.left)
+        return found
+
+    def nearest(self, lat:float, lng:float, exclude=None):
+        """
+        Find the circuit nearest to given coordinates
+        Parameters:
+            lat: float; latitude in degrees
+            lng: float; longitude in degrees
+            (Optional) exclude: Circuit; circuit to skip, e.g. the circuit at given coordinates. Default = None
+        Outputs:
+            t: tuple[Circuit, float]; nearest circuit and its distance in kilometres, (None, None) if index is empty
+        """
+        target = to_unit_vector(lat, lng)
+        best = [None, math.inf]
+
+        def search(node:KDNode):
+            if node == None:
+                return
+            distance = math.dist(node.point, target)
+            if distance < best[1] and node.item != exclude:
+                best[0], best[1] = node.item, distance
+            diff = target[node.axis] - node.point[node.axis]
+            search(node.left if diff < 0 else node.right)
+            if abs(diff) < best[1]:
+                search(node.right if diff < 0 else node.left)
+
+        search(self.root)
+        if best[0] == None:
+            return (None, None)
+        return (best[0], haversine(lat, lng, best[0].lat, best[0].lng))
+
+    def near_country(self, circuit, country:str, km:float) -> bool:
+        """
+        Check if a circuit lies within a distance of any circuit in given country
+        Parameters:
+            circuit: Circuit; circuit to search around
+            country: str; country name, lower case
+            km: float; search radius in kilometres
+        Outputs:
+            near: bool; True if a circuit of country is within radius, including circuit itself
+        """
+        if circuit.country == country:
+            return True
+        if not isinstance(circuit.lat, (int, float)) or not isinstance(circuit.lng, (int, float)):
+            return False
+        return any(c.country == country for c in self.within(circuit.lat, circuit.lng, km))
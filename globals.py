@@ -1,6 +1,8 @@
 import os
+import math
 from csv import reader
 from unicodedata import normalize
+from datetime import date
 
 PROJECT_NAME = "FormulaDoku"
 
@@ -42,6 +44,41 @@ def isFloat(input_str:str) -> bool:
     else:
         return True
 
+def lap_time_to_ms(input_str:str) -> int:
+    """
+    Convert lap time string to integer milliseconds
+    Parameters:
+        input_str: str; lap time, e.g. "1:23.456" or "83.456". Missing times are "\\N" or empty
+    Outputs:
+        ms: int | None; lap time in milliseconds, e.g. "1:23.456" -> 83456. None if time is missing or invalid
+    """
+    if not isinstance(input_str, str):
+        return None
+    parts = input_str.strip().split(":")
+    if not all(isFloat(part) and math.isfinite(float(part)) for part in parts):
+        return None
+    seconds = 0
+    for part in parts:
+        seconds = 60*seconds + float(part)
+    if not math.isfinite(seconds): # Overflow of very large parts
+        return None
+    return round(1000*seconds)
+
+def date_to_ordinal(input_str:str) -> int:
+    """
+    Convert date string to integer day ordinal
+    Parameters:
+        input_str: str; date in ISO format, e.g. "1985-01-07". Missing dates are "\\N" or None
+    Outputs:
+        ordinal: int | None; proleptic Gregorian ordinal of date, see datetime.date.toordinal(). None if date is missing or invalid
+    """
+    if not isinstance(input_str, str):
+        return None
+    try:
+        return date.fromisoformat(input_str.strip()).toordinal()
+    except ValueError:
+        return None
+
 def sumWithNone(num_list:list) -> float:
     """
     Sum list with numbers and nones
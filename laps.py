@@ -0,0 +1,242 @@
+import csv
+from array import array
+from itertools import islice
+
+CHUNK_SIZE = 65536 # Number of csv rows read at once
+MISSING_VALUE = -1 # Stored in place of missing values ("\N")
+
+LAP_TIME_COLUMNS = [ # (column name, csv field, array typecode)
+    ("race", "raceId", "i"),
+    ("driver", "driverId", "i"),
+    ("lap", "lap", "h"),
+    ("position", "position", "h"),
+    ("milliseconds", "milliseconds", "i"),
+]
+
+PIT_STOP_COLUMNS = [ # (column name, csv field, array typecode)
+    ("race", "raceId", "i"),
+    ("driver", "driverId", "i"),
+    ("stop", "stop", "h"),
+    ("lap", "lap", "h"),
+    ("milliseconds", "milliseconds", "i"),
+]
+
+def parse_int(value:str) -> int:
+    """
+    Parse integer from csv field, missing values are mapped to MISSING_VALUE
+    """
+    return int(value) if value.isnumeric() else MISSING_VALUE
+
+
+class ColumnStore():
+    """
+    Parent class for columnar stores. Rows are never stored as objects, only as typed arrays per column.
+    Rows are kept sorted by race, driver and then sort_columns, with indexes from race and from (race, driver) to their row range.
+    """
+    columns = [] # (column name, csv field, array typecode), overridden in subclasses
+    sort_columns = [] # Columns ordering the rows of a driver in a race, overridden in subclasses
+
+    def __init__(self):
+        """
+        Initializes empty store
+        """
+        self.data = {name: array(typecode) for name, _, typecode in self.columns}
+        self.race_index = {} # raceId: (first row, end row)
+        self.entry_index = {} # (raceId, driverId): (first row, end row)
+
+    def __len__(self):
+        return len(self.data["race"])
+
+    def read_csv(self, csv_path:str, chunk_size:int=CHUNK_SIZE) -> None:
+        """
+        Stream csv file into the store in chunks
+        Parameters:
+            csv_path: str; path to csv file
+            (Optional) chunk_size: int; number of rows parsed at once. Default = CHUNK_SIZE
+        Outputs:
+            Extends each column array with the data of the csv file and rebuilds index
+        """
+        with open(csv_path, encoding='utf-8') as csv_file:
+            csv_reader = csv.reader(csv_file, delimiter=',')
+            header = next(csv_reader)
+            field_indexes = [(self.data[name], header.index(field)) for name, field, _ in self.columns]
+            while True:
+                chunk = list(islice(csv_reader, chunk_size))
+                if len(chunk) == 0:
+                    break
+                for column, i in field_indexes:
+                    column.extend(parse_int(row[i]) for row in chunk)
+        self.build_index()
+
+    def build_index(self) -> None:
+        """
+        Sort rows by race, driver and sort_columns unless already sorted, then index the row ranges of races and of drivers in races
+        """
+        key_columns = [self.data[name] for name in ["race", "driver"] + self.sort_columns]
+        row_key = lambda i: tuple(column[i] for column in key_columns)
+        if any(row_key(i-1) > row_key(i) for i in range(1, len(self))):
+            order = sorted(range(len(self)), key=row_key)
+            for name, _, typecode in self.columns:
+                column = self.data[name]
+                self.data[name] = array(typecode, (column[i] for i in order))
+        self.race_index = self.index_ranges(["race"])
+        self.entry_index = self.index_ranges(["race", "driver"])
+
+    def index_ranges(self, names:list[str]) -> dict:
+        """
+        Index the row range of each value of the leading sorted columns
+        Parameters:
+            names: list[str]; names of leading sort columns, e.g. ["race", "driver"]
+        Outputs:
+            ranges: dict; {value: (first row, end row)}, value is a tuple if more than one column is given
+        """
+        columns = [self.data[name] for name in names]
+        ranges = {}
+        start = 0
+        for i in range(1, len(self) + 1):
+            if i == len(self) or any(column[i] != column[start] for column in columns):
+                key = columns[0][start] if len(columns) == 1 else tuple(column[start] for column in columns)
+                ranges[key] = (start, i)
+                start = i
+        return ranges
+
+    def race_rows(self, raceId:int) -> range:
+        """
+        Get the row range of a race, empty if race has no data
+        """
+        start, end = self.race_index.get(raceId, (0, 0))
+        return range(start, end)
+
+    def entry_rows(self, raceId:int, driverId:int) -> range:
+        """
+        Get the row range of a driver in a race, empty if driver has no data in race
+        """
+        start, end = self.entry_index.get((raceId, driverId), (0, 0))
+        return range(start, end)
+
+    def count_per_driver(self, mask_column:str=None, mask_value:int=None) -> dict[int, int]:
+        """
+        Count rows per driver, optionally only rows where column equals value
+        Parameters:
+            (Optional) mask_column: str; name of column to filter by. Default = None = All rows
+            (Optional) mask_value: int; value to filter for. Default = None
+        Outputs:
+            counts: dict[int, int]; {driverId: number of rows}
+        """
+        counts = {}
+        drivers = self.data["driver"]
+        if mask_column == None:
+            selected = drivers
+        else:
+            selected = (drivers[i] for i, value in enumerate(self.data[mask_column]) if value == mask_value)
+        for driver_id in selected:
+            counts[driver_id] = counts.get(driver_id, 0) + 1
+        return counts
+
+
+class LapStore(ColumnStore):
+    """
+    Columnar store of lap times (lap_times.csv)
+    """
+    columns = LAP_TIME_COLUMNS
+    sort_columns = ["lap"]
+
+    def __init__(self):
+        super().__init__()
+        self._laps_led = None
+
+    def build_index(self) -> None:
+        super().build_index()
+        self._laps_led = None
+
+    def lap_chart(self, raceId:int) -> list[list[int]]:
+        """
+        Get the lap chart of a race
+        Parameters:
+            raceId: int; id of race
+        Outputs:
+            chart: list[list[int]]; for each lap (index 0 = lap 1), list of driverIds in running order
+        """
+        rows = self.race_rows(raceId)
+        laps = self.data["lap"]
+        positions = self.data["position"]
+        drivers = self.data["driver"]
+        n_laps = max((laps[i] for i in rows), default=0)
+        chart = [[] for _ in range(n_laps)]
+        for i in sorted(rows, key=lambda i: (laps[i], positions[i])):
+            chart[laps[i]-1].append(drivers[i])
+        return chart
+
+    def driver_lap_times(self, raceId:int, driverId:int) -> array:
+        """
+        Get the lap times of a driver in a race, in milliseconds
+        Parameters:
+            raceId: int; id of race
+            driverId: int; id of driver
+        Outputs:
+            lap_times: array; lap times of driver in order of laps
+        """
+        rows = self.entry_rows(raceId, driverId)
+        return self.data["milliseconds"][rows.start:rows.stop]
+
+    def get_laps_led(self, driverId:int) -> int:
+        """
+        Get the number of laps a driver has led across all races
+        """
+        if self._laps_led == None:
+            self._laps_led = self.count_per_driver("position", 1)
+        return self._laps_led.get(driverId, 0)
+
+    def get_race_laps_led(self, raceId:int) -> dict[int, int]:
+        """
+        Get the number of laps each driver led in a race
+        Parameters:
+            raceId: int; id of race
+        Outputs:
+            laps_led: dict[int, int]; {driverId: laps led}
+        """
+        laps_led = {}
+        drivers = self.data["driver"]
+        positions = self.data["position"]
+        for i in self.race_rows(raceId):
+            if positions[i] == 1:
+                laps_led[drivers[i]] = laps_led.get(drivers[i], 0) + 1
+        return laps_led
+
+
+class PitStopStore(ColumnStore):
+    """
+    Columnar store of pit stops (pit_stops.csv)
+    """
+    columns = PIT_STOP_COLUMNS
+    sort_columns = ["stop"]
+
+    def __init__(self):
+        super().__init__()
+        self._pit_stop_counts = None
+
+    def build_index(self) -> None:
+        super().build_index()
+        self._pit_stop_counts = None
+
+    def get_pit_stop_count(self, driverId:int) -> int:
+        """
+        Get the number of pit stops of a driver across all races
+        """
+        if self._pit_stop_counts == None:
+            self._pit_stop_counts = self.count_per_driver()
+        return self._pit_stop_counts.get(driverId, 0)
+
+    def get_race_pit_stops(self, raceId:int) -> dict[int, int]:
+        """
+        Get the number of pit stops of each driver in a race
+        Parameters:
+            raceId: int; id of race
+        Outputs:
+            pit_stops: dict[int, int]; {driverId: number of pit stops}
+        """
+        pit_stops = {}
+        drivers = self.data["driver"]
+        for i in self.race_rows(raceId):
+            pit_stops[drivers[i]] = pit_stops.get(drivers[i], 0) + 1
+        return pit_stops
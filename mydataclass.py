@@ -26,16 +26,19 @@ class MyDataClass():
     def __hash__(self):
         return hash(str(self))
 
-    def read_csv_data(self, data:list[str]):
+    def read_csv_data(self, data:list[str], projection:set[str]=None):
         """
         Read data directly from csv file. If numeric, make into integer
         Parameters:
             data: list[str]; Data from csv, matching row
+            (Optional) projection: set[str]; Names of fields to read, other fields are left as None. Default = None = All fields
         Outputs:
             Sets data from csv according to self.data_fields, defined in subclasses
         """
         assert len(data) == len(self.data_fields), f"Unsupported number of fields! Must be {len(self.data_fields)}, found {len(data)}!"
         for i in range(len(data)):
+            if projection != None and self.data_fields[i] not in projection:
+                continue
             temp = data[i]
             if temp.isnumeric():
                 temp = int(temp)
@@ -160,3 +163,19 @@ def find_single_object_by_field_value(obj_list: list[MyDataClass], field_name:st
     candidates = find_objects_by_field_value(obj_list, field_name, field_value, strict=strict)
     assert len(candidates) == 1, f"Incorrect number of objects found with field '{field_name}' value '{field_value}'! (Found {len(candidates)})"
     return candidates[0]
+
+def index_objects_by_field(obj_list: list[MyDataClass], field_name:str) -> dict:
+    """
+    Index objects by a field with unique values, for constant time lookups
+    Parameters:
+        obj_list: list[MyDataClass]; list of objects to be indexed
+        field_name: str; name of field to index by, e.g. primary key
+    Outputs:
+        index: dict; {field value: object}
+    """
+    index = {}
+    for obj in obj_list:
+        obj_value = obj.get_field(field_name)
+        assert obj_value not in index, f"Duplicate value '{obj_value}' in field '{field_name}'!"
+        index[obj_value] = obj
+    return index
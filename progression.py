@@ -0,0 +1,202 @@
+import heapq
+from itertools import accumulate
+
+class RunningBestOfN():
+    """
+    Running total of the points counting towards the championship. Counted scores of each part of the season are kept
+    in min-heaps, so that adding the points of a round costs O(log n).
+    """
+
+    def __init__(self, best_of_n):
+        """
+        Initialize empty running total
+        Parameters:
+            best_of_n: Any; championship determining parameter, see BEST_OF_N_CHAMPION
+        """
+        if best_of_n == 0: # Every result counted
+            self.limits = [None]
+            self.split = None
+        elif isinstance(best_of_n, int): # Best n results
+            self.limits = [best_of_n]
+            self.split = None
+        else: # Best n of first m races and best i of remaining races, ((n,m),(i,k))
+            assert len(best_of_n) == 2 and all([len(x) == 2 for x in best_of_n]), "Incorrect formatting of championship best of n!"
+            self.limits = [best_of_n[0][0], best_of_n[1][0]]
+            self.split = best_of_n[0][1]
+        self.heaps = [[] for _ in self.limits]
+        self.total = 0
+        self.rounds = 0
+
+    def part(self, round_index:int) -> int:
+        """
+        Index of the part of the season a round belongs to (0 = first round)
+        """
+        return 0 if self.split == None or round_index < self.split else 1
+
+    def add(self, points) -> float:
+        """
+        Add the points of the next round
+        Parameters:
+            points: float | None; points scored, None if not entered
+        Outputs:
+            total: float; points counted after this round
+        """
+        part = self.part(self.rounds)
+        self.rounds += 1
+        if points:
+            limit = self.limits[part]
+            heap = self.heaps[part]
+            if limit == None:
+                self.total += points
+            elif len(heap) < limit:
+                heapq.heappush(heap, points)
+                self.total += points
+            elif points > heap[0]:
+                self.total += points - heapq.heapreplace(heap, points)
+        return self.total
+
+    def best_case(self, remaining:list[list[float]]) -> float:
+        """
+        Most points that could count if the remaining rounds were scored as given, without adding them.
+        The counted points of a part are the best of its counted scores and remaining scores combined.
+        Parameters:
+            remaining: list[list[float]]; for each part of the season, prefix sums of the points of its remaining rounds
+                in descending order, starting from 0
+        Outputs:
+            total: float; points counted at the end of the season
+        """
+        best = 0
+        for limit, heap, prefix in zip(self.limits, self.heaps, remaining):
+            if limit == None: # Every result counted, only part of season
+                best += self.total + prefix[-1]
+                continue
+            counted_prefix = list(accumulate(sorted(heap, reverse=True), initial=0))
+            best += max(prefix[t] + counted_prefix[min(limit - t, len(heap))] for t in range(min(limit, len(prefix) - 1) + 1))
+        return best
+
+
+class ChampionshipProgression():
+    """
+    Round-by-round progression of the drivers' championship of a season.
+    All tables are computed once, after which every query is O(1).
+    """
+
+    def __init__(self, season):
+        """
+        Compute progression tables of a season
+        Parameters:
+            season: Season; season with points awarded
+        """
+        self.season = season
+        self.n_rounds = len(season.races)
+        all_points = season.get_all_driver_points()
+        self.drivers = list(all_points.keys())
+        best_of_n = season.select_champion_method()
+        self.cumulative = {} # driver: list of cumulative points after each round
+        self.counted = {} # driver: list of points counting towards championship after each round
+        for driver in self.drivers:
+            points = all_points[driver]
+            running_total = RunningBestOfN(best_of_n)
+            self.cumulative[driver] = list(accumulate(0 if x == None else x for x in points))
+            self.counted[driver] = [running_total.add(x) for x in points]
+        self.leaders = [] # Leader after each round
+        self.margins = [] # Margin of leader to second after each round
+        self.rounds_led = {driver: 0 for driver in self.drivers}
+        for i in range(self.n_rounds):
+            ordered = sorted(self.drivers, key=lambda d: (self.counted[d][i], self.cumulative[d][i]), reverse=True)
+            self.leaders.append(ordered[0] if len(ordered) > 0 else None)
+            self.margins.append(self.counted[ordered[0]][i] - self.counted[ordered[1]][i] if len(ordered) > 1 else 0)
+            if len(ordered) > 0:
+                self.rounds_led[ordered[0]] += 1
+        self.champion = season.champion if season.champion in self.counted else (self.leaders[-1] if self.n_rounds > 0 else None)
+        self.final_margin = 0
+        if self.champion != None and len(self.drivers) > 1:
+            self.final_margin = self.counted[self.champion][-1] - max(self.counted[d][-1] for d in self.drivers if d != self.champion)
+        self.clinch_round = self.determine_clinch_round(all_points, best_of_n)
+
+    def max_round_points(self) -> list[float]:
+        """
+        Maximum number of points a driver could score in each round
+        """
+        race_points = self.season.select_race_points_system()
+        sprint_points = self.season.select_sprint_points_system()
+        fastest_lap_points = self.season.select_fastest_lap_points()[0]
+        max_points = []
+        for race in self.season.races:
+            round_points = race_points[0] if race.half_points == None else race.half_points[0]
+            round_points += fastest_lap_points
+            if race.sprint_event:
+                round_points += sprint_points[0]
+            max_points.append(round_points)
+        return max_points
+
+    def determine_clinch_round(self, all_points:dict, best_of_n) -> int:
+        """
+        Find the round after which no rival could catch the champion anymore
+        Parameters:
+            all_points: dict; points of each driver in each round
+            best_of_n: Any; championship determining parameter, see BEST_OF_N_CHAMPION
+        Outputs:
+            clinch_round: int; round number (1 = first round) the title was clinched, None if season has no rounds
+        """
+        if self.champion == None:
+            return None
+        max_points = self.max_round_points()
+        parts = RunningBestOfN(best_of_n)
+        remaining = [] # remaining[i]: for each part, prefix sums of the most points of rounds after round i+1, in descending order
+        suffix = [[] for _ in parts.limits]
+        for i in reversed(range(self.n_rounds)):
+            remaining.append([list(accumulate(sorted(points, reverse=True), initial=0)) for points in suffix])
+            suffix[parts.part(i)].append(max_points[i])
+        remaining.reverse()
+        rivals = [driver for driver in self.drivers if driver != self.champion]
+        running_totals = {driver: RunningBestOfN(best_of_n) for driver in rivals}
+        for i in range(self.n_rounds):
+            clinched = True
+            for rival in rivals:
+                running_totals[rival].add(all_points[rival][i])
+                if clinched and running_totals[rival].best_case(remaining[i]) >= self.counted[self.champion][i]:
+                    clinched = False
+            if clinched:
+                return i + 1
+        return self.n_rounds
+
+    def leader(self, round:int):
+        """
+        Championship leader after given round (1 = first round)
+        """
+        return self.leaders[round-1]
+
+    def margin(self, round:int) -> float:
+        """
+        Margin of championship leader to second place after given round (1 = first round)
+        """
+        return self.margins[round-1]
+
+    def points_after(self, driver, round:int) -> float:
+        """
+        Points counting towards the championship of a driver after given round (1 = first round)
+        """
+        return self.counted[driver][round-1] if driver in self.counted else 0
+
+    def total_after(self, driver, round:int) -> float:
+        """
+        Total points scored by a driver after given round (1 = first round)
+        """
+        return self.cumulative[driver][round-1] if driver in self.cumulative else 0
+
+    def get_rounds_led(self, driver) -> int:
+        """
+        Number of rounds after which given driver led the championship
+        """
+        return self.rounds_led[driver] if driver in self.rounds_led else 0
+
+    def table(self) -> list[tuple]:
+        """
+        Progression table of the championship
+        Parameters:
+            None
+        Outputs:
+            rows: list[tuple]; list of (round, leader, leader points, margin) for each round
+        """
+        return [(i+1, self.leaders[i], self.counted[self.leaders[i]][i], self.margins[i]) for i in range(self.n_rounds)]
@@ -1,8 +1,13 @@
 import random
 from mydataclass import MyDataClass, find_single_object_by_field_value
 from driver import Driver
-from globals import remove_accents, sumWithNone
-from readArchive import ArchiveReader
+from ages import achieved_before_age, achieved_after_age
+from globals import remove_accents
+from readArchive import ArchiveReader, CORE_FIELDS
+from bitset import build_mask, mask_members, popcount, inverted_masks
+from statstable import stats_table
+from cache import PairCache
+from hardcodes import country_display_name
 
 def numberWins(n:int, answer:MyDataClass) -> bool:
     """
@@ -49,10 +54,10 @@ def driverNationality(nationality:str, answer:MyDataClass) -> bool:
 
 def driverTeam(team:str, answer:MyDataClass) -> bool:
     """"""
-    return any(constructor.name == team for constructor in answer.teams)
+    return team in answer.team_names
 
 def numberSeasonPoints(n:int, answer:MyDataClass) -> bool:
-    return any([len(answer.get_season_data(i)["points"]) >= n for i in answer.season_entries.keys()])
+    return any([answer.get_season_data(i)["n_points"] >= n for i in answer.season_entries.keys()])
     # for year in answer.season_data:
     #     season = answer.season_data[year]
     #     if season["points"] >= n:
@@ -93,7 +98,7 @@ def noPoles(n:int, answer:MyDataClass) -> bool:
     return answer.get_career_data()["n_poles"] == 0
 
 def noSeasonPoints(n:int, answer:MyDataClass) -> bool:
-    return any([sumWithNone(answer.get_season_data(year)["points"]) == 0 for year in answer.season_data.keys()]) 
+    return any([answer.get_season_data(year)["n_points"] == 0 for year in answer.season_entries.keys()])
 
 def hasTeammate(teammate:Driver, answer:MyDataClass) -> bool:
     return teammate in answer.teammates
@@ -116,6 +121,98 @@ def wonRaceIn(country:str, answer:MyDataClass) -> bool:
 def wonHomeRace(_, answer:MyDataClass) -> bool:
     return wonRaceIn(answer.country, answer)
 
+def wonRaceInDecade(decade:int, answer:MyDataClass) -> bool:
+    return answer.get_year_stats().total("n_wins", decade, decade+9) >= 1
+
+def wonRaceBefore(year:int, answer:MyDataClass) -> bool:
+    return answer.get_year_stats().before("n_wins", year) >= 1
+
+def wonNearHome(km:int, answer:MyDataClass) -> bool:
+    return any(answer.spatial_index.near_country(circuit, answer.country, km) for circuit in answer.get_win_circuits())
+
+def wonOnContinents(n:int, answer:MyDataClass) -> bool:
+    return len(set(circuit.continent for circuit in answer.get_win_circuits() if circuit.continent)) >= n
+
+def racedAtAltitude(m:int, answer:MyDataClass) -> bool:
+    return any(isinstance(circuit.alt, (int, float)) and circuit.alt >= m for circuit in answer.get_circuits())
+
+def racedAtHighestCircuit(_, answer:MyDataClass) -> bool:
+    return answer.spatial_index.highest in answer.get_circuits()
+
+def wonRaceBeforeAge(years:int, answer:MyDataClass) -> bool:
+    return achieved_before_age(answer, "win", years)
+
+def racedAfterAge(years:int, answer:MyDataClass) -> bool:
+    return achieved_after_age(answer, "entry", years)
+
+def peakRating(rating:int, answer:MyDataClass) -> bool:
+    return answer.peak_rating != None and answer.peak_rating >= rating
+
+def numberRetirements(n:int, answer:MyDataClass) -> bool:
+    return answer.get_dnf_count() >= n
+
+def enteredRaceInDecade(decade:int, answer:MyDataClass) -> bool:
+    return answer.get_year_stats().total("n_entries", decade, decade+9) >= 1
+
+
+THRESHOLD_COLUMNS = { # Predicate of "at least n" questions: DriverStatsTable column compared against n
+    numberWins: "n_wins",
+    numberChampionships: "n_championships",
+    numberEntries: "n_entries",
+    numberPoles: "n_poles",
+    numberPodiums: "n_podiums",
+    numberPoints: "n_points",
+    numberSprintWins: "n_sprint_wins",
+    numberSeasonPoints: "max_n_points",
+    numberSeasonPoles: "max_n_poles",
+    numberSeasonPodiums: "max_n_podiums",
+    numberSeasonWins: "max_n_wins",
+    peakRating: "peak_rating",
+    numberRetirements: "n_dnfs"
+}
+
+def threshold_mask(column:str):
+    """
+    Vectorized form of an "at least n" predicate over a DriverStatsTable column
+    """
+    return lambda n, table: table.at_least(column, n)
+
+VECTORIZED_PREDICATES = { # Predicate: same predicate evaluated for every row of a DriverStatsTable at once, returning a bitmap
+    **{func: threshold_mask(column) for func, column in THRESHOLD_COLUMNS.items()},
+    driverNationality: lambda nationality, table: table.equals("nationality", nationality),
+    driverTeam: lambda team, table: table.contains("team_names", team),
+    noChampionships: lambda _, table: table.equals("n_championships", 0),
+    noWins: lambda _, table: table.equals("n_wins", 0),
+    noPoles: lambda _, table: table.equals("n_poles", 0),
+    noSeasonPoints: lambda _, table: table.equals("min_n_points", 0),
+    wildcard: lambda _, table: table.all()
+}
+
+PREDICATE_FIELDS = { # Fields read by predicates beyond CORE_FIELDS and their question's bonus fields, see also readArchive.DERIVED_FIELDS
+    wonNearHome: {"lat", "lng"},
+    racedAtAltitude: {"alt"},
+    racedAtHighestCircuit: {"lat", "lng", "alt"},
+    wonRaceBeforeAge: {"dob"},
+    racedAfterAge: {"dob"},
+    peakRating: {"peak_rating"}
+}
+
+def required_fields(questions:list) -> set[str]:
+    """
+    Find the fields an archive must read to check and display given questions
+    Parameters:
+        questions: list[Question | tuple]; questions or question tuples, see Question.set_question()
+    Outputs:
+        fields: set[str]; field names, usable as ArchiveReader projection
+    """
+    fields = set(CORE_FIELDS)
+    for question in questions:
+        func = question[3] if isinstance(question, tuple) else question.func
+        bonus_fields = question[4:] if isinstance(question, tuple) else question.bonus_fields
+        fields.update(PREDICATE_FIELDS.get(func, set()))
+        fields.update(x for x in bonus_fields if isinstance(x, str))
+    return fields
+
 
 class Question():
     """
@@ -125,6 +222,7 @@ class Question():
     questions1 = [] # Easy questions
     questions2 = [] # Medium questions
     questions3 = [] # Hard questions
+    pair_cache = PairCache() # Mutual answers of question pairs, shared by all questions
 
     def __init__(self):
         """
@@ -134,7 +232,7 @@ class Question():
         self.base:str = None
         self.modifier = None
         self.func = None
-        self._mutual_answers = {}
+        self._answer_masks = {} # id of candidate list: (candidates, bitmap of answers over candidate indexes)
     
     def __str__(self) -> str:
         """
@@ -248,14 +346,45 @@ class Question():
         Returns:
             valid: bool; boolean for if at least one valid answer exists for both questions. True = true
         """
-        if otherQuestion in self._mutual_answers:
-            return len(self.get_mutual_answers(otherQuestion,candidates)) > 0
-        for candidate in candidates:
-            ans1 = self.check_question(candidate)
-            ans2 = otherQuestion.check_question(candidate)
-            if ans1 and ans2:
-                return True
-        return False
+        return self.get_mutual_mask(otherQuestion, candidates) != 0
+
+    def get_answer_mask(self, candidates:list[MyDataClass]) -> int:
+        """
+        Get the answers to this question as a bitmap, computed once per candidate list.
+        Predicates in VECTORIZED_PREDICATES are evaluated over the stats table of candidates, others per candidate.
+        Parameters:
+            candidates: list[MyDataClass]; list of MyDataClass objects that are possible answers to question
+        Outputs:
+            mask: int; bitmap with bit i set if candidates[i] is a correct answer
+        """
+        cached = self._answer_masks.get(id(candidates))
+        if cached != None and cached[0] is candidates:
+            return cached[1]
+        vectorized = VECTORIZED_PREDICATES.get(self.func)
+        table = None if vectorized == None else stats_table(candidates)
+        if table == None:
+            mask = build_mask(self.check_question, candidates)
+        else:
+            mask = vectorized(self.modifier, table)
+        self._answer_masks[id(candidates)] = (candidates, mask)
+        return mask
+
+    def set_answer_mask(self, candidates:list[MyDataClass], mask:int) -> None:
+        """
+        Set precomputed answers to this question, e.g. loaded from cache.AnswerCache
+        """
+        self._answer_masks[id(candidates)] = (candidates, mask)
+
+    def get_mutual_mask(self, other_question, candidates:list[MyDataClass]) -> int:
+        """
+        Get the correct answers to both this and another question as a bitmap, see get_answer_mask().
+        Bitmaps are shared between all questions through Question.pair_cache.
+        """
+        mutual_mask = self.pair_cache.get(self, other_question, candidates)
+        if mutual_mask == None:
+            mutual_mask = self.get_answer_mask(candidates) & other_question.get_answer_mask(candidates)
+            self.pair_cache.put(self, other_question, candidates, mutual_mask)
+        return mutual_mask
 
     def get_all_answers(self, candidates:list[MyDataClass]) -> list[MyDataClass]:
         """
@@ -265,13 +394,13 @@ class Question():
         Outputs:
             filtered_list: list[MyDataClass]; filtered list of candidates that are correct answers
         """
-        if self in self._mutual_answers.keys():
-            return self._mutual_answers[self]
-        self._mutual_answers[self] = []
-        for candidate in candidates:
-            if self.check_question(candidate):
-                self._mutual_answers[self].append(candidate)
-        return self._mutual_answers[self]
+        return mask_members(self.get_answer_mask(candidates), candidates)
+
+    def count_answers(self, candidates:list[MyDataClass]) -> int:
+        """
+        Count the valid answers to this question from candidate list
+        """
+        return popcount(self.get_answer_mask(candidates))
     
     def get_mutual_answers(self, other_question, candidates:list[MyDataClass]) -> list[MyDataClass]:
         """
@@ -282,15 +411,13 @@ class Question():
         Outputs:
             Returns list of valid answers
         """
-        if other_question in self._mutual_answers.keys():
-            return self._mutual_answers[other_question]
-        mutual_list = []
-        for candidate in candidates:
-            if self.check_question(candidate) and other_question.check_question(candidate):
-                mutual_list.append(candidate)
-        self._mutual_answers[other_question] = mutual_list
-        other_question._mutual_answers[self] = mutual_list
-        return self._mutual_answers[other_question]
+        return mask_members(self.get_mutual_mask(other_question, candidates), candidates)
+
+    def count_mutual_answers(self, other_question, candidates:list[MyDataClass]) -> int:
+        """
+        Count the correct answers to two mutual questions from list of candidate answers
+        """
+        return popcount(self.get_mutual_mask(other_question, candidates))
 
 class DriverQuestion(Question):
     questions1 = [] # Easy questions
@@ -411,12 +538,34 @@ class QuestionGenerator():
                 return formula
         raise ValueError(f"No question formula with id {id} found!")
     
+    def choose_threshold(self, question_id:int, min_answers:int, max_answers:int, setseed=None) -> int:
+        """
+        Choose a modifier for an "at least n" question formula so that its number of answers is within bounds
+        Parameters:
+            question_id: int; id of question formula, its predicate must be in THRESHOLD_COLUMNS
+            min_answers: int; lowest number of answers allowed
+            max_answers: int; highest number of answers allowed
+            (Optional) setseed: Any; seed to use when choosing among valid thresholds. Default = None = Random
+        Outputs:
+            threshold: int; modifier n of question
+        """
+        question_formula = self.get_formula_from_id(question_id)
+        assert question_formula[3] in THRESHOLD_COLUMNS.keys(), f"Question formula {question_id} has no threshold!"
+        table = stats_table(self.get_validation_list())
+        assert table != None, "Thresholds require a validation list of drivers!"
+        thresholds = table.threshold_index(THRESHOLD_COLUMNS[question_formula[3]]).thresholds(min_answers, max_answers)
+        assert len(thresholds) > 0, f"No threshold gives {min_answers}-{max_answers} answers!"
+        random.seed(setseed)
+        return random.choice(thresholds)
+
     def generate_custom_question(self, question_id:int, modifier_id:int) -> Question:
         question_formula = self.get_formula_from_id(question_id)
         if question_formula[2] == Driver:
             modifier = find_single_object_by_field_value(self.archive.drivers, "driverId", modifier_id)
         elif question_formula[2] == int:
             modifier = modifier_id
+        else:
+            raise AssertionError(f"Question formula {question_id} takes a {question_formula[2].__name__} modifier, which cannot be given as modifier id!")
         return self.generate_question(question_id, modifier)
 
     def generate_question(self, id:int, modifier: int|MyDataClass) -> Question:
@@ -428,6 +577,47 @@ class QuestionGenerator():
         new_q.set_question(tuple(new_question_formula))
         assert len(new_q.get_all_answers(self.get_validation_list())) >= self.minimum_answers, "Generated question has no answers!"
         return new_q
+
+    def modifier_masks(self, question_id:int, min_answers:int, max_answers:int):
+        """
+        Enumerate the modifiers of a question formula with their answer bitmaps, overridden by subclasses
+        Parameters:
+            question_id: int; id of question formula
+            min_answers: int; lowest number of answers needed, thresholds outside bounds may be skipped
+            max_answers: int; highest number of answers allowed
+        Outputs:
+            modifier_masks: Iterable[tuple] | None; (modifier, answer bitmap) pairs, None if formula cannot be enumerated
+        """
+        return None
+
+    def enumerate_questions(self, min_answers:int=None, max_answers:int=None, question_ids:list[int]=None):
+        """
+        Lazily enumerate every question of every formula whose number of answers is within bounds.
+        Answers come from indexes built once per formula, questions are only created when iterated over.
+        Parameters:
+            (Optional) min_answers: int; lowest number of answers. Default = None = self.minimum_answers
+            (Optional) max_answers: int; highest number of answers. Default = None = No limit
+            (Optional) question_ids: list[int]; ids of formulae to enumerate. Default = None = Every formula
+        Outputs:
+            questions: Iterator[Question]; questions with answers precomputed for the validation list
+        """
+        candidates = self.get_validation_list()
+        min_answers = self.minimum_answers if min_answers == None else min_answers
+        max_answers = len(candidates) if max_answers == None else max_answers
+        for question_formula in self.question_formulae:
+            if question_ids != None and question_formula[0] not in question_ids:
+                continue
+            modifier_masks = self.modifier_masks(question_formula[0], min_answers, max_answers)
+            if modifier_masks == None:
+                continue
+            for modifier, mask in modifier_masks:
+                if min_answers <= popcount(mask) <= max_answers:
+                    new_q = Question()
+                    new_question_formula = list(question_formula)
+                    new_question_formula[2] = modifier
+                    new_q.set_question(tuple(new_question_formula))
+                    new_q.set_answer_mask(candidates, mask)
+                    yield new_q
     
     def predetermined_question(self, identifier:int) -> Question:
         """
@@ -445,12 +635,56 @@ class DriverQuestionGenerator(QuestionGenerator):
     question_formulae = [
         (1, "At least {} race wins", int, numberWins, "get_career_data", "n_wins"),
         (2, "At least {} championships", int, numberChampionships, "get_career_data", "n_championships"),
-        (3, "Has been teammates with {}", Driver, hasTeammate, "teammates")
+        (3, "Has been teammates with {}", Driver, hasTeammate, "teammates"),
+        (4, "Won a race in the {}s", int, wonRaceInDecade, "get_all_seasons_data", "n_wins"),
+        (5, "Won a race before {}", int, wonRaceBefore, "get_all_seasons_data", "n_wins"),
+        (6, "Raced in the {}s", int, enteredRaceInDecade, "get_all_seasons_data", "n_entries"),
+        (7, "Won a race within {} km of home", int, wonNearHome, "get_win_circuits", "country"),
+        (8, "Won races on {} continents", int, wonOnContinents, "get_win_circuits", "continent"),
+        (9, "Raced at a circuit above {} m", int, racedAtAltitude, "get_circuits", "alt"),
+        (10, "Won a race before turning {}", int, wonRaceBeforeAge, "dob"),
+        (11, "Raced after turning {}", int, racedAfterAge, "dob"),
+        (12, "Peak rating of at least {}", int, peakRating, "peak_rating"),
+        (13, "At least {} retirements", int, numberRetirements, "get_dnf_count"),
+        (14, "Driver nationality: {}", str, driverNationality, "nationality"),
+        (15, "Driven for team: {}", str, driverTeam, "teams", "name"),
+        (16, "Won a race in: {}", str, wonRaceIn, "get_wins_per_country"),
+        (17, "Won a race in: {}", int, wonRaceInYear, "get_all_seasons_data", "n_wins"),
+        (18, "Raced at the highest circuit", str, racedAtHighestCircuit, "get_circuits", "alt")
     ]
 
     def __init__(self, archive:ArchiveReader):
         super().__init__(archive, "drivers")
 
+    def modifier_masks(self, question_id:int, min_answers:int, max_answers:int):
+        """
+        Enumerate the modifiers of a question formula with their answer bitmaps, see QuestionGenerator.modifier_masks()
+        """
+        drivers = self.get_validation_list()
+        func = self.get_formula_from_id(question_id)[3]
+        if func in THRESHOLD_COLUMNS.keys():
+            threshold_index = stats_table(drivers).threshold_index(THRESHOLD_COLUMNS[func])
+            return ((n, threshold_index.mask(n)) for n in threshold_index.thresholds(min_answers, max_answers))
+        if func == hasTeammate:
+            masks = inverted_masks(drivers, lambda driver: driver.teammates)
+        elif func == driverNationality:
+            masks = inverted_masks(drivers, lambda driver: [driver.nationality])
+        elif func == driverTeam:
+            masks = inverted_masks(drivers, lambda driver: driver.team_names)
+        elif func == wonRaceIn:
+            masks = inverted_masks(drivers, lambda driver: [country_display_name(country) for country, wins in driver.get_wins_per_country().items() if wins])
+        elif func == wonRaceInYear:
+            masks = inverted_masks(drivers, lambda driver: [year for year, stats in driver.get_all_seasons_data().items() if stats["n_wins"] >= 1])
+        elif func == wonRaceInDecade:
+            masks = inverted_masks(drivers, lambda driver: set(year//10*10 for year, stats in driver.get_all_seasons_data().items() if stats["n_wins"] >= 1))
+        elif func == enteredRaceInDecade:
+            masks = inverted_masks(drivers, lambda driver: set(year//10*10 for year, stats in driver.get_all_seasons_data().items() if stats["n_entries"] >= 1))
+        elif func == racedAtHighestCircuit:
+            masks = {"": build_mask(lambda driver: racedAtHighestCircuit("", driver), drivers)}
+        else:
+            return None
+        return sorted(masks.items(), key=lambda x: str(x[0]))
+
 def new_question(difficulty:int, questiontype:int=None, setseed=None, questionID:int=None) -> Question:
     """
     Create a new question
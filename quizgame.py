@@ -1,12 +1,17 @@
 import random
+from concurrent.futures import ProcessPoolExecutor
 
 from readArchive import ArchiveReader
 from mydataclass import MyDataClass, find_single_object_by_field_value
 from driver import Driver
 from globals import *
 from question import Question, new_question, all_questions
+from bitset import compatibility_rows, mirror_rows, init_worker, worker_compatibility_rows
+from cache import AnswerCache, cache_key, QUESTION_CACHE_FILE
+from calibration import DifficultyCalibrator, N_TIERS
 
 RECURSION_LIMIT = 100
+SHARDS_PER_PROCESS = 4 # Row shards of the compatibility matrix per worker process
 
 class QuizGame():
     """
@@ -519,7 +524,7 @@ class RaceQuiz(QuizGame):
 class QuizConstructor():
 
     def __init__(self, archive:ArchiveReader, n_cols:int=3, n_rows:int=3, 
-            difficulty:int=3, quiztype:int=0, guesses:int=0, seed=None):
+            difficulty:int=3, quiztype:int=0, guesses:int=0, seed=None, calibrated:bool=False):
         random.seed(seed)
         self.archive = archive
         self.set_n_cols(n_cols)
@@ -527,13 +532,67 @@ class QuizConstructor():
         self.set_difficulty(difficulty)
         self.set_quiztype(quiztype)
         self.set_n_guesses(guesses)
+        self.set_calibrated(calibrated)
         self.all_questions:list[Question] = None
         self.quiz:QuizGame = None
+        self.question_index = {} # question: index in self.compatibility
+        self.compatibility = [] # compatibility[i][j]: number of mutual answers of all_questions[i] and all_questions[j]
     
-    def validate_all(self):
-        for question in self.all_questions:
-            for other_question in self.all_questions:
-                question.get_mutual_answers(other_question, self.archive.drivers)
+    def validate_all(self, use_cache:bool=True, processes:int=None):
+        """
+        Count the mutual answers of every pair of questions, from the answer bitmap of each question
+        Parameters:
+            (Optional) use_cache: bool; load answers from the cache in db directory if archive, catalog and
+                predicate code are unchanged, else save them there. Default = True
+            (Optional) processes: int; number of worker processes counting mutual answers, workers only receive
+                the answer bitmaps, once per worker. Default = None = Count in this process
+        Outputs:
+            Sets self.compatibility and self.question_index
+        """
+        drivers = self.archive.drivers
+        self.question_index = {question: i for i, question in enumerate(self.all_questions)}
+        if use_cache:
+            cache_path = os.path.join(self.archive.db_path, QUESTION_CACHE_FILE)
+            key = cache_key(self.archive, self.all_questions)
+            cached = AnswerCache.load(cache_path, key)
+            if cached != None:
+                for question, mask in zip(self.all_questions, cached.masks):
+                    question.set_answer_mask(drivers, mask)
+                self.compatibility = cached.compatibility
+                return
+        masks = [question.get_answer_mask(drivers) for question in self.all_questions]
+        if processes == None or processes <= 1:
+            upper_rows = compatibility_rows(masks, 0, len(masks))
+        else:
+            shard = max(1, -(-len(masks)//(processes*SHARDS_PER_PROCESS)))
+            starts = list(range(0, len(masks), shard))
+            ends = [min(start + shard, len(masks)) for start in starts]
+            with ProcessPoolExecutor(max_workers=processes, initializer=init_worker, initargs=(masks,)) as executor:
+                shards = executor.map(worker_compatibility_rows, starts, ends)
+                upper_rows = [row for rows in shards for row in rows]
+        self.compatibility = mirror_rows(upper_rows)
+        if use_cache:
+            try:
+                AnswerCache(key, masks, self.compatibility).save(cache_path)
+            except OSError: # E.g. read-only db directory, carry on without caching
+                pass
+
+    def get_calibration(self) -> DifficultyCalibrator:
+        """
+        Get the difficulty calibration of all questions, computed on first use
+        """
+        if not hasattr(self, "_calibration") or self._calibration == None or self._calibration.questions is not self.all_questions:
+            self._calibration = DifficultyCalibrator(self.all_questions, self.archive.drivers)
+            self._calibration.calibrate()
+        return self._calibration
+
+    def get_compatibility(self, question:Question, other_question:Question) -> int:
+        """
+        Get the number of mutual answers of two questions, see validate_all()
+        """
+        if question in self.question_index.keys() and other_question in self.question_index.keys():
+            return self.compatibility[self.question_index[question]][self.question_index[other_question]]
+        return question.count_mutual_answers(other_question, self.archive.drivers)
         
     def set_n_cols(self, n_cols:int):
         assert isinstance(n_cols, int) and n_cols > 0, f"Number of columns must be positive integer! Currently {n_cols}"
@@ -556,6 +615,13 @@ class QuizConstructor():
     def set_n_guesses(self, guesses:int):
         assert isinstance(guesses, int) and guesses >= 0, f"Number of guesses must be non-negative integer! Currently {guesses}"
         self.guesses = guesses
+
+    def set_calibrated(self, calibrated:bool):
+        """
+        Choose questions by calibrated difficulty tiers instead of the difficulty buckets of the question catalog, see get_calibration()
+        """
+        assert isinstance(calibrated, bool), f"Calibrated must be boolean! Currently {calibrated}"
+        self.calibrated = calibrated
     
     def select_question(self, id:int) -> Question:
         assert isinstance(id, int), f"Question index must be integer! Currently {id}"
@@ -567,6 +633,33 @@ class QuizConstructor():
     def random_question(self) -> Question:
         return random.choice(self.all_questions)
 
+    def calibrated_question(self, tier:int, setseed=None) -> Question:
+        """
+        Choose a random question of a calibrated difficulty tier
+        Parameters:
+            tier: int; difficulty tier, 1 = Easy, 2 = Medium, 3 = Hard
+            (Optional) setseed: Any; seed to use when choosing question. Default = None = Random
+        Outputs:
+            question: Question; question of tier, or of the nearest tier with questions
+        """
+        calibration = self.get_calibration()
+        tiers = {} # tier: questions of tier
+        for question in self.all_questions:
+            question_tier = calibration.get_question_tier(question)
+            if question_tier != None:
+                tiers.setdefault(question_tier, []).append(question)
+        assert len(tiers) > 0, "No question has any answers!"
+        nearest_tier = min(tiers.keys(), key=lambda x: (abs(x - tier), x))
+        random.seed(setseed)
+        return random.choice(tiers[nearest_tier])
+
+    def grid_within_difficulty(self, question_set:tuple[list[Question], list[Question]]) -> bool:
+        """
+        Check if every cell of a grid has answers and the calibrated grid tier is at most the difficulty of this quiz
+        """
+        grid_tier = self.get_calibration().get_grid_tier(question_set[0], question_set[1])
+        return grid_tier != None and grid_tier <= min(self.difficulty, N_TIERS)
+
     def set_col_question_id(self, ids):
         assert all([x == None or isinstance(x, int) for x in ids]), "Ids must be None or integers!"
         self.col_question_id_set = ids
@@ -624,7 +717,10 @@ class QuizConstructor():
                         i_col_question = self.random_question()
                     elif isinstance(i_col_question_id, int) and i_col_question_id < 0:
                         temp_seed = random.random()
-                        i_col_question = new_question(max(min(self.n_cols-i, self.difficulty), 1), setseed=temp_seed)
+                        if self.calibrated:
+                            i_col_question = self.calibrated_question(max(min(self.n_cols-i, self.difficulty), 1), setseed=temp_seed)
+                        else:
+                            i_col_question = new_question(max(min(self.n_cols-i, self.difficulty), 1), setseed=temp_seed)
                     else:
                         i_col_question = self.select_question(i_col_question_id)
                     temp_id = i_col_question.question_id
@@ -643,7 +739,10 @@ class QuizConstructor():
                         i_row_question = self.random_question()
                     elif isinstance(i_row_question_id, int) and i_row_question_id < 0:
                         temp_seed = random.random()
-                        i_row_question = new_question(max(min(self.n_rows-i, self.difficulty), 1), setseed=temp_seed)
+                        if self.calibrated:
+                            i_row_question = self.calibrated_question(max(min(self.n_rows-i, self.difficulty), 1), setseed=temp_seed)
+                        else:
+                            i_row_question = new_question(max(min(self.n_rows-i, self.difficulty), 1), setseed=temp_seed)
                     else:
                         i_row_question = self.select_question(i_row_question_id)
                     temp_id = i_row_question.question_id
@@ -717,6 +816,8 @@ class QuizConstructor():
             elif compare_sets(new_question_set, incompatible_sets):
                 continue
             validated = self.quiz.full_validation()
+            if validated and self.calibrated:
+                validated = self.grid_within_difficulty(new_question_set)
             if not validated:
                 incompatible_sets.append(new_question_set)
         return self.quiz
@@ -1,7 +1,10 @@
+from collections import namedtuple
 from mydataclass import MyDataClass
+from globals import lap_time_to_ms, date_to_ordinal
 from driver import Driver
 from constructor import Constructor
 from circuit import Circuit
+from status import StatusTable, DNF_CATEGORIES
 
 RACE_DATA_FIELDS = ["raceId","year","round","circuitId",
                     "name","date","time","url",
@@ -20,6 +23,13 @@ SPRINT_RESULT_DATA_FIELDS = ["resultId","raceId","driverId","constructorId",
                       "positionOrder","points","laps","time","milliseconds",
                       "fastestLap","fastestLapTime","statusId"]
 
+ResultRecord = namedtuple("ResultRecord", ["race","driver","constructor","grid","position","points","status","age","category"])
+
+QUALIFYING_DATA_FIELDS = ["qualifyId","raceId","driverId","constructorId",
+                          "number","position","q1","q2","q3"]
+
+QUALIFYING_SESSIONS = ["q1","q2","q3"]
+
 NON_SCORING_POS_POINTS = 0
 
 class Result():
@@ -53,7 +63,14 @@ class ResultOrder(dict):
     def __init__(self, event, title):
         self.event = event
         self.title = title
-        self._hardcoded_fastest_drivers = []
+        self._hardcoded_fastest_drivers = None # Entrants credited with fastest lap regardless of lap times, None if not hardcoded
+        self._positions = {} # entrant: position
+        self._driver_positions = {} # driver: best position
+        self._lap_times = {} # entrant: fastest lap time in milliseconds
+        self._fastest_lap = None # Cached fastest lap, (entrants, time)
+        self._order = None # Cached order of entrants
+        self._driver_entrants = None # driver: entrants, in order
+        self._constructor_entrants = None # constructor: entrants, in order
     
     def __str__(self):
         return "\n".join([(str(x) + ": " + str(self[x])) for x in self.sorted_order()])
@@ -75,14 +92,54 @@ class ResultOrder(dict):
     def get_fastest_lap(self, *args):
         raise NotImplementedError("Method not implemented for base class!")
 
+    def index_result(self, pos, entrant, result_dict:dict) -> None:
+        """
+        Index an added result for constant time lookups
+        Parameters:
+            pos: int | str; position the result was added to
+            entrant: tuple[Driver, Constructor]; entrant of result
+            result_dict: dict; result data, fastest lap time is parsed to milliseconds if present
+        Outputs:
+            Updates position and lap time indexes, resets cached order and fastest lap
+        """
+        if entrant not in self._positions.keys():
+            self._positions[entrant] = pos
+        driver_pos = self._driver_positions.get(entrant[0])
+        if driver_pos == None or (isinstance(pos, int) and (not isinstance(driver_pos, int) or pos < driver_pos)):
+            self._driver_positions[entrant[0]] = pos
+        lap_time = lap_time_to_ms(result_dict.get("fastestLapTime"))
+        if lap_time != None and (entrant not in self._lap_times.keys() or lap_time < self._lap_times[entrant]):
+            self._lap_times[entrant] = lap_time
+        self._fastest_lap = None
+        self._order = None
+
     def get_entrant(self, entrant):
         """
-        
+        Get the position of an entrant
+        Parameters:
+            entrant: tuple[Driver, Constructor]; entrant to find
+        Outputs:
+            pos: int | str; position of entrant
         """
-        for i in self.keys():
-            if entrant in self[i].entrants:
-                return i
-        raise ValueError("Entrant not found!")
+        if entrant not in self._positions.keys():
+            raise ValueError("Entrant not found!")
+        return self._positions[entrant]
+
+    def get_driver_position(self, driver):
+        """
+        Get the best position of a driver, regardless of team
+        Parameters:
+            driver: Driver; driver to find
+        Outputs:
+            pos: int | str | None; position of driver, None if driver not found
+        """
+        return self._driver_positions.get(driver)
+
+    def get_lap_time(self, entrant) -> int:
+        """
+        Get the fastest lap time of an entrant in milliseconds, None if no time was set
+        """
+        return self._lap_times.get(entrant)
 
     def get_position(self, position):
         """
@@ -94,11 +151,32 @@ class ResultOrder(dict):
         """
         
         """
-        order = []
-        for pos in self.sorted_order():
-            for ent in self.get_position(pos).entrants:
-                order.append(ent)
-        return order
+        if self._order == None:
+            order = []
+            for pos in self.sorted_order():
+                for ent in self.get_position(pos).entrants:
+                    order.append(ent)
+            self._order = order
+            self._driver_entrants = {}
+            self._constructor_entrants = {}
+            for ent in order:
+                self._driver_entrants.setdefault(ent[0], []).append(ent)
+                self._constructor_entrants.setdefault(ent[1], []).append(ent)
+        return self._order
+
+    def get_driver_entrants(self, driver) -> list:
+        """
+        Get all entrants of a driver, in order
+        """
+        self.get_order()
+        return self._driver_entrants.get(driver, [])
+
+    def get_constructor_entrants(self, constructor) -> list:
+        """
+        Get all entrants of a constructor, in order
+        """
+        self.get_order()
+        return self._constructor_entrants.get(constructor, [])
 
     def pos_points(self, points_system):
         """
@@ -117,6 +195,33 @@ class ResultOrder(dict):
                     points_per_entrant[entrant] = pos_points/len(result.entrants)
         return points_per_entrant
 
+    def constructor_pos_points(self, points_system, best_car_only:bool=False):
+        """
+        Returns dictionary of constructor:points
+        Parameters:
+            points_system: list[int]; Points awarded per position
+            (Optional) best_car_only: bool; Only the best placed car of each constructor scores. Default = False
+        Outputs:
+            points_per_constructor: dict[Constructor, float]; points scored by each classified constructor
+        """
+        points_per_constructor = {}
+        for i in range(len(self.keys())):
+            if i >= len(points_system):
+                pos_points = 0
+            else:
+                pos_points = points_system[i]
+            result = self[i+1]
+            constructors = [] # Shared cars only score once per constructor
+            for entrant in result.entrants:
+                if entrant[1] not in constructors:
+                    constructors.append(entrant[1])
+            for constructor in constructors:
+                if constructor not in points_per_constructor.keys():
+                    points_per_constructor[constructor] = pos_points/len(constructors)
+                elif not best_car_only:
+                    points_per_constructor[constructor] += pos_points/len(constructors)
+        return points_per_constructor
+
     def determine_points(self, points_system, fastest_lap_tuple):
         """
         
@@ -143,9 +248,9 @@ class RaceOrder(ResultOrder):
     
     def _hardcoded_fastest_lap_data(self, fastest_drivers):
         """
-        
+        Credit fastest lap to given entrants regardless of lap times, empty list or True if fastest lap was not awarded
         """
-        self._hardcoded_fastest_drivers = fastest_drivers
+        self._hardcoded_fastest_drivers = [] if fastest_drivers == True else fastest_drivers
     
     def add_result(self, entrant, result_dict):
         """
@@ -155,27 +260,23 @@ class RaceOrder(ResultOrder):
         if pos not in self.keys():
             self[pos] = Result()
         self[pos].add_entrant(entrant, result_dict)
+        self.index_result(pos, entrant, result_dict)
     
     def get_fastest_lap(self):
         """
         Gets driver who set fastest lap
-        """
-        if not self._hardcoded_fastest_drivers:
-            fastest_time = None
-            fastest_entrants = []
-            for result in self.keys():
-                for i in range(len(self[result].entrants)):
-                    entrant = self[result].entrants[i]
-                    entrant_time = self[result].data[i]["fastestLapTime"]
-                    if fastest_time == None or entrant_time < fastest_time:
-                        fastest_time = entrant_time
-                        fastest_entrants = [entrant]
-                    elif fastest_time == entrant_time:
-                        fastest_entrants.append(entrant)
-            return (fastest_entrants, fastest_time)
+        Parameters:
+            None
+        Outputs:
+            t: tuple[list, int | None]; tuple of entrants who set the fastest lap and the lap time in milliseconds
+        """
+        if self._hardcoded_fastest_drivers == None:
+            if self._fastest_lap == None:
+                fastest_time = min(self._lap_times.values(), default=None)
+                fastest_entrants = [entrant for entrant in self.get_order() if self._lap_times.get(entrant) == fastest_time] if fastest_time != None else []
+                self._fastest_lap = (fastest_entrants, fastest_time)
+            return self._fastest_lap
         else:
-            if self._hardcoded_fastest_drivers == True:
-                self._hardcoded_fastest_drivers = []
             return (self._hardcoded_fastest_drivers, None)
 
 
@@ -194,8 +295,10 @@ class GridOrder(ResultOrder):
         if pos not in self.keys():
             self[pos] = Result()
             self[pos].add_entrant(entrant, result_dict)
+            self.index_result(pos, entrant, result_dict)
         elif pos == "PL":
             self["PL"].add_entrant(entrant, result_dict)
+            self.index_result(pos, entrant, result_dict)
 
 
 class SprintOrder(RaceOrder):
@@ -214,8 +317,48 @@ class QualifyingOrder(ResultOrder):
 
     def __init__(self, event):
         super().__init__(event, "Qualifying Classification")
+        self._session_times = {} # driver: tuple of session times in milliseconds, None if no time set
+
+    def add_result(self, entrant, result_dict):
+        """
+        Adds qualifying result of entrant, session times are parsed to milliseconds
+        """
+        pos = int(result_dict["position"])
+        if pos not in self.keys():
+            self[pos] = Result()
+        self[pos].add_entrant(entrant, result_dict)
+        self.index_result(pos, entrant, result_dict)
+        self._session_times[entrant[0]] = tuple(lap_time_to_ms(result_dict.get(session)) for session in QUALIFYING_SESSIONS)
 
-    # TODO: Finish Implementing
+    def get_pole(self):
+        """
+        Get the entrant who qualified on pole, None if no qualifying results
+        """
+        return self[1].entrants[0] if 1 in self.keys() else None
+
+    def get_session_times(self, driver) -> tuple:
+        """
+        Get the session times of a driver in milliseconds, None for sessions without time
+        """
+        return self._session_times.get(driver, (None,) * len(QUALIFYING_SESSIONS))
+
+    def get_gap_to_pole(self, driver) -> int:
+        """
+        Get the gap of a driver to pole position in milliseconds
+        Parameters:
+            driver: Driver; driver to get gap of
+        Outputs:
+            gap: int | None; gap to pole sitter in the last session in which the driver set a time, None if driver set no time
+        """
+        pole = self.get_pole()
+        if pole == None:
+            return None
+        driver_times = self.get_session_times(driver)
+        pole_times = self.get_session_times(pole[0])
+        for i in reversed(range(len(QUALIFYING_SESSIONS))):
+            if driver_times[i] != None and pole_times[i] != None:
+                return driver_times[i] - pole_times[i]
+        return None
     
         
 class Race(MyDataClass):
@@ -235,12 +378,16 @@ class Race(MyDataClass):
         self.sprint_event = False # Flag for if race had sprint event, assumed false unless add_sprint_entrant() method is called
         self.sprint = None
         self.sprint_grid = None
+        self.qualifying:QualifyingOrder = None
         self.fastest_drivers = None
         self.points_per_driver = {}
         self.half_points = None # None if not half points awarded for this race, else is list of new points
         self._saved_points = {}
+        self._saved_constructor_points = {}
         self.teammates = {}
         self.circuit:Circuit = None
+        self.date_ordinal = None # Race date as day ordinal
+        self.dnf_mask = 0 # Bit driverId set for every driver who retired, see status.DNF_CATEGORIES
         
     def __str__(self):
         """
@@ -248,10 +395,12 @@ class Race(MyDataClass):
         """
         return f"{str(self.year)} {str(self.name)}"
     
-    def read_data(self, data:list[str]):
-        self.read_csv_data(data)
+    def read_data(self, data:list[str], projection:set[str]=None):
+        self.read_csv_data(data, projection=projection)
+        self.date_ordinal = date_to_ordinal(self.date)
         self.finish = RaceOrder(str(self))
         self.grid = GridOrder(str(self))
+        self.qualifying = QualifyingOrder(str(self))
     
     def add_circuit(self, circuit:Circuit):
         """
@@ -264,15 +413,18 @@ class Race(MyDataClass):
         assert isinstance(circuit, Circuit), "Circuit parameter must be of type Circuit!"
         self.circuit = circuit
     
-    def add_race_entrant(self, driver:Driver, constructor:Constructor, results:list):
+    def add_race_entrant(self, driver:Driver, constructor:Constructor, results:list, projection:set[str]=None, status_table:StatusTable=None):
         """
         Add driver and team to list of entrants
         Parameters:
             driver: Driver; Entrant driver
             constructor: Constructor; Entrant constructor
             result: list[str]; Entrant result from race, from result csv
+            (Optional) projection: set[str]; Names of result fields to keep. Default = None = All fields
+            (Optional) status_table: StatusTable; Table to categorize result status with. Default = None = Uncategorized
         Outputs:
             Adds team as key and driver as value to self.entrants
+            record: ResultRecord; result record of entrant
         """
         driver_team_tuple = (driver, constructor)
         results_dict = {}
@@ -284,7 +436,8 @@ class Race(MyDataClass):
         assert int(results[3]) == constructor.constructorId, "Incorrect constructor id!"
         results_dict["constructor"] = constructor
         for i in range(4, len(RACE_RESULT_DATA_FIELDS)):
-            results_dict[RACE_RESULT_DATA_FIELDS[i]] = results[i]
+            if projection == None or RACE_RESULT_DATA_FIELDS[i] in projection:
+                results_dict[RACE_RESULT_DATA_FIELDS[i]] = results[i]
         # self.entrants[driver_team_tuple] = results_dict
         if constructor in self.teammates.keys() and driver not in self.teammates[constructor]:
             self.teammates[constructor].append(driver)
@@ -294,14 +447,22 @@ class Race(MyDataClass):
         # New implementation
         self.finish.add_result(driver_team_tuple, results_dict)
         self.grid.add_result(driver_team_tuple, results_dict)
+        age = None if self.date_ordinal == None or driver.dob_ordinal == None else self.date_ordinal - driver.dob_ordinal
+        status = int(results_dict["statusId"])
+        category = None if status_table == None else status_table.get_category(status)
+        if category in DNF_CATEGORIES:
+            self.dnf_mask |= 1 << driver.driverId
+        return ResultRecord(self, driver, constructor, int(results_dict["grid"]), int(results_dict["positionOrder"]),
+                            float(results_dict["points"]), status, age, category)
    
-    def add_sprint_entrant(self, driver:Driver, constructor:Constructor, results:list):
+    def add_sprint_entrant(self, driver:Driver, constructor:Constructor, results:list, projection:set[str]=None):
         """
         Add driver and team to list of sprint entrants
         Parameters:
             driver: Driver; Entrant driver
             constructor: Constructor; Entrant constructor
             result: list[str]; Entrant result from race, from result csv
+            (Optional) projection: set[str]; Names of result fields to keep. Default = None = All fields
         Outputs:
             Adds team as key and driver as value to self.entrants
         """
@@ -316,7 +477,8 @@ class Race(MyDataClass):
         assert int(results[3]) == constructor.constructorId, "Incorrect constructor id!"
         results_dict["constructor"] = constructor
         for i in range(4, len(SPRINT_RESULT_DATA_FIELDS)):
-            results_dict[SPRINT_RESULT_DATA_FIELDS[i]] = results[i]
+            if projection == None or SPRINT_RESULT_DATA_FIELDS[i] in projection:
+                results_dict[SPRINT_RESULT_DATA_FIELDS[i]] = results[i]
         # self.sprint_entrants[driver_team_tuple] = results_dict
         if not self.sprint_event:
             self.sprint_event = True
@@ -332,13 +494,50 @@ class Race(MyDataClass):
             breakpoint()
             raise e
 
+    def add_qualifying_entrant(self, driver:Driver, constructor:Constructor, results:list, projection:set[str]=None):
+        """
+        Add driver and team to qualifying classification
+        Parameters:
+            driver: Driver; Entrant driver
+            constructor: Constructor; Entrant constructor
+            results: list[str]; Entrant result from qualifying, from qualifying csv
+            (Optional) projection: set[str]; Names of result fields to keep. Default = None = All fields
+        Outputs:
+            Adds result of entrant to self.qualifying
+        """
+        driver_team_tuple = (driver, constructor)
+        results_dict = {}
+        assert isinstance(driver, Driver), "Driver must be instance of class Driver!"
+        assert isinstance(constructor, Constructor), "Constructor must be instance of class Constructor!"
+        assert len(results) == len(QUALIFYING_DATA_FIELDS), f"Incorrect number of data fields! (Got {len(results)}, expected {len(QUALIFYING_DATA_FIELDS)})"
+        assert int(results[1]) == self.raceId, "Incorrect race result!"
+        assert int(results[2]) == driver.driverId, "Incorrect driver id!"
+        assert int(results[3]) == constructor.constructorId, "Incorrect constructor id!"
+        results_dict["constructor"] = constructor
+        for i in range(4, len(QUALIFYING_DATA_FIELDS)):
+            if projection == None or QUALIFYING_DATA_FIELDS[i] in projection:
+                results_dict[QUALIFYING_DATA_FIELDS[i]] = results[i]
+        self.qualifying.add_result(driver_team_tuple, results_dict)
+
+    def has_qualifying(self) -> bool:
+        """
+        Check if qualifying results are available for this race
+        """
+        return self.qualifying != None and len(self.qualifying) > 0
+
+    def retired(self, driver) -> bool:
+        """
+        Check if a driver retired from this race
+        """
+        return bool(self.dnf_mask >> driver.driverId & 1)
+
     def reverse_entrants(self, driver=None, constructor=None):
         if driver and constructor and isinstance(driver, Driver) and isinstance(constructor, Constructor):
-            return [x for x in self.get_entrants() if x == (driver, constructor)]
+            return [x for x in self.finish.get_driver_entrants(driver) if x[1] == constructor]
         elif driver and isinstance(driver, Driver):
-            return [x for x in self.get_entrants() if x[0] == driver]
+            return self.finish.get_driver_entrants(driver)
         elif constructor and isinstance(constructor, Constructor):
-            return [x for x in self.get_entrants() if x[1] == constructor]
+            return self.finish.get_constructor_entrants(constructor)
         else:
             return self.get_entrants()
 
@@ -396,11 +595,7 @@ class Race(MyDataClass):
         Returns:
             pos: int; finishing position of driver
         """
-        for i in self.finish.sorted_order():
-            finisher = self.finish[i]
-            if any([driver == ent[0] for ent in finisher.entrants]):
-                return i
-        return None
+        return self.finish.get_driver_position(driver)
         for i in range(len(self.get_finish())):
             finisher = self.get_finish()[i]
             if driver in finisher:
@@ -438,10 +633,7 @@ class Race(MyDataClass):
             pos: int; finishing position of driver in sprint
         """
         assert self.sprint_event, "Event must be sprint race!"
-        for i in range(len(self.get_sprint_finish())):
-            finisher = self.get_sprint_finish()[i]
-            if driver in finisher:
-                return i + 1
+        return self.sprint.get_driver_position(driver)
 
     def get_fastest_lap(self) -> list[Driver]:
         """
@@ -483,7 +675,24 @@ class Race(MyDataClass):
         return self.get_sprint_finish()[0:3]
 
     def get_pole(self):
+        """
+        Get the entrant who took pole position. Qualifying results are used when available,
+        as grid position 1 differs from pole when grid penalties were applied.
+        Falls back to the grid when qualifying has no pole sitter.
+        """
+        if self.has_qualifying():
+            pole = self.qualifying.get_pole()
+            if pole != None:
+                return pole
         return self.get_grid()[0]
+
+    def get_gap_to_pole(self, driver) -> int:
+        """
+        Get the qualifying gap of a driver to pole position in milliseconds, None if not available
+        """
+        if not self.has_qualifying():
+            return None
+        return self.qualifying.get_gap_to_pole(driver)
     
     def get_sprint_pole(self):
         assert self.sprint_event, "Must be sprint event to get sprint winner!"
@@ -545,8 +754,42 @@ class Race(MyDataClass):
         self.points_per_driver = driver_points
         return driver_points
     
-    def calculate_constructor_points(self, pointssystem, fastest_lap:int) -> dict:
+    def calculate_constructor_points(self, pointssystem, fastest_lap_tuple, sprint_pointssystem=None, best_car_only:bool=False) -> dict:
         """
         Calculate and distribute points to constructors according to given points system
+        Parameters:
+            pointssystem: list[int]; How to award points for each finishing position.
+            fastest_lap_tuple: tuple[int, int]; Fastest lap points and eligible positions, (0, 0) for no fastest lap points.
+            (Optional) sprint_pointssystem: list[int]; How to award points for each finish position in sprint. Default = None = No sprint points
+            (Optional) best_car_only: bool; Only the best placed car of each constructor scores. Default = False
+        Outputs:
+            constructor_points: dict[Constructor, float]; points scored by each constructor
+        """
+        constructor_points = self.finish.constructor_pos_points(pointssystem, best_car_only=best_car_only)
+        if fastest_lap_tuple[0]:
+            fastest_entrants = self.finish.get_fastest_lap()[0]
+            for entrant in fastest_entrants:
+                if fastest_lap_tuple[1] == 0 or 0 <= self.finish.get_entrant(entrant) <= fastest_lap_tuple[1]:
+                    constructor_points[entrant[1]] += fastest_lap_tuple[0]/len(fastest_entrants)
+        if self.sprint_event and sprint_pointssystem:
+            sprint_points = self.sprint.constructor_pos_points(sprint_pointssystem)
+            for constructor in sprint_points.keys():
+                constructor_points[constructor] = constructor_points.get(constructor, 0) + sprint_points[constructor]
+        return constructor_points
+
+    def official_driver_points(self) -> dict:
+        """
+        Distribute points to drivers as recorded in the results csv, instead of calculating them
+        Parameters:
+            None
+        Outputs:
+            driver_points: dict[Driver, float]; points scored by each driver in race and sprint
         """
-        return {}
+        driver_points = {}
+        orders = [self.finish, self.sprint] if self.sprint_event else [self.finish]
+        for order in orders:
+            for result in order.values():
+                for entrant, data in zip(result.entrants, result.data):
+                    driver_points[entrant[0]] = driver_points.get(entrant[0], 0) + float(data.get("points") or 0)
+        self._saved_points = driver_points
+        return driver_points
@@ -0,0 +1,176 @@
+import os
+import pickle
+from array import array
+from bisect import bisect_left
+
+ELO_K_FACTOR = 32 # Maximum rating change per race
+ELO_INITIAL_RATING = 1500
+ELO_SCALE = 400 # Rating difference for 10 to 1 expected odds
+RATINGS_CACHE_FILE = "ratings.pkl"
+
+def race_classification(race) -> list[tuple[int, int]]:
+    """
+    Get the classification of a race per driver, drivers of shared cars counted at their best position
+    Parameters:
+        race: Race; race to read
+    Outputs:
+        classification: list[tuple[int, int]]; list of (driverId, position) in finishing order
+    """
+    classification = []
+    seen = set()
+    for pos in sorted(x for x in race.finish.keys() if isinstance(x, int)):
+        for driver, _ in race.finish[pos].entrants:
+            if driver.driverId not in seen:
+                seen.add(driver.driverId)
+                classification.append((driver.driverId, pos))
+    return classification
+
+def race_key(race) -> tuple[int, int]:
+    """
+    Fingerprint of a race classification, changes whenever results of race change
+    """
+    return (race.raceId, hash(tuple(race_classification(race))))
+
+def chronological(races:list) -> list:
+    """
+    Sort races in chronological order
+    """
+    return sorted(races, key=lambda x: (x.year, x.round))
+
+
+class RatingEngine():
+    """
+    Elo rating of every driver over time, from pairwise comparisons of finishing positions.
+    Races are processed chronologically in one pass. Rating trajectories are stored as typed arrays,
+    so that an update only recomputes the races from the first changed race onward.
+    """
+
+    def __init__(self, k:float=ELO_K_FACTOR, initial:float=ELO_INITIAL_RATING):
+        """
+        Initialize empty engine
+        Parameters:
+            (Optional) k: float; maximum rating change per race. Default = ELO_K_FACTOR
+            (Optional) initial: float; rating of a driver before their first race. Default = ELO_INITIAL_RATING
+        """
+        self.k = k
+        self.initial = initial
+        self.race_keys = [] # (raceId, fingerprint) of each processed race, in chronological order
+        self.history = {} # driverId: (array of race indexes, array of ratings after each race)
+        self.current = {} # driverId: current rating
+
+    def update(self, races:list) -> int:
+        """
+        Bring ratings up to date with given races, recomputing only from the first race that differs from processed races
+        Parameters:
+            races: list[Race]; every race to rate, in any order
+        Outputs:
+            start: int | None; chronological index of first recomputed race, None if ratings were already up to date
+        """
+        races = chronological(races)
+        keys = [race_key(race) for race in races]
+        start = 0
+        while start < min(len(keys), len(self.race_keys)) and keys[start] == self.race_keys[start]:
+            start += 1
+        if start == len(keys) == len(self.race_keys):
+            return None
+        self.rewind(start)
+        for i in range(start, len(races)):
+            self.process_race(i, race_classification(races[i]))
+        self.race_keys = keys
+        return start
+
+    def rewind(self, start:int) -> None:
+        """
+        Discard ratings of every race from given race index onward
+        """
+        for driver_id in list(self.history.keys()):
+            race_indexes, ratings = self.history[driver_id]
+            cut = bisect_left(race_indexes, start)
+            if cut == 0:
+                del self.history[driver_id]
+                del self.current[driver_id]
+            else:
+                del race_indexes[cut:]
+                del ratings[cut:]
+                self.current[driver_id] = ratings[-1]
+        del self.race_keys[start:]
+
+    def process_race(self, race_index:int, classification:list[tuple[int, int]]) -> None:
+        """
+        Update ratings of every driver of a race. Each driver is compared with every other driver,
+        scoring 1 for finishing ahead and 0.5 for sharing a position.
+        Parameters:
+            race_index: int; chronological index of race
+            classification: list[tuple[int, int]]; list of (driverId, position) in finishing order
+        """
+        n = len(classification)
+        if n < 2:
+            return
+        ratings = [self.current.get(driver_id, self.initial) for driver_id, _ in classification]
+        strengths = [10**(rating/ELO_SCALE) for rating in ratings]
+        positions = [pos for _, pos in classification]
+        for i in range(n):
+            expected = sum(strengths[i]/(strengths[i] + strengths[j]) for j in range(n)) - 0.5
+            ahead = n - bisect_left(positions, positions[i]+1)
+            shared = n - ahead - bisect_left(positions, positions[i]) - 1
+            new_rating = ratings[i] + self.k/(n-1)*(ahead + shared/2 - expected)
+            driver_id = classification[i][0]
+            if driver_id not in self.history.keys():
+                self.history[driver_id] = (array("i"), array("d"))
+            self.history[driver_id][0].append(race_index)
+            self.history[driver_id][1].append(new_rating)
+            self.current[driver_id] = new_rating
+
+    def get_rating(self, driverId:int) -> float:
+        """
+        Get the current rating of a driver, initial rating if driver has no rated races
+        """
+        return self.current.get(driverId, self.initial)
+
+    def get_peak_rating(self, driverId:int) -> float:
+        """
+        Get the highest rating a driver ever reached, None if driver has no rated races
+        """
+        if driverId not in self.history.keys():
+            return None
+        return max(self.history[driverId][1])
+
+    def get_trajectory(self, driverId:int) -> tuple[array, array]:
+        """
+        Get the rating trajectory of a driver
+        Parameters:
+            driverId: int; id of driver
+        Outputs:
+            t: tuple[array, array]; chronological indexes of races entered, rating after each race
+        """
+        return self.history.get(driverId, (array("i"), array("d")))
+
+    def save(self, path:str) -> None:
+        """
+        Save processed ratings to a pickle file
+        """
+        with open(path, "wb") as cache_file:
+            pickle.dump({"params": (self.k, self.initial), "race_keys": self.race_keys, "history": self.history}, cache_file)
+
+    @classmethod
+    def load(cls, path:str, k:float=ELO_K_FACTOR, initial:float=ELO_INITIAL_RATING):
+        """
+        Load ratings from a pickle file, an empty engine is returned if file is missing, unreadable or was computed with other parameters
+        """
+        if not os.path.isfile(path):
+            return cls(k=k, initial=initial)
+        try:
+            with open(path, "rb") as cache_file:
+                cached = pickle.load(cache_file)
+            if cached.get("params") != (k, initial):
+                return cls(k=k, initial=initial)
+            race_keys = cached["race_keys"]
+            history = cached["history"]
+            current = {driver_id: ratings[-1] for driver_id, (_, ratings) in history.items()}
+        except Exception: # Corrupt or outdated cache, ratings are recomputed
+            return cls(k=k, initial=initial)
+        engine = cls(k=k, initial=initial)
+        engine.race_keys = race_keys
+        engine.history = history
+        engine.current = current
+        return engine
@@ -1,23 +1,57 @@
 from globals import *
-from mydataclass import find_single_object_by_field_value, MyDataClass
+from mydataclass import find_single_object_by_field_value, index_objects_by_field, MyDataClass
 from driver import Driver
 from circuit import Circuit
 from constructor import Constructor
 from season import Season
 from race import Race
 from hardcodes import amend_missing_race_data, fix_demonym
+from laps import LapStore, PitStopStore
+from geo import CircuitIndex
+from ages import AgeRecords
+from rating import RatingEngine, RATINGS_CACHE_FILE
+from status import StatusTable
 import shutil
 import csv
+from collections import namedtuple
+
+CORE_FIELDS = { # Fields of any table that are always read, as loading and scoring depend on them
+    "driverId", "forename", "surname", "nationality",
+    "constructorId", "name",
+    "circuitId", "country",
+    "raceId", "year", "round", "date",
+    "grid", "position", "positionOrder", "points", "statusId", "fastestLapTime", "q1", "q2", "q3"
+}
+
+DERIVED_FIELDS = { # Derived data: fields that need it, derived data is skipped when none of them are projected
+    "lap_times": {"laps_led"},
+    "pit_stops": {"pit_stop_count"},
+    "ratings": {"rating", "peak_rating"},
+    "spatial_index": {"lat", "lng"}
+}
+
+StandingsDiff = namedtuple("StandingsDiff", ["year", "field", "entity", "computed", "official"])
+STANDINGS_TOLERANCE = 1e-6 # Largest points difference regarded as equal
 
 class ArchiveReader():
     """
     Class for reading and storing data from archive.
     """
 
-    def __init__(self, archive_path:str=None, skip=True):
+    def __init__(self, archive_path:str=None, skip=True, projection:set[str]=None, trusted_standings:bool=False):
         """
         Run main commands
+        Parameters:
+            (Optional) archive_path: str; path to archive file. Default = None
+            (Optional) skip: bool; skip extracting archive and read already extracted db. Default = True
+            (Optional) projection: set[str]; names of fields to read in addition to CORE_FIELDS, see question.required_fields().
+                Other fields are neither parsed nor stored. Derived data is only built for the fields it fills, see DERIVED_FIELDS.
+                Default = None = All fields
+            (Optional) trusted_standings: bool; load points and standings from driver_standings.csv and constructor_standings.csv
+                instead of recomputing them, see verify_standings(). Default = False
         """
+        self.trusted_standings = trusted_standings
+        self.projection = None if projection == None else set(projection) | CORE_FIELDS
         if not skip:
             try:
                 self.db_path = TEMP_DIRPATH
@@ -35,10 +69,27 @@ class ArchiveReader():
         self.circuits = self.open_circuits()
         self.races = self.open_races()
         self.seasons = self.open_seasons()
+        self.index_objects()
+        self.status_table = self.open_status()
         self.read_driver_results()
+        self.read_qualifying_results()
         self.process_races()
         amend_missing_race_data(self)
+        self.spatial_index = CircuitIndex(self.circuits) if self.needs("spatial_index") else None
+        for driver in self.drivers:
+            driver.spatial_index = self.spatial_index
         self.process_seasons()
+        self.process_constructors()
+        self.laps = self.open_lap_times() if self.needs("lap_times") else None
+        self.pit_stops = self.open_pit_stops() if self.needs("pit_stops") else None
+        self.process_laps()
+        self.ratings = self.open_ratings() if self.needs("ratings") else None
+
+    def needs(self, derived:str) -> bool:
+        """
+        Check if derived data must be built for the projection of this archive, see DERIVED_FIELDS
+        """
+        return self.projection == None or len(DERIVED_FIELDS[derived] & self.projection) > 0
 
     def init_db(self, archive_path:str=None, target_path:str=None) -> str:
         """
@@ -90,7 +141,7 @@ class ArchiveReader():
                     pass
                 else:
                     new_driver = Driver()
-                    new_driver.read_data(row)
+                    new_driver.read_data(row, projection=self.projection)
                     drivers.append(new_driver)
                 line_count += 1
         return drivers
@@ -113,7 +164,7 @@ class ArchiveReader():
                     pass
                 else:
                     new_season = Season()
-                    new_season.read_data(row)
+                    new_season.read_data(row, projection=self.projection)
                     seasons.append(new_season)
                 line_count += 1
         return seasons
@@ -136,7 +187,7 @@ class ArchiveReader():
                     pass
                 else:
                     new_constructor = Constructor()
-                    new_constructor.read_data(row)
+                    new_constructor.read_data(row, projection=self.projection)
                     constructors.append(new_constructor)
                 line_count += 1
         return constructors
@@ -159,7 +210,7 @@ class ArchiveReader():
                     pass
                 else:
                     new_circuit = Circuit()
-                    new_circuit.read_data(row)
+                    new_circuit.read_data(row, projection=self.projection)
                     circuits.append(new_circuit)
                 line_count += 1
         return circuits
@@ -182,11 +233,66 @@ class ArchiveReader():
                     pass
                 else:
                     new_race = Race()
-                    new_race.read_data(row)
+                    new_race.read_data(row, projection=self.projection)
                     races.append(new_race)
                 line_count += 1
         return races
 
+    def index_objects(self) -> None:
+        """
+        Index drivers, constructors, circuits, races and seasons by their primary key, and races by (year, round)
+        """
+        self.driver_index = index_objects_by_field(self.drivers, "driverId")
+        self.constructor_index = index_objects_by_field(self.constructors, "constructorId")
+        self.circuit_index = index_objects_by_field(self.circuits, "circuitId")
+        self.race_index = index_objects_by_field(self.races, "raceId")
+        self.round_index = {(race.year, race.round): race for race in self.races}
+        self.season_index = index_objects_by_field(self.seasons, "year")
+
+    def open_status(self) -> StatusTable:
+        """
+        Extract result statuses from status csv into a code table
+        Parameters:
+            None
+        Outputs:
+            status_table: StatusTable; category of each status, empty if archive has no statuses
+        """
+        status_table = StatusTable()
+        status_csv = os.path.join(self.db_path, "status.csv")
+        if os.path.isfile(status_csv):
+            status_table.read_csv(status_csv)
+        return status_table
+
+    def open_lap_times(self) -> LapStore:
+        """
+        Stream lap times csv into a columnar store
+        Parameters:
+            None
+        Outputs:
+            laps: LapStore; store of all lap times, None if archive has no lap times
+        """
+        lap_times_csv = os.path.join(self.db_path, "lap_times.csv")
+        if not os.path.isfile(lap_times_csv):
+            return None
+        laps = LapStore()
+        laps.read_csv(lap_times_csv)
+        return laps
+
+    def open_pit_stops(self) -> PitStopStore:
+        """
+        Stream pit stops csv into a columnar store
+        Parameters:
+            None
+        Outputs:
+            pit_stops: PitStopStore; store of all pit stops, None if archive has no pit stops
+        """
+        pit_stops_csv = os.path.join(self.db_path, "pit_stops.csv")
+        if not os.path.isfile(pit_stops_csv):
+            return None
+        pit_stops = PitStopStore()
+        pit_stops.read_csv(pit_stops_csv)
+        return pit_stops
+
     def read_driver_results(self) -> None:
         """
         Extract all race results from results csv and add them to each driver.
@@ -205,15 +311,15 @@ class ArchiveReader():
                 if line_count == 0:
                     pass
                 else:
-                    race = find_single_object_by_field_value(self.races, "raceId", int(row[1]))
+                    race = self.race_index[int(row[1])]
                     year = race.year
-                    driver = find_single_object_by_field_value(self.drivers, "driverId", int(row[2]))
-                    constructor = find_single_object_by_field_value(self.constructors, "constructorId", int(row[3]))
-                    race.add_race_entrant(driver, constructor, row)
-                    if constructor not in driver.teams:
-                        driver.teams.append(constructor)
-                    if driver not in constructor.drivers:
-                        constructor.drivers.append(driver)
+                    driver = self.driver_index[int(row[2])]
+                    constructor = self.constructor_index[int(row[3])]
+                    record = race.add_race_entrant(driver, constructor, row, projection=self.projection, status_table=self.status_table)
+                    driver.add_race_to_data(record)
+                    constructor.add_race_to_data(record)
+                    driver.add_team(constructor)
+                    constructor.add_driver(driver)
                     # driver.entries += 1
                     # driver.add_to_season_data(year, "entries", 1)
                     # if row[5] == '1':
@@ -229,6 +335,11 @@ class ArchiveReader():
                     # driver.add_to_season_data(year, "points", float(row[9]))
                 line_count += 1
 
+        for driver in self.drivers:
+            driver.sort_results()
+        for constructor in self.constructors:
+            constructor.sort_results()
+
         # Read sprint results
         sprint_results_csv = os.path.join(self.db_path, "sprint_results.csv")
         with open(sprint_results_csv, encoding='utf-8') as csv_file:
@@ -238,11 +349,11 @@ class ArchiveReader():
                 if line_count == 0:
                     pass
                 else:
-                    race = find_single_object_by_field_value(self.races, "raceId", int(row[1]))
+                    race = self.race_index[int(row[1])]
                     year = race.year
-                    driver = find_single_object_by_field_value(self.drivers, "driverId", int(row[2]))
-                    constructor = find_single_object_by_field_value(self.constructors, "constructorId", int(row[3]))
-                    race.add_sprint_entrant(driver, constructor, row)
+                    driver = self.driver_index[int(row[2])]
+                    constructor = self.constructor_index[int(row[3])]
+                    race.add_sprint_entrant(driver, constructor, row, projection=self.projection)
                     # if row[6] == '1':
                     #     driver.sprint_wins += 1
                     #     driver.add_to_season_data(year, "sprint_wins", 1)
@@ -263,24 +374,182 @@ class ArchiveReader():
         # for year in champions_dict:
         #     champions_dict[year].championships += 1
 
+    def read_qualifying_results(self) -> None:
+        """
+        Extract all qualifying results from qualifying csv and add them to each race.
+        Parameters:
+            None
+        Outputs:
+            Adds qualifying classification to each race, nothing if archive has no qualifying results
+        """
+        qualifying_csv = os.path.join(self.db_path, "qualifying.csv")
+        if not os.path.isfile(qualifying_csv):
+            return
+        with open(qualifying_csv, encoding='utf-8') as csv_file:
+            csv_reader = csv.reader(csv_file, delimiter=',')
+            line_count = 0
+            for row in csv_reader:
+                if line_count == 0:
+                    pass
+                else:
+                    race = self.race_index[int(row[1])]
+                    driver = self.driver_index[int(row[2])]
+                    constructor = self.constructor_index[int(row[3])]
+                    race.add_qualifying_entrant(driver, constructor, row, projection=self.projection)
+                line_count += 1
+
     def process_races(self) -> None:
         """
         Reads self.races and adds appropriate data to different objects
         """
         for race in self.races:
             year = race.year
-            circuit = find_single_object_by_field_value(self.circuits, "circuitId", race.circuitId)
+            circuit = self.circuit_index[race.circuitId]
             race.add_circuit(circuit)
-            season:Season = find_single_object_by_field_value(self.seasons, "year", year)
+            season:Season = self.season_index[year]
             season.add_race(race)
     
     def process_seasons(self) -> None:
         """
         Reads self.seasons and adds appropriate data to different fields
         """
+        if self.trusted_standings:
+            driver_standings, constructor_standings = self.open_official_standings()
         for season in self.seasons:
             season.set_teammates()
-            season.award_points()
+            if self.trusted_standings:
+                season.load_official_standings(self.season_rounds(season, driver_standings), self.season_rounds(season, constructor_standings))
+            else:
+                season.award_points()
+
+    def open_standings(self, csv_name:str, object_index:dict) -> dict:
+        """
+        Extract official standings after each race from a standings csv
+        Parameters:
+            csv_name: str; name of standings csv in db directory
+            object_index: dict; index of standings entities by primary key, e.g. self.driver_index
+        Outputs:
+            standings: dict[int, dict]; {raceId: {entity: (points, position)}}, empty if csv is missing
+        """
+        standings_csv = os.path.join(self.db_path, csv_name)
+        standings = {}
+        if not os.path.isfile(standings_csv):
+            return standings
+        with open(standings_csv, encoding='utf-8') as csv_file:
+            csv_reader = csv.reader(csv_file, delimiter=',')
+            next(csv_reader, None)
+            for row in csv_reader:
+                race_id, entity_id = int(row[1]), int(row[2])
+                if race_id not in self.race_index.keys() or entity_id not in object_index.keys():
+                    continue
+                standings.setdefault(race_id, {})[object_index[entity_id]] = (float(row[3]), int(row[4]))
+        return standings
+
+    def open_official_standings(self) -> tuple[dict, dict]:
+        """
+        Extract official drivers' and constructors' standings, see open_standings()
+        """
+        if not hasattr(self, "_official_standings"):
+            self._official_standings = (self.open_standings("driver_standings.csv", self.driver_index),
+                                        self.open_standings("constructor_standings.csv", self.constructor_index))
+        return self._official_standings
+
+    def season_rounds(self, season:Season, standings:dict) -> dict:
+        """
+        Select the standings of a season from standings per race
+        Parameters:
+            season: Season; season to select
+            standings: dict[int, dict]; {raceId: {entity: (points, position)}}
+        Outputs:
+            rounds: dict[int, dict]; {round: {entity: (points, position)}} of rounds with official standings
+        """
+        return {race.round: standings[race.raceId] for race in season.races if race != None and race.raceId in standings.keys()}
+
+    def verify_standings(self) -> list[StandingsDiff]:
+        """
+        Compare computed championship points and champions of every season against the official final standings
+        Parameters:
+            None
+        Outputs:
+            diffs: list[StandingsDiff]; every mismatch, field is one of "driver_points", "constructor_points", "champion"
+                or "constructor_champion". Entities missing from either side have None points.
+        """
+        driver_standings, constructor_standings = self.open_official_standings()
+        diffs = []
+        for season in sorted(self.seasons, key=lambda x: x.year):
+            driver_rounds = self.season_rounds(season, driver_standings)
+            constructor_rounds = self.season_rounds(season, constructor_standings)
+            official_drivers = driver_rounds[max(driver_rounds.keys())] if driver_rounds else {}
+            official_constructors = constructor_rounds[max(constructor_rounds.keys())] if constructor_rounds else {}
+            computed_drivers = season.driver_championship_standings
+            computed_constructors = dict(season.constructor_full_standings())
+            for field, computed, official in [("driver_points", computed_drivers, official_drivers),
+                                              ("constructor_points", computed_constructors, official_constructors)]:
+                if not official:
+                    continue
+                for entity in set(computed.keys()) | set(official.keys()):
+                    computed_points = computed.get(entity)
+                    official_points = official[entity][0] if entity in official.keys() else None
+                    if computed_points == None and official_points == 0:
+                        continue
+                    if computed_points == None or official_points == None or abs(computed_points - official_points) > STANDINGS_TOLERANCE:
+                        diffs.append(StandingsDiff(season.year, field, entity, computed_points, official_points))
+            for field, champion, official in [("champion", season.champion, official_drivers),
+                                              ("constructor_champion", season.constructor_champion, official_constructors)]:
+                official_champion = next((entity for entity, (_, pos) in official.items() if pos == 1), None)
+                if official and champion != official_champion:
+                    diffs.append(StandingsDiff(season.year, field, None, champion, official_champion))
+        return diffs
+
+    def process_constructors(self) -> None:
+        """
+        Precompute career data of each constructor and index drivers by constructor name
+        """
+        self.constructor_name_index = {} # constructor name: set of drivers
+        for constructor in self.constructors:
+            constructor.get_career_data()
+            self.constructor_name_index.setdefault(constructor.name, set()).update(constructor.driver_set)
+
+    def get_age_records(self) -> AgeRecords:
+        """
+        Get the archive wide age records, computed on first use
+        """
+        if not hasattr(self, "_age_records"):
+            self._age_records = AgeRecords(self.drivers)
+        return self._age_records
+
+    def get_team_drivers(self, name:str) -> set:
+        """
+        Get every driver who has driven for a constructor with given name
+        """
+        return self.constructor_name_index.get(name, set())
+
+    def process_laps(self) -> None:
+        """
+        Adds lap and pit stop aggregates to each driver
+        """
+        for driver in self.drivers:
+            if self.laps != None:
+                driver.laps_led = self.laps.get_laps_led(driver.driverId)
+            if self.pit_stops != None:
+                driver.pit_stop_count = self.pit_stops.get_pit_stop_count(driver.driverId)
+
+    def open_ratings(self) -> RatingEngine:
+        """
+        Load driver ratings from cache in db directory, rating only races that are new or changed since it was saved
+        Parameters:
+            None
+        Outputs:
+            ratings: RatingEngine; ratings of every driver, peak and current rating are also added to each driver
+        """
+        cache_path = os.path.join(self.db_path, RATINGS_CACHE_FILE)
+        ratings = RatingEngine.load(cache_path)
+        if ratings.update(self.races) != None:
+            ratings.save(cache_path)
+        for driver in self.drivers:
+            driver.rating = ratings.get_rating(driver.driverId)
+            driver.peak_rating = ratings.get_peak_rating(driver.driverId)
+        return ratings
 
     def get_category(self, listname:str, categoryname:str) -> list:
         """
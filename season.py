@@ -3,6 +3,8 @@ from driver import Driver
 from constructor import Constructor
 from race import Race
 from globals import sumWithNone
+from progression import ChampionshipProgression
+from dropscores import DroppedScores
 
 SEASON_DATA_FIELDS = ["year","url"]
 
@@ -41,6 +43,11 @@ BEST_OF_N_CHAMPION = [
 FASTEST_LAP_POINTS = 1
 RECURSION_LIMIT = 50
 
+CONSTRUCTORS_CHAMPIONSHIP_START = 1958 # First season of the constructors' championship
+BEST_CAR_ONLY_UNTIL = 1978 # Last season where only the best placed car of each constructor scored
+CONSTRUCTOR_DROPPED_SCORES_UNTIL = 1978 # Last season where constructors counted only their best results, by the drivers' rules of the season
+CONSTRUCTOR_EXCLUDED_RACES = ["Indianapolis 500"] # Races not counted towards the constructors' championship
+
 class Season(MyDataClass):
 
     def __init__(self):
@@ -54,6 +61,8 @@ class Season(MyDataClass):
         self.driver_championship_standings = {}
         self.constuctor_standings = {}
         self.champion = None
+        self.constructor_champion = None
+        self.dropped_scores = {}
     
     def __str__(self):
         """
@@ -61,11 +70,11 @@ class Season(MyDataClass):
         """
         return f"{str(self.year)} Formula One World Championship"
 
-    def read_data(self, data:list[str]):
+    def read_data(self, data:list[str], projection:set[str]=None):
         """
         Adds data from CSV to this season data
         """
-        self.read_csv_data(data)
+        self.read_csv_data(data, projection=projection)
         if isinstance(self.year, str) and self.year.isnumeric():
             self.year = int(self.year)
         assert isinstance(self.year, int), "Year must be integer!"
@@ -106,6 +115,12 @@ class Season(MyDataClass):
                 points_per_race.append(None)
         return points_per_race
 
+    def get_constructor_points(self, constructor:Constructor) -> list[int]:
+        """
+        Return the points scored from each race for a constructor
+        """
+        return [None if constructor not in race._saved_constructor_points.keys() else race._saved_constructor_points[constructor] for race in self.races]
+
     def get_all_driver_points(self):
         """
         Get the finishing position of each driver for every race
@@ -125,7 +140,7 @@ class Season(MyDataClass):
 
         """
         teammates = []
-        entries = [x for x in self.races if driver in [ent[0] for ent in x.finish.get_order()]]
+        entries = driver.race_entries.get(self.year, [])
         sprint_entries = [x for x in entries if (x.sprint_event and driver in [ent[0] for ent in x.sprint.get_order()])]
         wins = [i for i in range(len(entries)) if driver == entries[i].get_winner()[0]]
         podiums = [i for i in range(len(entries)) if driver in [ent[0] for ent in entries[i].get_podium()]]
@@ -167,6 +182,26 @@ class Season(MyDataClass):
             "n_sprint_poles": len(sprint_poles)
         }
 
+    def get_constructor_stats(self, constructor:Constructor) -> dict:
+        """
+        Get the constructors' championship stats of a constructor for a season
+        Parameters:
+            constructor: Constructor; constructor to get stats of
+        Outputs:
+            constructorstats: dict; dictionary with the following key-value pairs:
+                champion: bool
+                points: list[float | None]
+                n_points: float
+                position: int | None
+        """
+        standings = [x[0] for x in self.constructor_full_standings()]
+        return {
+            "champion": self.constructor_champion == constructor,
+            "points": self.get_constructor_points(constructor),
+            "n_points": sumWithNone(self.get_constructor_points(constructor)),
+            "position": standings.index(constructor) + 1 if constructor in standings else None
+        }
+
     def select_race_points_system(self, drivers_champ:bool=True) -> list[int]: 
         """
         Return which points system to use for each year
@@ -210,11 +245,11 @@ class Season(MyDataClass):
         elif year >= 2022:
             return SPRINT_POINTS_SYSTEMS[2]
 
-    def select_fastest_lap_points(self) -> tuple[int, int]:
+    def select_fastest_lap_points(self, drivers_champ:bool=True) -> tuple[int, int]:
         """
         Return how many points to score for fastest lap and eligibility
         Parameters:
-            None
+            (Optional) drivers_champ: bool; True for drivers' championship, False for constructors'. Default = True
         Outputs:
             t: tuple[int, int]; tuple of points and position eligibility for fastest lap, 0 means any position
         """
@@ -222,11 +257,21 @@ class Season(MyDataClass):
         assert year >= 1950, "Invalid year"
         if year >= 2019:
             return (1, 10)
-        elif 1950 <= year <= 1959:
+        elif 1950 <= year <= 1959 and drivers_champ: # Fastest lap was not counted for constructors in 1958-1959
             return (1, 0)
         else:
             return (0, 0)
 
+    def select_constructor_scoring(self) -> bool:
+        """
+        Return whether only the best placed car of each constructor scores points
+        Parameters:
+            None
+        Outputs:
+            best_car_only: bool; True if only best placed car scores, False if every car scores
+        """
+        return int(self.year) <= BEST_CAR_ONLY_UNTIL
+
     def select_champion_method(self):
         """
         Select which method to use to determine champion
@@ -268,6 +313,18 @@ class Season(MyDataClass):
         else:
             raise AssertionError("WTF??")       
 
+    def select_constructor_champion_method(self):
+        """
+        Select which method to use to determine constructors' champion
+        Parameters:
+            None
+        Outputs:
+            best_of_n: Any; championship determining parameter, see BEST_OF_N_CHAMPION
+        """
+        if int(self.year) <= CONSTRUCTOR_DROPPED_SCORES_UNTIL:
+            return self.select_champion_method()
+        return BEST_OF_N_CHAMPION[13]
+
     def update_standings(self) -> list[Driver]:
         """
         Resolve a tie between two drivers with the same number of points
@@ -333,39 +390,99 @@ class Season(MyDataClass):
         """
         return [(entrant, sum(filter(None, self.get_points(entrant)))) for entrant in self.update_standings()]
 
+    def constructor_full_standings(self) -> list[tuple[Constructor, float]]:
+        """
+        Get the constructors' championship standings, ties are broken by total points and countback of finishing positions
+        Parameters:
+            None
+        Outputs:
+            standings: list[tuple[Constructor, float]]; list of (constructor, points counted towards championship), from first to last
+        """
+        if hasattr(self, "_constructor_full_standings") and self._constructor_full_standings != None:
+            return self._constructor_full_standings
+
+        def countback(constructor:Constructor) -> tuple[int]:
+            positions = [race.finish.get_entrant(entrant) for race in self.races for entrant in race.reverse_entrants(constructor=constructor)]
+            positions = [x for x in positions if isinstance(x, int)]
+            return tuple(positions.count(pos) for pos in range(1, max(positions, default=0) + 1))
+
+        points_matrix = {constructor: self.get_constructor_points(constructor) for constructor in self.constuctor_standings.keys()}
+        dropped_scores = DroppedScores(points_matrix, self.select_constructor_champion_method())
+        counted, totals = dropped_scores.counted, dropped_scores.totals
+        ordered = sorted(counted.keys(), key=lambda c: (counted[c], totals[c], countback(c)), reverse=True)
+        self._constructor_full_standings = [(constructor, counted[constructor]) for constructor in ordered]
+        return self._constructor_full_standings
+
+    def determine_constructor_champion(self) -> None:
+        """
+        Determine the constructors' champion of this season
+        Parameters:
+            None
+        Outputs:
+            None
+            constructor determined to be champion is set to self.constructor_champion, None if no championship was held
+        """
+        self._constructor_full_standings = None
+        standings = self.constructor_full_standings()
+        if int(self.year) >= CONSTRUCTORS_CHAMPIONSHIP_START and len(standings) > 0:
+            self.constructor_champion = standings[0][0]
+        else:
+            self.constructor_champion = None
+
+    def countback(self, driver:Driver) -> tuple[int]:
+        """
+        Countback key of a driver, i.e. number of wins, second places, third places etc.
+        """
+        positions = [x for x in self.get_results(driver) if isinstance(x, int)]
+        return tuple(positions.count(pos) for pos in range(1, max(positions, default=0) + 1))
+
     def determine_driver_champion(self, best_of_n) -> None:
         """
         Determine the champion of this season
         Parameters:
-            best_of_n: int; how to calculate points in "best of n" championship, 0 = every race counted
+            best_of_n: Any; how to calculate points in "best of n" championship, 0 = every race counted, see BEST_OF_N_CHAMPION
         Outputs:
             None
             driver determined to be champion is set to self.champion
+            points counting towards championship are set to self.driver_championship_standings
+            indexes of rounds dropped from each driver's score are set to self.dropped_scores
         """
+        dropped_scores = DroppedScores(self.get_all_driver_points(), best_of_n)
+        self.driver_championship_standings = dropped_scores.counted
+        self.dropped_scores = dropped_scores.dropped
         if best_of_n == 0: # Most points total
             self.champion = self.update_standings()[0]
-        elif isinstance(best_of_n, int): # Best n finishes
-            champion = (None, None) # Champion in (entrant, points)
-            points_dist = self.get_all_driver_points()
-            for entrant in points_dist.keys():
-                entrant_points_ordered = sorted(filter(None, points_dist[entrant]), reverse=True)
-                entrant_best_of_n = sum(entrant_points_ordered[0:best_of_n])
-                self.driver_championship_standings[entrant] = entrant_best_of_n
-                if champion[1] == None or entrant_best_of_n > champion[1]:
-                    champion = (entrant, entrant_best_of_n)
-            self.champion = champion[0]
-        else: # Best n of first m races and best i of last k races, ((n,m),(i,k))
-            assert len(best_of_n) == 2 and all([len(x) == 2 for x in best_of_n]), "Incorrect formatting of championship best of n!"
-            champion = (None, None) # Champion in (entrant, points)
-            points_dist = self.get_all_driver_points()
-            for entrant in points_dist.keys():
-                results = points_dist[entrant]
-                set1 = sum(sorted(filter(None, results[0:best_of_n[0][1]]), reverse=True))
-                set2 = sum(sorted(filter(None, results[best_of_n[0][1]:]), reverse=True))
-                self.driver_championship_standings[entrant] = set1 + set2
-                if champion[1] == None or set1+set2 > champion[1]:
-                    champion = (entrant, set1+set2)
-            self.champion = champion[0]
+        elif len(dropped_scores.counted) == 0:
+            self.champion = None
+        else: # Most points counted, ties are broken by total points and countback
+            best_score = max(dropped_scores.counted.values())
+            tied = [driver for driver in dropped_scores.counted.keys() if dropped_scores.counted[driver] == best_score]
+            if len(tied) == 1:
+                self.champion = tied[0]
+            else:
+                self.champion = max(tied, key=lambda driver: (dropped_scores.totals[driver], self.countback(driver)))
+
+    def get_dropped_races(self, driver:Driver) -> list[Race]:
+        """
+        Get the races whose points were dropped from a driver's championship score
+        Parameters:
+            driver: Driver; driver to get dropped races of
+        Outputs:
+            dropped: list[Race]; races not counted towards the championship
+        """
+        return [self.races[i] for i in self.dropped_scores.get(driver, [])]
+
+    def get_progression(self) -> ChampionshipProgression:
+        """
+        Get the round-by-round progression of the drivers' championship, computed once per season
+        Parameters:
+            None
+        Outputs:
+            progression: ChampionshipProgression; progression tables of this season
+        """
+        if not hasattr(self, "_progression") or self._progression == None:
+            self._progression = ChampionshipProgression(self)
+        return self._progression
 
     def set_teammates(self):
         for race in self.races:
@@ -402,6 +519,8 @@ class Season(MyDataClass):
             raise AssertionError("WTF???")
         
         fastest_lap_points = self.select_fastest_lap_points()
+        fastest_lap_points_constructor = self.select_fastest_lap_points(drivers_champ=False)
+        best_car_only = self.select_constructor_scoring()
 
         points_arr_driver_sprint = self.select_sprint_points_system()
 
@@ -412,13 +531,24 @@ class Season(MyDataClass):
             else:
                 points_arr = race.half_points
             driver_points = race.calculate_driver_points(points_arr, points_arr_driver_sprint, fastest_lap_points)
-            constructor_points = race.calculate_constructor_points(points_arr_constructor, fastest_lap_points)
+            if int(self.year) < CONSTRUCTORS_CHAMPIONSHIP_START or race.name in CONSTRUCTOR_EXCLUDED_RACES:
+                constructor_points = {}
+            else:
+                if race.half_points == None:
+                    points_arr = points_arr_constructor
+                else:
+                    points_arr = [0.5*x for x in points_arr_constructor]
+                constructor_points = race.calculate_constructor_points(points_arr, fastest_lap_points_constructor,
+                    sprint_pointssystem=points_arr_driver_sprint, best_car_only=best_car_only)
+            race._saved_constructor_points = constructor_points
             for entrant in driver_points.keys():
                 entrant.add_season_to_data(self)
                 if entrant in self.driver_full_standings.keys() and isinstance(self.driver_full_standings[entrant], list):
                     self.driver_full_standings[entrant].append(driver_points[entrant])
                 else:
                     self.driver_full_standings[entrant] = [driver_points[entrant]]
+            for constructor in set(entrant[1] for entrant in race.get_entrants()): # Entered constructors, scoring or not
+                constructor.add_season_to_data(self)
             for constructor in constructor_points:
                 if constructor in self.constuctor_standings:
                     self.constuctor_standings[constructor].append(constructor_points[constructor])
@@ -427,3 +557,53 @@ class Season(MyDataClass):
 
         # Award championships
         self.determine_driver_champion(self.select_champion_method())
+        self.determine_constructor_champion()
+
+    def load_official_standings(self, driver_standings:dict, constructor_standings:dict) -> None:
+        """
+        Load the official standings of this season instead of awarding points
+        Parameters:
+            driver_standings: dict[int, dict[Driver, tuple[float, int]]]; {round: {driver: (points, position)}} after each round
+            constructor_standings: dict[int, dict[Constructor, tuple[float, int]]]; {round: {constructor: (points, position)}} after each round
+        Outputs:
+            Gives each entrant driver the points recorded in the results of each race and each constructor the gain of its
+            official points each round. Champions and final standings are set from the official standings of the last round.
+        """
+        assert len(self.races) > 0, "Season not initialized!"
+        assert all([isinstance(race, Race) for race in self.races]), "Wrong formatting in races list!"
+
+        previous = {} # constructor: official points before current round
+        for race in sorted(self.races, key=lambda r: r.round):
+            driver_points = race.official_driver_points()
+            constructor_points = {}
+            if race.round in constructor_standings.keys():
+                for constructor, (points, _) in constructor_standings[race.round].items():
+                    constructor_points[constructor] = points - previous.get(constructor, 0)
+                    previous[constructor] = points
+            race._saved_constructor_points = constructor_points
+            for entrant in driver_points.keys():
+                entrant.add_season_to_data(self)
+                if entrant in self.driver_full_standings.keys() and isinstance(self.driver_full_standings[entrant], list):
+                    self.driver_full_standings[entrant].append(driver_points[entrant])
+                else:
+                    self.driver_full_standings[entrant] = [driver_points[entrant]]
+            for constructor in set(entrant[1] for entrant in race.get_entrants()): # Entered constructors, scoring or not
+                constructor.add_season_to_data(self)
+            for constructor in constructor_points:
+                if constructor in self.constuctor_standings:
+                    self.constuctor_standings[constructor].append(constructor_points[constructor])
+                else:
+                    self.constuctor_standings[constructor] = [constructor_points[constructor]]
+
+        # Award championships
+        final_drivers = driver_standings[max(driver_standings.keys())] if driver_standings else {}
+        final_constructors = constructor_standings[max(constructor_standings.keys())] if constructor_standings else {}
+        self.driver_championship_standings = {driver: points for driver, (points, _) in final_drivers.items()}
+        self.dropped_scores = DroppedScores(self.get_all_driver_points(), self.select_champion_method()).dropped
+        self.champion = next((driver for driver, (_, pos) in final_drivers.items() if pos == 1), None)
+        ordered = sorted(final_constructors.keys(), key=lambda c: final_constructors[c][1])
+        self._constructor_full_standings = [(constructor, final_constructors[constructor][0]) for constructor in ordered]
+        if int(self.year) >= CONSTRUCTORS_CHAMPIONSHIP_START and len(ordered) > 0:
+            self.constructor_champion = ordered[0]
+        else:
+            self.constructor_champion = None
@@ -0,0 +1,240 @@
+from season import Season, POINTS_SYSTEMS
+from driver import Driver
+from dropscores import DroppedScores
+
+POINTS_SYSTEM_NAMES = [
+    "1950-1959 points",
+    "1960 points",
+    "1961-1990 points",
+    "1991-2002 points",
+    "2003-2009 points",
+    "2010- points",
+]
+
+class PointsRules():
+    """
+    Set of rules for re-scoring a season. Any rule left as None follows the historical rules of the season being scored.
+    """
+
+    def __init__(self, name:str, race_points:list[int]=None, sprint_points:list[int]=None,
+                 fastest_lap:tuple[int, int]=None, best_of_n=None):
+        """
+        Initialize rules
+        Parameters:
+            name: str; name of this set of rules
+            (Optional) race_points: list[int]; points per finishing position in race. Default = None = Historical
+            (Optional) sprint_points: list[int]; points per finishing position in sprint. Default = None = Historical
+            (Optional) fastest_lap: tuple[int, int]; fastest lap points and eligible positions, see Season.select_fastest_lap_points(). Default = None = Historical
+            (Optional) best_of_n: Any; championship determining parameter, see BEST_OF_N_CHAMPION. Default = None = Historical
+        """
+        assert race_points == None or (isinstance(race_points, list) and len(race_points) > 0), "Race points must be non-empty list!"
+        assert sprint_points == None or isinstance(sprint_points, list), "Sprint points must be list!"
+        assert fastest_lap == None or (isinstance(fastest_lap, tuple) and len(fastest_lap) == 2), "Fastest lap must be tuple of (points, eligibility)!"
+        self.name = name
+        self.race_points = race_points
+        self.sprint_points = sprint_points
+        self.fastest_lap = fastest_lap
+        self.best_of_n = best_of_n
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}: {str(self)}"
+
+    def resolve(self, season:Season) -> tuple:
+        """
+        Resolve the rules to use for a given season
+        Parameters:
+            season: Season; season to be scored
+        Outputs:
+            t: tuple; (race points, sprint points, fastest lap tuple, best of n)
+        """
+        return (
+            season.select_race_points_system() if self.race_points == None else self.race_points,
+            season.select_sprint_points_system() if self.sprint_points == None else self.sprint_points,
+            season.select_fastest_lap_points() if self.fastest_lap == None else self.fastest_lap,
+            season.select_champion_method() if self.best_of_n == None else self.best_of_n
+        )
+
+HISTORICAL_RULES = PointsRules("Historical rules")
+NO_DROPPED_SCORES = PointsRules("No dropped scores", best_of_n=0)
+ALTERNATIVE_RULES = [PointsRules(POINTS_SYSTEM_NAMES[i], race_points=POINTS_SYSTEMS[i]) for i in range(len(POINTS_SYSTEMS))]
+
+class SeasonMatrix():
+    """
+    Scoring independent standings matrix of a season. Each cell holds the classification of a driver in one round,
+    which any points system can then be mapped onto.
+    """
+
+    def __init__(self, season:Season):
+        """
+        Read the classifications of every round of a season
+        Parameters:
+            season: Season; season to read
+        """
+        self.season = season
+        self.drivers: list[Driver] = []
+        self.index = {} # driver: dense index
+        self.rounds = [] # Per round list of (driver index, race slots, fastest lap share, fastest lap position, sprint slots)
+        self.half_points = [] # Per round flag for rounds awarding half points
+        self.results = [] # Per driver list of finishing positions, None if not entered
+        for race in season.races:
+            self.rounds.append(self.read_race(race))
+            self.half_points.append(race.half_points != None)
+        for i in range(len(season.races)):
+            for driver_index, slots, _, _, _ in self.rounds[i]:
+                self.results[driver_index][i] = min(pos for pos, _ in slots)
+
+    def driver_index(self, driver:Driver) -> int:
+        """
+        Get the dense index of a driver, adding driver to the matrix if not yet present
+        """
+        if driver not in self.index:
+            self.index[driver] = len(self.drivers)
+            self.drivers.append(driver)
+            self.results.append([None] * len(self.season.races))
+        return self.index[driver]
+
+    def read_race(self, race) -> list[tuple]:
+        """
+        Read the classification slots of each entrant of a race, in the same order points are awarded to them.
+        Parameters:
+            race: Race; race to read
+        Outputs:
+            cells: list[tuple]; list of (driver index, race slots, fastest lap share, fastest lap position, sprint slots)
+        """
+        entrants = {} # entrant: [race slots, fastest lap share, fastest lap position, sprint slots]
+        for pos in range(1, len(race.finish.keys()) + 1):
+            result = race.finish[pos]
+            for entrant in result.entrants:
+                entrants.setdefault(entrant, [[], 0, None, []])[0].append((pos, len(result.entrants)))
+        fastest_entrants = race.finish.get_fastest_lap()[0]
+        for entrant in fastest_entrants:
+            entrants[entrant][1] += 1/len(fastest_entrants)
+            entrants[entrant][2] = race.finish.get_entrant(entrant)
+        if race.sprint_event:
+            for pos in range(1, len(race.sprint.keys()) + 1):
+                result = race.sprint[pos]
+                for entrant in result.entrants:
+                    entrants[entrant][3].append((pos, len(result.entrants)))
+        return [(self.driver_index(entrant[0]), *entrants[entrant]) for entrant in entrants]
+
+    def points_matrix(self, race_points:list, sprint_points:list, fastest_lap:tuple[int, int]) -> list[list]:
+        """
+        Map a points system onto the matrix
+        Parameters:
+            race_points: list[int]; points per finishing position in race
+            sprint_points: list[int]; points per finishing position in sprint
+            fastest_lap: tuple[int, int]; fastest lap points and eligible positions
+        Outputs:
+            points: list[list[float | None]]; points of each driver (rows) in each round (columns), None if not entered
+        """
+        def slot_points(slots:list[tuple[int, int]], points_system:list, multiplier:float=1) -> float:
+            return max([(multiplier*points_system[pos-1] if pos <= len(points_system) else 0)/share for pos, share in slots], default=0)
+
+        points = [[None] * len(self.rounds) for _ in self.drivers]
+        for i in range(len(self.rounds)):
+            multiplier = 0.5 if self.half_points[i] else 1
+            for driver_index, slots, fastest_share, fastest_pos, sprint_slots in self.rounds[i]:
+                driver_points = slot_points(slots, race_points, multiplier)
+                if fastest_share and (fastest_lap[1] == 0 or 0 <= fastest_pos <= fastest_lap[1]):
+                    driver_points += fastest_lap[0]*fastest_share
+                driver_points += slot_points(sprint_slots, sprint_points)
+                points[driver_index][i] = driver_points
+        return points
+
+    def countback(self, driver_index:int) -> tuple[int]:
+        """
+        Countback key of a driver, i.e. number of wins, second places, third places etc.
+        """
+        positions = [x for x in self.results[driver_index] if x != None]
+        return tuple(positions.count(pos) for pos in range(1, max(positions, default=0) + 1))
+
+
+class SeasonSimulation():
+    """
+    Result of scoring one season with one set of rules.
+    """
+
+    def __init__(self, matrix:SeasonMatrix, rules:PointsRules):
+        """
+        Score a season matrix with given rules
+        Parameters:
+            matrix: SeasonMatrix; season to score
+            rules: PointsRules; rules to score season with
+        """
+        race_points, sprint_points, fastest_lap, best_of_n = rules.resolve(matrix.season)
+        self.rules = rules
+        self.year = matrix.season.year
+        self.points = dict(zip(matrix.drivers, matrix.points_matrix(race_points, sprint_points, fastest_lap)))
+        dropped_scores = DroppedScores(self.points, best_of_n)
+        counted = dropped_scores.counted
+        totals = dropped_scores.totals
+        self.dropped = dropped_scores.dropped
+        ordered = sorted(matrix.drivers, key=lambda d: (counted[d], totals[d], matrix.countback(matrix.index[d])), reverse=True)
+        self.standings = [(driver, counted[driver], totals[driver]) for driver in ordered]
+        self.champion = ordered[0] if len(ordered) > 0 else None
+
+    def __str__(self):
+        return f"{self.year} ({str(self.rules)}): {str(self.champion)}"
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}: {str(self)}"
+
+    def get_points(self, driver:Driver) -> list:
+        """
+        Return the points scored from each race for a driver under simulated rules
+        """
+        return self.points[driver]
+
+
+class PointsSimulator():
+    """
+    What-if engine for re-scoring every season with alternative points systems.
+    Canonical season data is never modified.
+    """
+
+    def __init__(self, archive):
+        """
+        Build standings matrices of every season in archive
+        Parameters:
+            archive: ArchiveReader; archive to read seasons from
+        """
+        self.archive = archive
+        self.matrices = {season.year: SeasonMatrix(season) for season in archive.seasons if len(season.races) > 0}
+
+    def simulate(self, rules_list:list[PointsRules]) -> dict[str, dict[int, SeasonSimulation]]:
+        """
+        Score every season with every given set of rules
+        Parameters:
+            rules_list: list[PointsRules]; rules to score seasons with
+        Outputs:
+            simulations: dict; {rules name: {year: SeasonSimulation}}
+        """
+        return {str(rules): {year: SeasonSimulation(self.matrices[year], rules) for year in self.matrices} for rules in rules_list}
+
+    def alternate_champions(self, rules:PointsRules) -> dict[int, Driver]:
+        """
+        Get the champion of each season under given rules
+        Parameters:
+            rules: PointsRules; rules to score seasons with
+        Outputs:
+            champions: dict[int, Driver]; {year: champion}
+        """
+        simulations = self.simulate([rules])[str(rules)]
+        return {year: simulations[year].champion for year in simulations}
+
+    def titles_by_driver(self, rules:PointsRules) -> dict[Driver, list[int]]:
+        """
+        Get the seasons each driver would have been champion under given rules
+        Parameters:
+            rules: PointsRules; rules to score seasons with
+        Outputs:
+            titles: dict[Driver, list[int]]; {champion: [years]}
+        """
+        titles = {}
+        champions = self.alternate_champions(rules)
+        for year in sorted(champions.keys()):
+            titles.setdefault(champions[year], []).append(year)
+        return titles
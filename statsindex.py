@@ -0,0 +1,53 @@
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+YEAR_STATS_FIELDS = ["n_wins","n_poles","n_podiums","n_points","n_entries"]
+
+class YearStatsIndex():
+    """
+    Cumulative statistics of a driver per year. Prefix sums over the seasons entered turn any
+    year-range aggregate into two binary searches, instead of a loop over seasons.
+    """
+
+    def __init__(self, seasons_data:dict[int, dict], fields:list[str]=YEAR_STATS_FIELDS):
+        """
+        Build prefix sums of each statistic
+        Parameters:
+            seasons_data: dict[int, dict]; {year: season stats}, see Driver.get_all_seasons_data()
+            (Optional) fields: list[str]; statistics to index. Default = YEAR_STATS_FIELDS
+        """
+        self.years = sorted(seasons_data.keys())
+        self.prefix = {} # field: cumulative value, index i = total of first i seasons
+        for field in fields:
+            self.prefix[field] = [0] + list(accumulate(seasons_data[year][field] for year in self.years))
+
+    def total(self, field:str, start:int=None, end:int=None) -> float:
+        """
+        Total of a statistic over a range of years
+        Parameters:
+            field: str; statistic to total, e.g. "n_wins"
+            (Optional) start: int; first year included. Default = None = First season
+            (Optional) end: int; last year included. Default = None = Last season
+        Outputs:
+            total: float; total of statistic in given years
+        """
+        assert field in self.prefix.keys(), f"Unknown field {field}!"
+        i = 0 if start == None else bisect_left(self.years, start)
+        j = len(self.years) if end == None else bisect_right(self.years, end)
+        return self.prefix[field][j] - self.prefix[field][i] if j > i else 0
+
+    def before(self, field:str, year:int) -> float:
+        """
+        Total of a statistic in every season before given year
+        """
+        return self.total(field, end=year-1)
+
+    def as_of(self, year:int) -> dict:
+        """
+        Career statistics as of the end of given year
+        Parameters:
+            year: int; last year included
+        Outputs:
+            stats: dict; {field: total up to and including year}
+        """
+        return {field: self.total(field, end=year) for field in self.prefix.keys()}
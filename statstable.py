@@ -0,0 +1,151 @@
+from array import array
+from bisect import bisect_left
+from math import ceil, isinf
+from collections import OrderedDict
+
+CAREER_COLUMNS = ["n_championships", "n_entries", "n_wins", "n_podiums", "n_poles", "n_points", "n_sprint_wins"]
+SEASON_COLUMNS = ["n_wins", "n_podiums", "n_poles", "n_points"] # Best and worst season of each are stored as max_ and min_ columns
+
+STATS_TABLE_CACHE_SIZE = 8 # Most stats tables kept, least recently used tables are evicted first
+
+_tables = OrderedDict() # id of driver list: (drivers, DriverStatsTable), least recently used first
+
+def stats_table(candidates:list):
+    """
+    Get the stats table of a list of drivers, built once per list while it is among the STATS_TABLE_CACHE_SIZE most recently used
+    Parameters:
+        candidates: list; candidate answers
+    Outputs:
+        table: DriverStatsTable; table of candidates, None if candidates are not drivers
+    """
+    cached = _tables.get(id(candidates))
+    if cached != None and cached[0] is candidates:
+        _tables.move_to_end(id(candidates))
+        return cached[1]
+    if len(candidates) == 0 or not all(hasattr(x, "get_career_data") and hasattr(x, "team_names") for x in candidates):
+        return None
+    table = DriverStatsTable(candidates)
+    _tables[id(candidates)] = (candidates, table)
+    _tables.move_to_end(id(candidates))
+    while len(_tables) > STATS_TABLE_CACHE_SIZE:
+        _tables.popitem(last=False)
+    return table
+
+
+class DriverStatsTable():
+    """
+    Per-driver statistics stored by column, row i holds the stats of drivers[i].
+    Predicates evaluated against a column return a bitmap of every matching driver, see bitset.py.
+    """
+
+    def __init__(self, drivers:list):
+        """
+        Build columns from career and season data of each driver
+        Parameters:
+            drivers: list[Driver]; drivers of table, in row order
+        """
+        self.drivers = drivers
+        self.columns = {}
+        for field in CAREER_COLUMNS:
+            self.columns[field] = array("d", (driver.get_career_data()[field] for driver in drivers))
+        for field in SEASON_COLUMNS:
+            season_values = [[season[field] for season in driver.get_all_seasons_data().values()] for driver in drivers]
+            self.columns["max_" + field] = array("d", (max(values, default=float("-inf")) for values in season_values))
+            self.columns["min_" + field] = array("d", (min(values, default=float("inf")) for values in season_values))
+        self.columns["peak_rating"] = array("d", (float("-inf") if driver.peak_rating == None else driver.peak_rating for driver in drivers))
+        self.columns["n_dnfs"] = array("d", (driver.get_dnf_count() for driver in drivers))
+        self.columns["nationality"] = [driver.nationality for driver in drivers]
+        self.columns["team_names"] = [driver.team_names for driver in drivers]
+        self._threshold_indexes = {} # column name: ThresholdIndex
+
+    def __len__(self):
+        return len(self.drivers)
+
+    def column(self, name:str):
+        """
+        Get a column by name
+        """
+        assert name in self.columns.keys(), f"Unknown column {name}!"
+        return self.columns[name]
+
+    def all(self) -> int:
+        """
+        Bitmap of every row
+        """
+        return (1 << len(self.drivers)) - 1
+
+    def threshold_index(self, name:str):
+        """
+        Get the threshold index of a numeric column, built on first use
+        """
+        if name not in self._threshold_indexes.keys():
+            self._threshold_indexes[name] = ThresholdIndex(self.column(name))
+        return self._threshold_indexes[name]
+
+    def at_least(self, name:str, n:float) -> int:
+        """
+        Bitmap of rows where column value is at least n
+        """
+        return self.threshold_index(name).mask(n)
+
+    def equals(self, name:str, value) -> int:
+        """
+        Bitmap of rows where column value equals value
+        """
+        mask = 0
+        for i, row_value in enumerate(self.column(name)):
+            if row_value == value:
+                mask |= 1 << i
+        return mask
+
+    def contains(self, name:str, value) -> int:
+        """
+        Bitmap of rows where column value is a collection containing value
+        """
+        mask = 0
+        for i, row_value in enumerate(self.column(name)):
+            if value in row_value:
+                mask |= 1 << i
+        return mask
+
+
+class ThresholdIndex():
+    """
+    Values of a numeric column in ascending order, with the bitmap of rows at or above each rank.
+    Answers to "at least n" over the column are found with a single bisect.
+    """
+
+    def __init__(self, values):
+        """
+        Parameters:
+            values: array | list[float]; column values, value i belongs to row i
+        """
+        order = sorted(range(len(values)), key=lambda i: values[i])
+        self.values = array("d", (values[i] for i in order))
+        self.masks = [0]*(len(order) + 1) # masks[k]: rows of rank k or higher
+        for k in range(len(order) - 1, -1, -1):
+            self.masks[k] = self.masks[k+1] | 1 << order[k]
+
+    def count(self, n:float) -> int:
+        """
+        Number of rows with value at least n
+        """
+        return len(self.values) - bisect_left(self.values, n)
+
+    def mask(self, n:float) -> int:
+        """
+        Bitmap of rows with value at least n
+        """
+        return self.masks[bisect_left(self.values, n)]
+
+    def thresholds(self, min_count:int, max_count:int) -> list[int]:
+        """
+        Get every positive integer threshold n for which the number of rows with value at least n is within bounds
+        Parameters:
+            min_count: int; lowest number of rows allowed
+            max_count: int; highest number of rows allowed
+        Outputs:
+            thresholds: list[int]; thresholds in ascending order, only thresholds that change the set of rows are included
+        """
+        candidates = sorted(set(ceil(value) for value in self.values if value > 0 and not isinf(value)))
+        return [n for n in candidates if min_count <= self.count(n) <= max_count]
@@ -0,0 +1,93 @@
+import csv
+
+FINISHED = 0
+LAPPED = 1 # Classified, one or more laps down
+MECHANICAL = 2 # Retired for any reason other than an accident
+ACCIDENT = 3
+DSQ = 4
+DNS = 5 # Did not start, including not qualified and withdrawn
+STATUS_CATEGORY_NAMES = ["finished", "lapped", "mechanical", "accident", "DSQ", "DNS"]
+DNF_CATEGORIES = (MECHANICAL, ACCIDENT) # Categories counted as retirements
+
+ACCIDENT_STATUSES = {"accident", "collision", "collision damage", "spun off", "fatal accident", "damage", "debris"}
+DSQ_STATUSES = {"disqualified", "excluded", "underweight"}
+DNS_STATUSES = {"did not qualify", "did not prequalify", "withdrew", "did not start", "not restarted", "107% rule", "injured",
+                "injury", "illness", "driver unwell", "eye injury", "safety concerns", "not qualified"}
+
+def classify_status(status:str) -> int:
+    """
+    Categorize the status text of a result
+    Parameters:
+        status: str; status text from status csv, e.g. "Finished", "+2 Laps" or "Gearbox"
+    Outputs:
+        category: int; one of FINISHED, LAPPED, MECHANICAL, ACCIDENT, DSQ or DNS
+    """
+    status = status.strip().lower()
+    if status == "finished":
+        return FINISHED
+    elif status.startswith("+") and "lap" in status:
+        return LAPPED
+    elif status in ACCIDENT_STATUSES:
+        return ACCIDENT
+    elif status in DSQ_STATUSES:
+        return DSQ
+    elif status in DNS_STATUSES:
+        return DNS
+    return MECHANICAL
+
+
+class StatusTable():
+    """
+    Code table of result statuses, mapping each statusId to its text and category
+    """
+
+    def __init__(self):
+        """
+        Initialize empty table
+        """
+        self.status = {} # statusId: status text
+        self.categories = {} # statusId: category
+
+    def read_csv(self, path:str) -> None:
+        """
+        Read statuses from status csv
+        """
+        with open(path, encoding='utf-8') as csv_file:
+            csv_reader = csv.reader(csv_file, delimiter=',')
+            next(csv_reader, None)
+            for row in csv_reader:
+                self.add_status(int(row[0]), row[1])
+
+    def add_status(self, status_id:int, status:str) -> None:
+        """
+        Add a status to the table
+        """
+        self.status[status_id] = status
+        self.categories[status_id] = classify_status(status)
+
+    def get_category(self, status_id:int) -> int:
+        """
+        Get the category of a status, unknown statuses are regarded as retirements
+        """
+        return self.categories.get(status_id, MECHANICAL)
+
+    def get_status(self, status_id:int) -> str:
+        """
+        Get the text of a status, None if unknown
+        """
+        return self.status.get(status_id)
+
+def is_dnf(category:int) -> bool:
+    """
+    Check whether a status category is a retirement
+    """
+    return category in DNF_CATEGORIES
+
+def races_mask(races:list) -> int:
+    """
+    Bitmap of given races, bit raceId set for each race. Can be combined with Driver.dnf_mask and Driver.finish_mask.
+    """
+    mask = 0
+    for race in races:
+        mask |= 1 << race.raceId
+    return mask
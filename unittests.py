@@ -1,19 +1,47 @@
 import unittest
 import random
+import os
+import tempfile
 
-from readArchive import ArchiveReader
-from globals import ARCHIVE_FILE, remove_accents, isFloat, CountryConverter
+from readArchive import ArchiveReader, StandingsDiff, STANDINGS_TOLERANCE
+from globals import ARCHIVE_FILE, remove_accents, isFloat, sumWithNone, lap_time_to_ms, date_to_ordinal, CountryConverter
 from mydataclass import MyDataClass, find_objects_by_field_value, find_single_object_by_field_value
 from circuit import Circuit
 from constructor import Constructor
 from driver import Driver
 from race import Race, Result, RACE_RESULT_DATA_FIELDS
 from season import Season
-from question import Question, DriverAchievmentQuestion, DriverDataQuestion, DriverTeamQuestion, new_question, all_questions, DriverQuestionGenerator
+from question import Question, DriverAchievmentQuestion, DriverDataQuestion, DriverTeamQuestion, new_question, all_questions, required_fields, DriverQuestionGenerator, VECTORIZED_PREDICATES, numberSeasonPoints, noSeasonPoints
+import statstable
+from statstable import stats_table, STATS_TABLE_CACHE_SIZE
+from bitset import build_mask, compatibility_rows, mirror_rows
+import pickle
+from cache import AnswerCache, cache_key, QUESTION_CACHE_FILE, PairCache, predicate_sources
+from calibration import DifficultyCalibrator, driver_fame, tier_bounds
+from bitset import MaskWeights
+import math
+from array import array
 from quizgame import QuizGame, DriverQuiz, QuizConstructor
+from dropscores import DroppedScores
+from progression import RunningBestOfN
+from laps import LapStore
+from geo import CircuitIndex, haversine
+from ages import age_in_years, birthday_ordinal, achieved_before_age
+from rating import RatingEngine, ELO_INITIAL_RATING
+from status import classify_status, races_mask, FINISHED, LAPPED, MECHANICAL, ACCIDENT, DSQ, DNS, DNF_CATEGORIES
+from hardcodes import HALF_POINT_RACES, FASTEST_LAP_PATCHES, country_display_name
+from simulator import PointsSimulator, PointsRules, HISTORICAL_RULES, NO_DROPPED_SCORES, ALTERNATIVE_RULES
 
 TESTARCHIVE = ArchiveReader(archive_path=ARCHIVE_FILE, skip=True)
 
+def remove_answer_cache():
+    """
+    Remove the answer cache tests save in the archive directory, see QuizConstructor.validate_all()
+    """
+    cache_path = os.path.join(TESTARCHIVE.db_path, QUESTION_CACHE_FILE)
+    if os.path.isfile(cache_path):
+        os.remove(cache_path)
+
 def error_msg(attr:str, expected, got):
     """
     Create error message according to expected attribute, expected value and received value
@@ -80,6 +108,27 @@ class TestGlobals(unittest.TestCase):
         string4 = "54.321" # Should succeed
         self.assertTrue(isFloat(string4))
 
+    def test_LapTimeToMs(self):
+        """
+        Tests lap_time_to_ms() method.
+        """
+        lap_times = {"1:23.456": 83456, "83.456": 83456, "10:00.001": 600001, "9:59.999": 599999, "\\N": None, "": None,
+                     "nan": None, "inf": None, "-inf": None, "1:nan": None, "1e308:1e308": None}
+        for lap_time in lap_times.keys():
+            expected = lap_times[lap_time]
+            got = lap_time_to_ms(lap_time)
+            self.assertTrue(got == expected, error_msg(f"milliseconds of '{lap_time}'", expected, got))
+
+    def test_DateToOrdinal(self):
+        """
+        Tests date_to_ordinal() method.
+        """
+        dates = {"0001-01-01": 1, "1970-01-01": 719163, "2000-02-29": 730179, "\\N": None, "": None}
+        for input_date in dates.keys():
+            expected = dates[input_date]
+            got = date_to_ordinal(input_date)
+            self.assertTrue(got == expected, error_msg(f"ordinal of '{input_date}'", expected, got))
+
     def test_RemoveAccents(self):
         """
         Test that remove_accents() function works as expected.
@@ -164,6 +213,82 @@ class TestArchiveReader(unittest.TestCase):
         self.assertTrue(len(TESTARCHIVE.races) == 1125)
         self.assertTrue(len(TESTARCHIVE.seasons) == 75)
 
+    def test_Projection(self):
+        """
+        Test that a projected archive leaves unused fields empty without changing results
+        """
+        questions = all_questions(0)
+        projected = ArchiveReader(archive_path=ARCHIVE_FILE, skip=True, projection=required_fields(questions))
+        self.assertTrue(all(driver.url == None for driver in projected.drivers), "Unused field should not be read!")
+        self.assertTrue(all(race.fp1_date == None for race in projected.races), "Unused field should not be read!")
+        for race, projected_race in zip(TESTARCHIVE.races, projected.races):
+            self.assertTrue(str(race.finish) == str(projected_race.finish))
+            for pos in projected_race.finish.keys():
+                self.assertTrue(all("fastestLapSpeed" not in x for x in projected_race.finish[pos].data))
+        for question in questions:
+            expected = question.get_all_answers(TESTARCHIVE.drivers)
+            got = question.get_all_answers(projected.drivers)
+            self.assertTrue([str(x) for x in expected] == [str(x) for x in got], f"Mismatching answers to {str(question)}!")
+        self.assertTrue(projected.laps == None and projected.pit_stops == None, "Unused lap data should not be read!")
+        self.assertTrue(projected.ratings == None and projected.spatial_index == None, "Unused derived data should not be built!")
+        formulae = [DriverQuestionGenerator.question_formulae[i] for i in [6, 11, 17]] # Near home, peak rating, highest circuit
+        derived = ArchiveReader(archive_path=ARCHIVE_FILE, skip=True, projection=required_fields(formulae))
+        self.assertTrue(derived.laps == None and derived.ratings != None and derived.spatial_index != None)
+        self.assertTrue(str(derived.spatial_index.highest) == str(TESTARCHIVE.spatial_index.highest), "Projected circuit index should match full index!")
+
+    def test_TrustedStandings(self):
+        """
+        Test that trusted standings match the official final standings and keep computed race results
+        """
+        trusted = ArchiveReader(archive_path=ARCHIVE_FILE, skip=True, trusted_standings=True)
+        self.assertTrue(trusted.verify_standings() == [], "Trusted standings should match official standings!")
+        driver_standings, constructor_standings = trusted.open_official_standings()
+        for season in trusted.seasons:
+            final_race = max((race for race in season.races if race.raceId in driver_standings.keys()), key=lambda x: x.round, default=None)
+            if final_race == None:
+                continue
+            official = driver_standings[final_race.raceId]
+            self.assertTrue(season.champion in official.keys() and official[season.champion][1] == 1, f"Wrong champion in {season.year}!")
+            for driver in season.driver_full_standings.keys():
+                self.assertTrue(driver.season_entries[season.year] == season)
+        for race, trusted_race in zip(TESTARCHIVE.races, trusted.races):
+            self.assertTrue(str(race.finish) == str(trusted_race.finish))
+        for diff in TESTARCHIVE.verify_standings():
+            if diff.field == "driver_points":
+                season = TESTARCHIVE.season_index[diff.year]
+                rounds = TESTARCHIVE.season_rounds(season, driver_standings)
+                official = rounds[max(rounds.keys())]
+                self.assertTrue(diff.computed == season.driver_championship_standings.get(diff.entity), f"Computed points of {diff} not from season!")
+                self.assertTrue(diff.official == (official[diff.entity][0] if diff.entity in official.keys() else None), f"Official points of {diff} not from standings!")
+                self.assertTrue(None in [diff.computed, diff.official] or abs(diff.computed - diff.official) > STANDINGS_TOLERANCE, f"Reported difference is not a mismatch: {diff}!")
+        season = max(trusted.seasons, key=lambda x: x.year)
+        driver = max(season.driver_championship_standings.keys(), key=lambda x: season.driver_championship_standings[x])
+        points = season.driver_championship_standings[driver]
+        try:
+            season.driver_championship_standings[driver] = points + STANDINGS_TOLERANCE/2
+            self.assertTrue(trusted.verify_standings() == [], "Difference within tolerance should not be reported!")
+            season.driver_championship_standings[driver] = points + 2*STANDINGS_TOLERANCE
+            expected = [StandingsDiff(season.year, "driver_points", driver, points + 2*STANDINGS_TOLERANCE, points)]
+            self.assertTrue(trusted.verify_standings() == expected, error_msg("differences beyond tolerance", expected, trusted.verify_standings()))
+        finally:
+            season.driver_championship_standings[driver] = points
+
+    def test_Patches(self):
+        """
+        Test that hardcoded patches are applied to the races they are keyed by
+        """
+        patched_keys = [key for key in HALF_POINT_RACES + list(FASTEST_LAP_PATCHES.keys()) if key[0] in TESTARCHIVE.season_index]
+        self.assertTrue(len(patched_keys) > 0, "No patched seasons in archive!")
+        for key in patched_keys:
+            self.assertTrue(key in TESTARCHIVE.round_index, f"Patched race {key} missing from archive!")
+        for key in HALF_POINT_RACES:
+            if key in patched_keys:
+                self.assertTrue(TESTARCHIVE.round_index[key].half_points != None, f"Missing half points in {key}!")
+        for key, driver_ids in FASTEST_LAP_PATCHES.items():
+            if key in patched_keys:
+                fastest_drivers = TESTARCHIVE.round_index[key].finish.get_fastest_lap()[0]
+                self.assertTrue(all(x[0].driverId in driver_ids for x in fastest_drivers), f"Incorrect fastest lap in {key}!")
+
 
 class TestMyDataClasses(unittest.TestCase):
     """
@@ -228,6 +353,77 @@ class TestMyDataClasses(unittest.TestCase):
         self.assertTrue(wehrlein.map_to_string(["teams", "name"]) == "Manor Marussia, Sauber")
 
 
+class TestResultOrder(unittest.TestCase):
+    """
+    Testclass includes tests for ResultOrder indexes
+    """
+
+    def test_EntrantIndex(self):
+        """
+        Test that indexed positions match the classification of each race
+        """
+        for race in TESTARCHIVE.races[0:50]:
+            for pos in race.finish.sorted_order():
+                for entrant in race.finish[pos].entrants:
+                    self.assertTrue(race.finish.get_entrant(entrant) <= pos, f"Incorrect position of {str(entrant[0])} in {str(race)}!")
+                    self.assertTrue(entrant in race.reverse_entrants(driver=entrant[0]))
+                    self.assertTrue(entrant in race.reverse_entrants(constructor=entrant[1]))
+            for driver, _ in race.get_entrants():
+                expected = min(pos for pos in race.finish.sorted_order() if driver in [x[0] for x in race.finish[pos].entrants])
+                self.assertTrue(race.get_position(driver) == expected, error_msg(f"position of {str(driver)}", expected, race.get_position(driver)))
+
+    def test_FastestLap(self):
+        """
+        Test that fastest lap is the minimum parsed lap time of each race
+        """
+        for race in TESTARCHIVE.races:
+            if race.finish._hardcoded_fastest_drivers != None:
+                continue
+            fastest_entrants, fastest_time = race.finish.get_fastest_lap()
+            lap_times = [lap_time_to_ms(race.finish[pos].data[i]["fastestLapTime"]) for pos in race.finish.keys() for i in range(len(race.finish[pos].entrants))]
+            lap_times = [x for x in lap_times if x != None]
+            self.assertTrue(fastest_time == min(lap_times, default=None), f"Incorrect fastest lap in {str(race)}!")
+            self.assertTrue(all(race.finish.get_lap_time(x) == fastest_time for x in fastest_entrants))
+
+    def test_ResultRecords(self):
+        """
+        Test that result records of each driver are chronological and match the race classifications
+        """
+        for driver in TESTARCHIVE.drivers:
+            keys = [(x.race.year, x.race.round) for x in driver.results]
+            self.assertTrue(keys == sorted(keys), f"Results of {str(driver)} not in chronological order!")
+            for record in driver.results:
+                self.assertTrue(record.driver == driver and (driver, record.constructor) in record.race.get_entrants())
+                self.assertTrue(record.race.finish.get_entrant((driver, record.constructor)) <= record.position)
+                self.assertTrue(record in record.constructor.results)
+            n_races = len(set(x.race for x in driver.results))
+            n_entries = sum(len(x) for x in driver.race_entries.values())
+            self.assertTrue(n_races == n_entries, error_msg(f"entries of {str(driver)}", n_races, n_entries))
+
+    def test_Qualifying(self):
+        """
+        Test that pole is taken from qualifying when available, with gap to pole measured in the same session
+        """
+        qualifying_races = [race for race in TESTARCHIVE.races if race.has_qualifying()]
+        self.assertTrue(len(qualifying_races) > 0, "Qualifying results not loaded!")
+        for race in qualifying_races:
+            self.assertTrue(race.get_pole() == race.qualifying[1].entrants[0], f"Incorrect pole in {str(race)}!")
+            self.assertTrue(race.get_gap_to_pole(race.get_pole()[0]) in [0, None])
+            pole_times = race.qualifying.get_session_times(race.get_pole()[0])
+            for driver, _ in race.qualifying.get_order():
+                gap = race.get_gap_to_pole(driver)
+                driver_times = race.qualifying.get_session_times(driver)
+                sessions = [i for i in range(len(driver_times)) if driver_times[i] != None and pole_times[i] != None]
+                expected = driver_times[sessions[-1]] - pole_times[sessions[-1]] if len(sessions) > 0 else None
+                self.assertTrue(gap == expected, error_msg(f"gap to pole of {str(driver)} in {str(race)}", expected, gap))
+        race = qualifying_races[0]
+        pole_result = race.qualifying.pop(1)
+        try:
+            self.assertTrue(race.get_pole() == race.get_grid()[0], "Pole should fall back to grid without pole sitter in qualifying!")
+        finally:
+            race.qualifying[1] = pole_result
+
+
 class TestQuestions(unittest.TestCase):
     """
     Testclass includes tests for Question class
@@ -267,6 +463,20 @@ class TestQuestionGenerator(unittest.TestCase):
         question_answers = new_q.get_all_answers(TESTARCHIVE.drivers)
         self.assertTrue(len(question_answers) == 6, error_msg("number of answers", 6, len(question_answers)))
     
+    def test_YearRangeQuestion(self):
+        generator = DriverQuestionGenerator(TESTARCHIVE)
+        new_q = generator.generate_question(4, 2010) # Won a race in the 2010s
+        self.assertTrue(str(new_q) == "Won a race in the 2010s")
+        expected = [x for x in TESTARCHIVE.drivers if any(2010 <= y <= 2019 and x.get_season_data(y)["n_wins"] > 0 for y in x.season_entries.keys())]
+        question_answers = new_q.get_all_answers(TESTARCHIVE.drivers)
+        self.assertTrue(set(question_answers) == set(expected), error_msg("number of answers", len(expected), len(question_answers)))
+        for driver in TESTARCHIVE.drivers:
+            year_stats = driver.get_year_stats()
+            self.assertTrue(year_stats.total("n_wins") == driver.get_career_data()["n_wins"])
+            for year in year_stats.years:
+                expected_entries = sum(driver.get_season_data(y)["n_entries"] for y in year_stats.years if y <= year)
+                self.assertTrue(year_stats.as_of(year)["n_entries"] == expected_entries)
+
     def test_CustomQuestion(self):
         generator = DriverQuestionGenerator(TESTARCHIVE)
         new_modifier = find_single_object_by_field_value(TESTARCHIVE.drivers, "driverId", 841) # Giovinazzi
@@ -286,10 +496,52 @@ class TestQuestionGenerator(unittest.TestCase):
         mutual_answers = new_q1.get_mutual_answers(new_q2, TESTARCHIVE.drivers)
         self.assertTrue(len(mutual_answers) == 2, error_msg("number of answers", 2, len(mutual_answers)))
 
+    def test_ChooseThreshold(self):
+        generator = DriverQuestionGenerator(TESTARCHIVE)
+        for question_id in [1, 12, 13]:
+            for seed in range(5):
+                n = generator.choose_threshold(question_id, 15, 40, setseed=seed)
+                new_q = generator.generate_question(question_id, n)
+                n_answers = len(new_q.get_all_answers(TESTARCHIVE.drivers))
+                expected = len([x for x in TESTARCHIVE.drivers if new_q.check_question(x)])
+                self.assertTrue(n_answers == expected, error_msg("number of answers", expected, n_answers))
+                self.assertTrue(15 <= n_answers <= 40, f"Threshold {n} of formula {question_id} gives {n_answers} answers!")
+        self.assertRaises(AssertionError, generator.choose_threshold, 3, 15, 40) # Teammates, no threshold
+        self.assertRaises(AssertionError, generator.choose_threshold, 2, 15, 40) # Championships, too few champions
+
+    def test_EnumerateQuestions(self):
+        generator = DriverQuestionGenerator(TESTARCHIVE)
+        enumerated = generator.enumerate_questions(min_answers=3, max_answers=40)
+        self.assertFalse(isinstance(enumerated, list), "Questions should be enumerated lazily!")
+        questions = list(enumerated)
+        question_ids = set(question.question_id for question in questions)
+        self.assertTrue({1, 3, 4, 6, 14, 15, 16, 17}.issubset(question_ids), f"Missing formulae, got {sorted(question_ids)}!")
+        self.assertTrue(len(set(str(question) for question in questions)) == len(questions), "Duplicate questions!")
+        for question in questions:
+            expected = [driver for driver in TESTARCHIVE.drivers if question.check_question(driver)]
+            got = question.get_all_answers(TESTARCHIVE.drivers)
+            self.assertTrue(got == expected, f"Mismatching answers to {str(question)}!")
+            self.assertTrue(3 <= len(got) <= 40, error_msg(f"number of answers to {str(question)}", "3-40", len(got)))
+        for question in generator.enumerate_questions(question_ids=[16]):
+            country = question.modifier.lower()
+            self.assertTrue(question.modifier == country_display_name(country), error_msg("country display name", country_display_name(country), question.modifier))
+            self.assertTrue(any(country in driver.get_wins_per_country() for driver in question.get_all_answers(TESTARCHIVE.drivers)))
+        for country, expected in [("uae", "UAE"), ("united states", "United States"), ("monaco", "Monaco")]:
+            self.assertTrue(country_display_name(country) == expected, error_msg("country display name", expected, country_display_name(country)))
+            self.assertTrue(country_display_name(country).lower() == country)
+        nationalities = list(generator.enumerate_questions(question_ids=[14]))
+        self.assertTrue(len(nationalities) == len(set(driver.nationality for driver in TESTARCHIVE.drivers)))
+        highest = list(generator.enumerate_questions(question_ids=[18]))
+        self.assertTrue(len(highest) == 1 and str(highest[0]) == "Raced at the highest circuit", f"Highest circuit question not enumerated, got {highest}!")
+        expected = [driver for driver in TESTARCHIVE.drivers if TESTARCHIVE.spatial_index.highest in driver.get_circuits()]
+        self.assertTrue(highest[0].get_all_answers(TESTARCHIVE.drivers) == expected, "Mismatching answers to highest circuit question!")
+
     def test_ImpossibleQuestion(self):
         generator = DriverQuestionGenerator(TESTARCHIVE)
         self.assertRaises(AssertionError, generator.predetermined_question, 299999) # Championships: 99999
         self.assertRaises(AssertionError, generator.predetermined_question, 199999) # Race wins: 99999
+        for question_id in [14, 15, 16, 18]: # Text modifiers cannot be given as modifier id
+            self.assertRaises(AssertionError, generator.generate_custom_question, question_id, 1)
 
 
 class TestQuizClass(unittest.TestCase):
@@ -358,6 +610,9 @@ class TestQuizClass(unittest.TestCase):
 
 class TestQuizConstructorClass(unittest.TestCase):
 
+    def tearDown(self):
+        remove_answer_cache()
+
     def test_ConstructorInit(self):
         qc = QuizConstructor(TESTARCHIVE)
         self.assertIsNone(qc.all_questions, "Constructor all_questions attribute should not be initialized yet!")
@@ -383,6 +638,619 @@ class TestQuizConstructorClass(unittest.TestCase):
             got_row_q = qg.row_questions[i]
             self.assertTrue(str(got_row_q) == exp_row_q[i], f"Mismatching row question at index {i}!")
 
+    def test_CalibratedQuiz(self):
+        """
+        Test that a calibrated quiz chooses questions by calibrated tier and keeps the grid within its difficulty
+        """
+        for difficulty in [1, 2, 3]:
+            qc = QuizConstructor(TESTARCHIVE, difficulty=difficulty, seed=7, calibrated=True)
+            qc.create_quiz()
+            qg = qc.start_quiz()
+            calibration = qc.get_calibration()
+            for questions in [qg.col_questions, qg.row_questions]:
+                for i, question in enumerate(questions):
+                    expected = max(min(len(questions) - i, difficulty), 1)
+                    got = calibration.get_question_tier(question)
+                    self.assertTrue(got == expected, error_msg(f"tier of {str(question)}", expected, got))
+            grid_tier = calibration.get_grid_tier(qg.col_questions, qg.row_questions)
+            self.assertTrue(grid_tier != None and grid_tier <= difficulty, error_msg("grid tier", f"1-{difficulty}", grid_tier))
+
+
+class TestAnswerBitmaps(unittest.TestCase):
+    """
+    Testclass includes tests for answer bitmaps of questions and the compatibility matrix built from them
+    """
+
+    def tearDown(self):
+        remove_answer_cache()
+
+    def test_MasksMatchPredicates(self):
+        """
+        Test that answer and mutual answer bitmaps agree with checking each candidate
+        """
+        questions = all_questions(0)[:10]
+        drivers = TESTARCHIVE.drivers
+        for question in questions:
+            expected = [driver for driver in drivers if question.check_question(driver)]
+            self.assertTrue(question.get_all_answers(drivers) == expected, f"Mismatching answers to {str(question)}!")
+            self.assertTrue(question.count_answers(drivers) == len(expected))
+            for other_question in questions:
+                expected_mutual = [driver for driver in expected if other_question.check_question(driver)]
+                self.assertTrue(question.get_mutual_answers(other_question, drivers) == expected_mutual)
+                self.assertTrue(question.validate_question(other_question, drivers) == (len(expected_mutual) > 0))
+
+    def test_VectorizedPredicates(self):
+        """
+        Test that vectorized predicates give the same answers as checking each driver
+        """
+        drivers = TESTARCHIVE.drivers
+        table = stats_table(drivers)
+        self.assertTrue(len(table) == len(drivers))
+        questions = [question for question in all_questions(0) if question.func in VECTORIZED_PREDICATES.keys()]
+        questions += [(0, "", n, func) for func in VECTORIZED_PREDICATES.keys() for n in [0, 1, 5, 25, 1500]]
+        for question in questions:
+            modifier, func = (question[2], question[3]) if isinstance(question, tuple) else (question.modifier, question.func)
+            expected = build_mask(lambda driver: func(modifier, driver), drivers)
+            got = VECTORIZED_PREDICATES[func](modifier, table)
+            self.assertTrue(got == expected, f"Mismatching answers of {func.__name__}({modifier})!")
+        subsets = [drivers[i:] for i in range(STATS_TABLE_CACHE_SIZE + 1)]
+        self.assertTrue(all(stats_table(subset) is stats_table(subset) for subset in subsets), "Stats table should be built once per list!")
+        self.assertTrue(len(statstable._tables) == STATS_TABLE_CACHE_SIZE, error_msg("cached stats tables", STATS_TABLE_CACHE_SIZE, len(statstable._tables)))
+
+    def test_SeasonPoints(self):
+        """
+        Test that season points questions read the points total of each season
+        """
+        for driver in TESTARCHIVE.drivers:
+            season_points = [driver.get_season_data(year)["n_points"] for year in driver.season_entries.keys()]
+            self.assertTrue(numberSeasonPoints(10, driver) == any(x >= 10 for x in season_points))
+            self.assertTrue(noSeasonPoints(None, driver) == (0 in season_points))
+
+    def test_ParallelValidation(self):
+        """
+        Test that validating in worker processes gives the same matrix as validating serially
+        """
+        generator = DriverQuestionGenerator(TESTARCHIVE)
+        qc = QuizConstructor(TESTARCHIVE)
+        qc.all_questions = all_questions(0) + list(generator.enumerate_questions(min_answers=2))
+        qc.validate_all(use_cache=False)
+        expected = qc.compatibility
+        qc.validate_all(use_cache=False, processes=3)
+        self.assertTrue(qc.compatibility == expected, "Parallel and serial validation should match!")
+
+    def test_MirrorRows(self):
+        """
+        Test that the mirrored upper triangle matches counting every pair of bitmaps
+        """
+        rng = random.Random(0)
+        masks = [rng.getrandbits(40) for _ in range(15)]
+        upper_rows = compatibility_rows(masks, 0, 7) + compatibility_rows(masks, 7, len(masks))
+        self.assertTrue(all(len(row) == len(masks) - i for i, row in enumerate(upper_rows)), "Rows should only hold the upper triangle!")
+        expected = [[(mask & other_mask).bit_count() for other_mask in masks] for mask in masks]
+        got = [list(row) for row in mirror_rows(upper_rows)]
+        self.assertTrue(got == expected, error_msg("compatibility matrix", expected, got))
+
+    def test_CompatibilityMatrix(self):
+        """
+        Test that the compatibility matrix counts the mutual answers of every pair of questions
+        """
+        qc = QuizConstructor(TESTARCHIVE)
+        qc.create_quiz()
+        n = len(qc.all_questions)
+        self.assertTrue(len(qc.compatibility) == n and all(len(row) == n for row in qc.compatibility))
+        for question in qc.all_questions[:5]:
+            for other_question in qc.all_questions:
+                expected = len(question.get_mutual_answers(other_question, TESTARCHIVE.drivers))
+                got = qc.get_compatibility(question, other_question)
+                self.assertTrue(got == expected, error_msg(f"mutual answers of {question} and {other_question}", expected, got))
+
+
+class TestAnswerCache(unittest.TestCase):
+
+    def tearDown(self):
+        remove_answer_cache()
+
+    def test_CacheRoundTrip(self):
+        """
+        Test that cached answers and compatibility match freshly computed ones, and that a changed catalog misses the cache
+        """
+        qc = QuizConstructor(TESTARCHIVE)
+        qc.all_questions = all_questions(0)
+        qc.validate_all(use_cache=False)
+        expected = qc.compatibility
+        qc.validate_all() # Saves cache
+        cached_qc = QuizConstructor(TESTARCHIVE)
+        cached_qc.all_questions = all_questions(0)
+        key = cache_key(TESTARCHIVE, cached_qc.all_questions)
+        cache_path = os.path.join(TESTARCHIVE.db_path, QUESTION_CACHE_FILE)
+        self.assertTrue(AnswerCache.load(cache_path, key) != None, "Cache should be hit!")
+        cached_qc.validate_all()
+        self.assertTrue(cached_qc.compatibility == expected)
+        for question in cached_qc.all_questions:
+            got = question.get_all_answers(TESTARCHIVE.drivers)
+            expected_answers = [driver for driver in TESTARCHIVE.drivers if question.check_question(driver)]
+            self.assertTrue(got == expected_answers, f"Mismatching cached answers to {str(question)}!")
+        self.assertTrue(AnswerCache.load(cache_path, cache_key(TESTARCHIVE, cached_qc.all_questions[1:])) == None, "Changed catalog should miss cache!")
+
+    def test_CacheFallback(self):
+        """
+        Test that every module feeding predicates is fingerprinted and that a cache failing to load for any reason is rebuilt
+        """
+        sources = predicate_sources()
+        for name in ["question.py", "statstable.py", "bitset.py", "driver.py", "constructor.py", "season.py", "race.py", "hardcodes.py",
+                     "ages.py", "rating.py", "status.py", "geo.py", "statsindex.py", "readArchive.py"]:
+            self.assertTrue(name in sources, f"{name} missing from predicate sources!")
+        cache_path = os.path.join(TESTARCHIVE.db_path, "broken_" + QUESTION_CACHE_FILE)
+        broken_pickles = [
+            b"garbage", # UnpicklingError
+            pickle.dumps(["not", "a", "dict"]), # AttributeError
+            pickle.dumps({"key": "key"}), # KeyError
+            b"cno_such_module\nThing\n." # ImportError
+        ]
+        try:
+            for data in broken_pickles:
+                with open(cache_path, "wb") as cache_file:
+                    cache_file.write(data)
+                self.assertTrue(AnswerCache.load(cache_path, "key") == None, f"Broken cache {data[:20]} should be rebuilt!")
+        finally:
+            os.remove(cache_path)
+
+    def test_UnwritableCache(self):
+        """
+        Test that validation carries on without caching if the cache cannot be written, leaving no partial file behind
+        """
+        cache_path = os.path.join(TESTARCHIVE.db_path, QUESTION_CACHE_FILE)
+        remove_answer_cache()
+        os.mkdir(cache_path) # Cache path taken by a directory, so saving fails
+        try:
+            qc = QuizConstructor(TESTARCHIVE)
+            qc.all_questions = all_questions(0)
+            qc.validate_all()
+            self.assertTrue(len(qc.compatibility) == len(qc.all_questions), "Validation should complete without cache!")
+            self.assertFalse(os.path.exists(cache_path + ".tmp"), "Failed save should not leave a temporary file!")
+        finally:
+            os.rmdir(cache_path)
+
+
+class TestPairCache(unittest.TestCase):
+
+    def test_LRUEviction(self):
+        """
+        Test that the least recently used pair is evicted and pairs are unordered
+        """
+        questions = all_questions(0)[:4]
+        drivers = TESTARCHIVE.drivers
+        cache = PairCache(max_size=2)
+        cache.put(questions[0], questions[1], drivers, 1)
+        cache.put(questions[0], questions[2], drivers, 2)
+        self.assertTrue(cache.get(questions[1], questions[0], drivers) == 1) # Pair 0-1 is now most recent
+        cache.put(questions[0], questions[3], drivers, 3) # Evicts pair 0-2
+        self.assertTrue(cache.get(questions[0], questions[2], drivers) == None)
+        self.assertTrue(cache.get(questions[0], questions[1], drivers) == 1)
+        self.assertTrue(cache.get(questions[3], questions[0], drivers) == 3)
+        self.assertTrue(cache.get(questions[0], questions[1], drivers[:]) == None, "Other candidate list should miss cache!")
+        stats = cache.stats()
+        self.assertTrue(len(cache) == 2 and stats["size"] == 2)
+        self.assertTrue(stats["hits"] == 3 and stats["misses"] == 2, f"Unexpected statistics {stats}!")
+        self.assertTrue(abs(stats["hit_rate"] - 0.6) < 1e-9)
+
+    def test_SharedCache(self):
+        """
+        Test that mutual answers are cached once per pair, regardless of question order
+        """
+        question1 = new_question(1, 2, questionID=2202)
+        question2 = new_question(1, 1, questionID=1000)
+        Question.pair_cache.clear()
+        first = question1.get_mutual_answers(question2, TESTARCHIVE.drivers)
+        second = question2.get_mutual_answers(question1, TESTARCHIVE.drivers)
+        self.assertTrue(first == second)
+        self.assertTrue(Question.pair_cache.stats()["hits"] == 1 and len(Question.pair_cache) == 1)
+
+
+class TestCalibration(unittest.TestCase):
+
+    def test_MaskWeights(self):
+        """
+        Test that chunked weight sums match summing weights of set bits
+        """
+        weights = [random.random() for _ in range(45)]
+        mask_weights = MaskWeights(weights)
+        for _ in range(50):
+            mask = random.getrandbits(45)
+            expected = sum(weights[i] for i in range(45) if mask >> i & 1)
+            self.assertTrue(abs(mask_weights.total(mask) - expected) < 1e-9)
+
+    def test_Calibration(self):
+        """
+        Test that scores follow from fame-weighted answers and tiers cover every answerable question
+        """
+        questions = all_questions(0)
+        drivers = TESTARCHIVE.drivers
+        calibrator = DifficultyCalibrator(questions, drivers)
+        calibrator.calibrate()
+        fame = driver_fame(drivers)
+        self.assertTrue(all(0 <= x <= 1 for x in fame))
+        for question in questions[:5]:
+            for other_question in questions:
+                answers = [drivers.index(x) for x in question.get_mutual_answers(other_question, drivers)]
+                stats = calibrator.cell_stats(question, other_question)
+                self.assertTrue(stats.count == len(answers))
+                if len(answers) == 0:
+                    self.assertTrue(math.isinf(stats.score))
+                    continue
+                total = sum(fame[i] for i in answers)
+                self.assertTrue(abs(stats.score - 1/(1 + total)) < 1e-9)
+                expected_entropy = -sum(fame[i]/total*math.log2(fame[i]/total) for i in answers if fame[i] > 0)
+                self.assertTrue(abs(stats.entropy - expected_entropy) < 1e-9)
+        tiers = [calibrator.get_question_tier(question) for question in questions]
+        self.assertTrue(set(x for x in tiers if x != None) == {1, 2, 3})
+        grid_tier = calibrator.get_grid_tier(questions[:3], questions[3:6])
+        self.assertTrue(grid_tier in [None, 1, 2, 3])
+        n = len(questions)
+        self.assertTrue(all(calibrator.pair_scores[i][j] == calibrator.pair_scores[j][i] for i in range(n) for j in range(n)))
+        expected_bounds = tier_bounds([calibrator.pair_scores[i][j] for i in range(n) for j in range(i + 1, n)])
+        self.assertTrue(calibrator.cell_bounds == expected_bounds, error_msg("cell bounds", expected_bounds, calibrator.cell_bounds))
+
+
+class TestConstructorChampionship(unittest.TestCase):
+    """
+    Testclass includes tests for constructors' championship
+    """
+
+    def test_ConstructorChampions(self):
+        """
+        Test that constructors' champions are only awarded from 1958 onwards and lead the standings
+        """
+        for season in TESTARCHIVE.seasons:
+            if season.year < 1958:
+                self.assertIsNone(season.constructor_champion, f"No constructors' champion expected in {season.year}!")
+            else:
+                standings = season.constructor_full_standings()
+                self.assertTrue(season.constructor_champion == standings[0][0], f"Champion should lead standings in {season.year}!")
+                self.assertTrue(season.constructor_champion.get_season_data(season.year)["champion"])
+
+    def test_ConstructorDroppedScores(self):
+        """
+        Test that constructors count only their best results until 1978 and that the 1958 and 1961 champions match the official standings
+        """
+        for season in TESTARCHIVE.seasons:
+            best_of_n = season.select_constructor_champion_method()
+            for constructor, points in season.constructor_full_standings():
+                scores = sorted([x for x in season.get_constructor_points(constructor) if x], reverse=True)
+                if season.year > 1978:
+                    self.assertTrue(best_of_n == 0 and points == sum(scores), error_msg(f"points of {str(constructor)} in {season.year}", sum(scores), points))
+                elif isinstance(best_of_n, int):
+                    self.assertTrue(points == sum(scores[:best_of_n]), error_msg(f"points of {str(constructor)} in {season.year}", sum(scores[:best_of_n]), points))
+                else:
+                    self.assertTrue(points <= sum(scores))
+        mismatches = [diff for diff in TESTARCHIVE.verify_standings() if diff.field == "constructor_champion" and diff.year in [1958, 1961]]
+        self.assertTrue(mismatches == [], f"Constructors' champions differ from official standings: {mismatches}!")
+
+    def test_ConstructorSeasons(self):
+        """
+        Test that a season is registered for every constructor that entered it, whether it scored or not
+        """
+        for constructor in TESTARCHIVE.constructors:
+            years = set(int(x.race.year) for x in constructor.results)
+            self.assertTrue(years <= set(constructor.season_entries.keys()), error_msg(f"seasons of {str(constructor)}", years, set(constructor.season_entries.keys())))
+
+    def test_ConstructorCareerData(self):
+        """
+        Test precomputed constructor aggregates, line-ups and driver indexes
+        """
+        for constructor in TESTARCHIVE.constructors:
+            career_data = constructor.get_career_data()
+            wins = len(set(x.race for x in constructor.results if x.position == 1))
+            self.assertTrue(career_data["n_wins"] == wins, error_msg(f"wins of {str(constructor)}", wins, career_data["n_wins"]))
+            self.assertTrue(career_data["n_podiums"] >= career_data["n_wins"])
+            self.assertTrue(career_data["n_entries"] == len(set(x.race for x in constructor.results)))
+            for year in constructor.season_lineups.keys():
+                for driver in constructor.get_lineup(year):
+                    self.assertTrue(constructor.name in driver.team_names)
+                    self.assertTrue(driver in TESTARCHIVE.get_team_drivers(constructor.name))
+            self.assertTrue(set(constructor.drivers) == constructor.driver_set)
+        for driver in TESTARCHIVE.drivers:
+            self.assertTrue(len(driver.teams) == len(set(driver.teams)), f"Duplicate teams of {str(driver)}!")
+            self.assertTrue(driver.team_names == set(team.name for team in driver.teams), error_msg(f"team names of {str(driver)}", set(team.name for team in driver.teams), driver.team_names))
+
+    def test_ConstructorPointsAllCars(self):
+        """
+        Test that from 1979 onwards constructor points are the sum of the points of its drivers
+        """
+        for season in TESTARCHIVE.seasons:
+            if season.year < 1979:
+                continue
+            for race in season.races:
+                expected = {}
+                for driver, constructor in race.get_entrants():
+                    expected[constructor] = expected.get(constructor, 0) + race._saved_points[driver]
+                for constructor in expected.keys():
+                    got = race._saved_constructor_points.get(constructor, 0)
+                    self.assertAlmostEqual(got, expected[constructor], msg=error_msg(f"{str(constructor)} points in {str(race)}", expected[constructor], got))
+
+
+class TestDroppedScores(unittest.TestCase):
+    """
+    Testclass includes tests for DroppedScores class
+    """
+
+    def test_BestOfN(self):
+        """
+        Test best n results of whole season
+        """
+        dropped_scores = DroppedScores({"A": [9, None, 6, 0, 4, 9], "B": [6, 6, None, None, None, None]}, 3)
+        self.assertTrue(dropped_scores.get_counted("A") == 24, error_msg("counted points", 24, dropped_scores.get_counted("A")))
+        self.assertTrue(dropped_scores.get_dropped("A") == [4], error_msg("dropped rounds", [4], dropped_scores.get_dropped("A")))
+        self.assertTrue(dropped_scores.get_counted("B") == 12 and dropped_scores.get_dropped("B") == [])
+
+    def test_SplitSeason(self):
+        """
+        Test best n of first m results and best i of remaining results
+        """
+        dropped_scores = DroppedScores({"A": [9, 1, 6, 4, 2, 3, 9]}, ((2, 4), (2, 3)))
+        self.assertTrue(dropped_scores.get_counted("A") == 27, error_msg("counted points", 27, dropped_scores.get_counted("A")))
+        self.assertTrue(dropped_scores.get_dropped("A") == [1, 3, 4], error_msg("dropped rounds", [1, 3, 4], dropped_scores.get_dropped("A")))
+
+    def test_SeasonStandings(self):
+        """
+        Test that the champion of each season has the most counted points
+        """
+        for season in TESTARCHIVE.seasons:
+            standings = season.driver_championship_standings
+            self.assertTrue(standings[season.champion] == max(standings.values()), f"Champion should have most counted points in {season.year}!")
+
+
+class TestChampionshipProgression(unittest.TestCase):
+    """
+    Testclass includes tests for ChampionshipProgression class
+    """
+
+    def test_ProgressionTotals(self):
+        """
+        Test that cumulative points after the final round match the points of the season
+        """
+        for season in TESTARCHIVE.seasons:
+            progression = season.get_progression()
+            n_rounds = len(season.races)
+            for driver in progression.drivers:
+                expected = sumWithNone(season.get_points(driver))
+                got = progression.total_after(driver, n_rounds)
+                self.assertAlmostEqual(got, expected, msg=error_msg(f"{str(driver)} total in {season.year}", expected, got))
+            self.assertTrue(1 <= progression.clinch_round <= n_rounds, f"Clinch round out of range in {season.year}!")
+            self.assertTrue(sum(progression.rounds_led.values()) == n_rounds, f"Rounds led should sum to number of rounds in {season.year}!")
+            self.assertTrue(progression.final_margin >= 0, f"Champion should not trail in {season.year}!")
+
+    def test_BestCase(self):
+        """
+        Test that the best case total of a running total matches adding the remaining rounds one by one
+        """
+        random.seed(3)
+        for best_of_n in [0, 4, ((5,6),(4,5)), ((4,7),(4,8))]:
+            for _ in range(20):
+                points = [random.choice([None, 0, 1, 2, 3, 4, 6, 8, 9]) for _ in range(12)]
+                max_points = [random.choice([4.5, 9]) for _ in range(12)]
+                for i in range(len(points)):
+                    running_total = RunningBestOfN(best_of_n)
+                    replay = RunningBestOfN(best_of_n)
+                    for x in points[:i+1]:
+                        running_total.add(x)
+                        replay.add(x)
+                    remaining = [[] for _ in running_total.limits]
+                    for j in range(i+1, len(points)):
+                        remaining[running_total.part(j)].append(max_points[j])
+                        replay.add(max_points[j])
+                    prefixes = [[sum(sorted(x, reverse=True)[:k]) for k in range(len(x) + 1)] for x in remaining]
+                    got = running_total.best_case(prefixes)
+                    self.assertTrue(got == replay.total, error_msg(f"best case of {points[:i+1]} ({best_of_n})", replay.total, got))
+
+
+class TestPointsSimulator(unittest.TestCase):
+    """
+    Testclass includes tests for PointsSimulator class
+    """
+
+    def test_HistoricalRules(self):
+        """
+        Test that simulating historical rules reproduces the points of every season
+        """
+        simulations = PointsSimulator(TESTARCHIVE).simulate([HISTORICAL_RULES])[str(HISTORICAL_RULES)]
+        for season in TESTARCHIVE.seasons:
+            for driver in simulations[season.year].points.keys():
+                self.assertTrue(simulations[season.year].get_points(driver) == season.get_points(driver),
+                                f"Mismatching points for {str(driver)} in {season.year}!")
+
+    def test_AlternativeRules(self):
+        """
+        Test that simulating alternative rules does not modify canonical data
+        """
+        season = TESTARCHIVE.seasons[-1]
+        champion = season.champion
+        points = season.get_all_driver_points()
+        simulator = PointsSimulator(TESTARCHIVE)
+        simulations = simulator.simulate(ALTERNATIVE_RULES + [NO_DROPPED_SCORES, PointsRules("Custom", sprint_points=[0], fastest_lap=(0, 0))])
+        self.assertTrue(len(simulations) == len(ALTERNATIVE_RULES) + 2, error_msg("number of simulations", len(ALTERNATIVE_RULES) + 2, len(simulations)))
+        self.assertTrue(season.champion == champion, "Simulation should not change champion!")
+        self.assertTrue(season.get_all_driver_points() == points, "Simulation should not change points!")
+        alt_champions = simulator.alternate_champions(ALTERNATIVE_RULES[-1])
+        self.assertTrue(alt_champions[season.year] == simulations[str(ALTERNATIVE_RULES[-1])][season.year].champion)
+
+
+class TestLapStore(unittest.TestCase):
+    """
+    Testclass includes tests for LapStore and PitStopStore classes
+    """
+
+    def test_LapChart(self):
+        """
+        Test that every lap of a lap chart has a single leader, matching laps led
+        """
+        laps = TESTARCHIVE.laps
+        self.assertTrue(laps != None and len(laps) > 0, "Lap times not loaded!")
+        for raceId in list(laps.race_index.keys())[:10]:
+            chart = laps.lap_chart(raceId)
+            laps_led = laps.get_race_laps_led(raceId)
+            self.assertTrue(sum(laps_led.values()) == len(chart), error_msg("laps led", len(chart), sum(laps_led.values())))
+            for driverId in laps_led.keys():
+                self.assertTrue(laps_led[driverId] == sum(1 for lap in chart if lap[0] == driverId))
+        for driver in TESTARCHIVE.drivers:
+            self.assertTrue(driver.laps_led == laps.get_laps_led(driver.driverId))
+        raceId = next(iter(laps.race_index.keys()))
+        for driverId in set(laps.data["driver"][i] for i in laps.race_rows(raceId)):
+            rows = sorted((i for i in laps.race_rows(raceId) if laps.data["driver"][i] == driverId), key=lambda i: laps.data["lap"][i])
+            expected = array("i", (laps.data["milliseconds"][i] for i in rows))
+            self.assertTrue(laps.driver_lap_times(raceId, driverId) == expected, f"Mismatching lap times of driver {driverId} in race {raceId}!")
+        self.assertTrue(len(laps.driver_lap_times(raceId, -1)) == 0, "Driver without laps should have no lap times!")
+
+    def test_Chunks(self):
+        """
+        Test that chunk size does not affect stored data
+        """
+        laps = LapStore()
+        laps.read_csv(os.path.join(TESTARCHIVE.db_path, "lap_times.csv"), chunk_size=7)
+        self.assertTrue(laps.data == TESTARCHIVE.laps.data, "Chunked read should match full read!")
+        self.assertTrue(laps.race_index == TESTARCHIVE.laps.race_index and laps.entry_index == TESTARCHIVE.laps.entry_index)
+
+    def test_PitStops(self):
+        """
+        Test pit stop counts per driver and per race
+        """
+        pit_stops = TESTARCHIVE.pit_stops
+        self.assertTrue(pit_stops != None, "Pit stops not loaded!")
+        total = sum(sum(pit_stops.get_race_pit_stops(raceId).values()) for raceId in pit_stops.race_index.keys())
+        self.assertTrue(total == len(pit_stops), error_msg("pit stops", len(pit_stops), total))
+        self.assertTrue(sum(driver.pit_stop_count for driver in TESTARCHIVE.drivers) == len(pit_stops))
+
+
+class TestCircuitIndex(unittest.TestCase):
+    """
+    Testclass includes tests for CircuitIndex class
+    """
+
+    def test_RadiusQuery(self):
+        """
+        Test that radius and nearest neighbour queries match brute force distances
+        """
+        index = TESTARCHIVE.spatial_index
+        circuits = [c for c in TESTARCHIVE.circuits if c.lat != None and c.lng != None]
+        self.assertTrue(index.size == len(circuits), error_msg("indexed circuits", len(circuits), index.size))
+        for circuit in circuits:
+            for km in [0, 500, 2000, 20000]:
+                expected = set(c for c in circuits if haversine(circuit.lat, circuit.lng, c.lat, c.lng) <= km)
+                got = set(index.within(circuit.lat, circuit.lng, km))
+                self.assertTrue(got == expected, error_msg(f"circuits within {km} km of {str(circuit)}", len(expected), len(got)))
+            nearest, distance = index.nearest(circuit.lat, circuit.lng, exclude=circuit)
+            expected = min(haversine(circuit.lat, circuit.lng, c.lat, c.lng) for c in circuits if c != circuit)
+            self.assertAlmostEqual(distance, expected)
+        self.assertTrue(index.highest.alt == max(c.alt for c in circuits if c.alt != None))
+        self.assertTrue(all(driver.spatial_index is index for driver in TESTARCHIVE.drivers), "Drivers should share the index of their archive!")
+
+
+class TestAges(unittest.TestCase):
+    """
+    Testclass includes tests for age records
+    """
+
+    def test_Birthdays(self):
+        """
+        Test birthday and age calculations, including leap day birthdays
+        """
+        dob = date_to_ordinal("2000-02-29")
+        self.assertTrue(birthday_ordinal(dob, 1) == date_to_ordinal("2001-03-01"))
+        self.assertTrue(birthday_ordinal(dob, 4) == date_to_ordinal("2004-02-29"))
+        self.assertTrue(age_in_years(dob, date_to_ordinal("2023-02-28")) == 22)
+        self.assertTrue(age_in_years(dob, date_to_ordinal("2023-03-01")) == 23)
+
+    def test_AgeRecords(self):
+        """
+        Test that youngest and oldest winners match brute force search over result records
+        """
+        records = [x for driver in TESTARCHIVE.drivers for x in driver.results if x.age != None]
+        wins = [x for x in records if x.position == 1]
+        age_records = TESTARCHIVE.get_age_records()
+        self.assertTrue(age_records.get_youngest("win").age == min(x.age for x in wins))
+        self.assertTrue(age_records.get_oldest("win").age == max(x.age for x in wins))
+        self.assertTrue(age_records.get_oldest("entry").age == max(x.age for x in records))
+        for record in records:
+            self.assertTrue(record.age == record.race.date_ordinal - record.driver.dob_ordinal)
+        for years in [20, 25, 30, 40]:
+            expected = set(x.driver for x in wins if age_in_years(x.driver.dob_ordinal, x.race.date_ordinal) < years)
+            got = set(age_records.drivers_before_age("win", years))
+            self.assertTrue(got == expected, error_msg(f"winners before turning {years}", len(expected), len(got)))
+
+
+class TestRatingEngine(unittest.TestCase):
+    """
+    Testclass includes tests for RatingEngine class
+    """
+
+    def test_ZeroSum(self):
+        """
+        Test that every race redistributes rating points without creating or destroying them
+        """
+        ratings = TESTARCHIVE.ratings
+        total = sum(ratings.current.values())
+        expected = ELO_INITIAL_RATING * len(ratings.current)
+        self.assertAlmostEqual(total, expected, places=6, msg=error_msg("total rating", expected, total))
+        for driver in TESTARCHIVE.drivers:
+            if driver.driverId not in ratings.history.keys():
+                self.assertTrue(driver.peak_rating == None, error_msg(f"peak rating of unrated {str(driver)}", None, driver.peak_rating))
+                continue
+            self.assertTrue(driver.peak_rating >= driver.rating, f"Peak rating of {str(driver)} below current rating!")
+        self.assertTrue(RatingEngine().get_peak_rating(-1) == None, "Unrated driver should have no peak rating!")
+
+    def test_IncrementalUpdate(self):
+        """
+        Test that updating ratings with new races matches rating all races at once
+        """
+        races = sorted(TESTARCHIVE.races, key=lambda x: (x.year, x.round))
+        full = RatingEngine()
+        full.update(races)
+        incremental = RatingEngine()
+        incremental.update(races[:len(races)//2])
+        start = incremental.update(races)
+        self.assertTrue(start == len(races)//2, error_msg("first recomputed race", len(races)//2, start))
+        self.assertTrue(incremental.update(races) == None, "Ratings should already be up to date!")
+        self.assertTrue(incremental.current == full.current, "Incremental ratings should match full ratings!")
+        self.assertTrue(incremental.history == full.history)
+
+    def test_CorruptCache(self):
+        """
+        Test that unreadable or malformed rating caches load as an empty engine
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "ratings.pkl")
+            for content in [b"", b"not a pickle", pickle.dumps([1, 2]), pickle.dumps({"params": (None, None)}),
+                            pickle.dumps({"params": (RatingEngine().k, RatingEngine().initial), "history": {}})]:
+                with open(path, "wb") as cache_file:
+                    cache_file.write(content)
+                engine = RatingEngine.load(path)
+                self.assertTrue(engine.history == {} and engine.current == {}, f"Malformed cache {content} should load as empty engine!")
+
+
+class TestStatus(unittest.TestCase):
+
+    def test_ClassifyStatus(self):
+        """
+        Test categorization of status texts
+        """
+        for status, expected in [("Finished", FINISHED), ("+1 Lap", LAPPED), ("+12 Laps", LAPPED), ("Engine", MECHANICAL),
+                                 ("Gearbox", MECHANICAL), ("Accident", ACCIDENT), ("Spun off", ACCIDENT), ("Disqualified", DSQ),
+                                 ("Did not qualify", DNS), ("Withdrew", DNS)]:
+            got = classify_status(status)
+            self.assertTrue(got == expected, error_msg(status, expected, got))
+
+    def test_DNFBitmaps(self):
+        """
+        Test that retirement bitmaps of drivers and races agree with result records
+        """
+        for driver in TESTARCHIVE.drivers:
+            dnf_races = set(record.race for record in driver.results if record.category in DNF_CATEGORIES)
+            self.assertTrue(driver.get_dnf_count() == len(dnf_races), error_msg("dnf count", len(dnf_races), driver.get_dnf_count()))
+            self.assertTrue(driver.dnf_mask == races_mask(dnf_races))
+            for record in driver.results:
+                self.assertTrue(record.category != None, "Result should be categorized!")
+                self.assertTrue(driver.retired_at(record.race) == (record.race in dnf_races))
+                self.assertTrue(record.race.retired(driver) == (record.race in dnf_races))
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file